@@ -0,0 +1,91 @@
+"""Dispatch cost of one incoming event with 1, 100 and 10,000 open conversations.
+
+Compares:
+
+- wait_for:  every conversation waits with client.wait_for(check=...), so
+             discord.py runs every pending check against every event
+- router:    router.ConversationRouter finds the conversation with one dict
+             lookup and restarts its idle timer on the shared scheduler
+
+Usage:
+    python benchmarks/bench_conversation_router.py [--events 20000]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import ConversationRouter
+from scheduler import TimerScheduler
+
+class Event:
+    """Minimal stand-in for a message or interaction"""
+    __slots__ = ("channel_id", "user_id")
+
+    def __init__(self, channel_id: int, user_id: int):
+        self.channel_id = channel_id
+        self.user_id = user_id
+
+def make_check(channel_id: int, user_id: int):
+    # The shape of the checks register.py used to pass to wait_for
+    return lambda m: m.user_id == user_id and m.channel_id == channel_id
+
+def dispatch_wait_for(listeners: list, event: Event) -> int:
+    """What Client.dispatch does with pending wait_for listeners"""
+    matched = 0
+    removed = []
+    for i, (future, condition) in enumerate(listeners):
+        if condition(event):
+            matched += 1
+            removed.append(i)
+    for i in reversed(removed):
+        # A matched listener is replaced by the conversation's next wait_for
+        listeners.append(listeners.pop(i))
+    return matched
+
+def bench_wait_for(keys: list, events: list) -> float:
+    listeners = [(None, make_check(channel_id, user_id)) for channel_id, user_id in keys]
+    started = time.perf_counter()
+    for event in events:
+        dispatch_wait_for(listeners, event)
+    return (time.perf_counter() - started) / len(events)
+
+async def bench_router(keys: list, events: list) -> float:
+    scheduler = TimerScheduler()
+    router = ConversationRouter("bench", timeout=600, scheduler=scheduler)
+    for key in keys:
+        router.start(key, object())
+    started = time.perf_counter()
+    for event in events:
+        router.route((event.channel_id, event.user_id))
+    elapsed = (time.perf_counter() - started) / len(events)
+    scheduler.close()
+    return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000, help="events dispatched per measurement")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for count in args.sessions:
+        keys = [(rng.getrandbits(60), rng.getrandbits(60)) for _ in range(count)]
+        events = [Event(*rng.choice(keys)) for _ in range(args.events)]
+        # Large listener lists are slow enough that fewer events give a stable number
+        wait_for_events = events[:max(200, args.events * 100 // max(count, 100))]
+
+        wait_for = bench_wait_for(keys, wait_for_events)
+        routed = await bench_router(keys, events)
+        print(
+            f"{count:>6} sessions: wait_for {wait_for * 1e6:9.2f} us/event, "
+            f"router {routed * 1e6:6.2f} us/event ({wait_for / routed:.1f}x)"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
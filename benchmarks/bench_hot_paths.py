@@ -0,0 +1,212 @@
+"""Throughput and allocations of the pure hot paths, at realistic and extreme sizes.
+
+Covers the registration questions parser and formatter, role lookup by
+text, the poll embed builders and the admin check, with fake guilds,
+members and interactions from benchmarks/fakes.py. Nothing touches the
+network or the database.
+
+Each case reports the best ops/sec over several timed runs and the peak
+bytes allocated by a single call. Results are saved as JSON so two
+commits can be compared:
+
+    python benchmarks/bench_hot_paths.py --output before.json
+    git checkout other-branch
+    python benchmarks/bench_hot_paths.py --output after.json --compare before.json
+
+Usage:
+    python benchmarks/bench_hot_paths.py [--filter poll] [--min-time 0.2] [--output results.json] [--compare old.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+from polls import Poll
+from registration import Question, RegistrationConfig, parse_questions_field, format_questions_field, extract_role_from_text
+from commands.poll import create_results_embed, create_final_embed
+from fakes import make_guild, make_member, FakeInteraction
+
+# A change beyond this fraction of the old ops/sec is flagged by --compare
+REGRESSION_THRESHOLD = 0.10
+
+class Case:
+    def __init__(self, name: str, func, size: str):
+        self.name = name
+        self.func = func  # no-argument callable or coroutine function
+        self.size = size
+
+def make_questions(count: int, seed: int = 0) -> list:
+    """Alternating text and option questions, options mapped to role mentions"""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(count):
+        if i % 2:
+            options = [(f"Choice {j}", f"<@&{rng.getrandbits(60)}>") for j in range(5)]
+            questions.append(Question(f"Which team do you pick for round {i}?", "Option", "Role", options))
+        else:
+            action = "Nickname" if i == 0 else "None"
+            questions.append(Question(f"What is your in-game name for question {i}?", "Text", action, []))
+    return questions
+
+def make_poll(votes: int, seed: int = 0) -> Poll:
+    rng = random.Random(seed)
+    poll = Poll(1, "Which map should we play next?", ["Dust", "Inferno", "Mirage", "Nuke", "Vertigo"],
+                time.time() + 3600, 1, "Benchmark", None)
+    rows = sorted((rng.getrandbits(60), rng.randrange(5)) for _ in range(votes))
+    poll.load_votes(rows)
+    return poll
+
+def build_cases() -> list:
+    cases = []
+
+    for count, size in ((3, "realistic"), (25, "extreme")):
+        questions = make_questions(count)
+        field = format_questions_field(questions)
+        config = RegistrationConfig(registration_channel_id=1 << 59, management_channel_id=1 << 58,
+                                    manager_role_ids=[1 << 57], questions=questions)
+        embed_dict = config.to_embed_dict()
+        cases.append(Case(f"parse_questions_field[{count}q]", lambda field=field: parse_questions_field(field), size))
+        cases.append(Case(f"format_questions_field[{count}q]", lambda q=questions: format_questions_field(q), size))
+        cases.append(Case(f"RegistrationConfig.from_embed_dict[{count}q]",
+                          lambda data=embed_dict: RegistrationConfig.from_embed_dict(data), size))
+
+    for count, size in ((20, "realistic"), (250, "extreme")):
+        guild = make_guild(count)
+        last = guild.roles[-1]
+        cases.append(Case(f"extract_role_from_text[mention,{count}r]", lambda g=guild, r=last: extract_role_from_text(g, r.mention), size))
+        cases.append(Case(f"extract_role_from_text[name,{count}r]", lambda g=guild, r=last: extract_role_from_text(g, r.name), size))
+        cases.append(Case(f"extract_role_from_text[casefold,{count}r]", lambda g=guild, r=last: extract_role_from_text(g, r.name.upper()), size))
+        cases.append(Case(f"extract_role_from_text[miss,{count}r]", lambda g=guild: extract_role_from_text(g, "No Such Role"), size))
+
+        # Admin roles come from the cache in steady state; the member holds every role but the admin ones
+        admin_roles = guild.roles[:3]
+        utils._admin_role_cache[guild.id] = frozenset(role.id for role in admin_roles)
+        regular = make_member(guild, 0)
+        regular.roles = guild.roles[3:]
+        admin = make_member(guild, 0, administrator=True)
+        role_admin = make_member(guild, 0)
+        role_admin.roles = guild.roles[3:] + [admin_roles[-1]]
+        for label, member in (("administrator", admin), ("admin_role", role_admin), ("denied", regular)):
+            interaction = FakeInteraction(guild, member)
+            cases.append(Case(f"is_admin[{label},{count}r]", lambda i=interaction: utils.is_admin(i), size))
+
+    for votes, size in ((100, "realistic"), (100_000, "extreme")):
+        poll = make_poll(votes)
+        cases.append(Case(f"create_results_embed[5o,{votes}v]", lambda p=poll: create_results_embed(p, "59m"), size))
+        cases.append(Case(f"create_final_embed[5o,{votes}v]", lambda p=poll: create_final_embed(p), size))
+        voter = poll.voter_ids[len(poll.voter_ids) // 2]
+        cases.append(Case(f"Poll.set_vote[change,{votes}v]", lambda p=poll, v=voter: p.set_vote(v, (p.choice_of(v) + 1) % 5), size))
+
+    return cases
+
+def _timed_loop(func, is_async: bool, loop: asyncio.AbstractEventLoop):
+    if is_async:
+        async def run(n: int) -> float:
+            started = time.perf_counter()
+            for _ in range(n):
+                await func()
+            return time.perf_counter() - started
+        return lambda n: loop.run_until_complete(run(n))
+
+    def run_sync(n: int) -> float:
+        started = time.perf_counter()
+        for _ in range(n):
+            func()
+        return time.perf_counter() - started
+    return run_sync
+
+def measure(case: Case, loop: asyncio.AbstractEventLoop, min_time: float, repeat: int) -> dict:
+    # One untimed call tells plain callables from ones returning coroutines
+    result = case.func()
+    is_async = asyncio.iscoroutine(result)
+    if is_async:
+        loop.run_until_complete(result)
+    run = _timed_loop(case.func, is_async, loop)
+
+    # Grow the batch until one run takes min_time, like timeit's autorange
+    n = 1
+    while run(n) < min_time:
+        n *= 2
+    best = min(run(n) for _ in range(repeat))
+
+    tracemalloc.start()
+    try:
+        run(1)  # warm caches allocated on first use
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        run(1)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": case.name,
+        "size": case.size,
+        "ops_per_sec": n / best,
+        "us_per_op": best / n * 1e6,
+        "alloc_peak_bytes": max(0, peak - baseline),
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results: list, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {entry["name"]: entry for entry in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for entry in results:
+        old = baseline.get(entry["name"])
+        if old is None:
+            continue
+        change = entry["ops_per_sec"] / old["ops_per_sec"] - 1
+        flag = "  REGRESSION" if change < -REGRESSION_THRESHOLD else ""
+        print(f"  {entry['name']:<48} {change * 100:+6.1f}% ops/sec, "
+              f"{entry['alloc_peak_bytes'] - old['alloc_peak_bytes']:+7d} B{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case; the best is kept")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="JSON", help="print changes against an earlier results file")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    cases = [case for case in build_cases() if not args.filter or args.filter in case.name]
+    results = []
+    for case in cases:
+        result = measure(case, loop, args.min_time, args.repeat)
+        results.append(result)
+        print(f"{case.name:<48} {result['ops_per_sec']:>12,.0f} ops/s {result['us_per_op']:>9.2f} us "
+              f"{result['alloc_peak_bytes']:>8d} B peak  ({case.size})")
+    loop.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved {len(results)} result(s) to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
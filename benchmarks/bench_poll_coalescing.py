@@ -0,0 +1,112 @@
+"""Vote throughput of a busy poll with and without coalesced embed edits.
+
+Simulates a poll message whose edits share a per-channel rate limit
+(5 edits per 5 seconds by default) and compares:
+
+- direct:    every vote edits the embed before it is acknowledged
+- coalesced: every vote is acknowledged right away and the embed is
+             re-rendered at most once per window by coalesce.Coalescer
+
+Usage:
+    python benchmarks/bench_poll_coalescing.py [--votes 300] [--window 2]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coalesce import Coalescer
+
+class RateLimitedMessage:
+    """Fake message whose edits obey a fixed window rate limit"""
+
+    def __init__(self, limit: int, per: float, latency: float):
+        self.limit = limit
+        self.per = per
+        self.latency = latency
+        self.edits = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._lock = asyncio.Lock()
+
+    async def edit(self, **kwargs):
+        async with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.per:
+                self._window_start = now
+                self._window_count = 0
+            if self._window_count >= self.limit:
+                # Wait out the bucket like the library does after a 429
+                await asyncio.sleep(self._window_start + self.per - now)
+                self._window_start = time.monotonic()
+                self._window_count = 0
+            self._window_count += 1
+        await asyncio.sleep(self.latency)
+        self.edits += 1
+
+async def run(mode: str, votes: int, rate: float, window: float, args) -> dict:
+    message = RateLimitedMessage(args.limit, args.per, args.latency)
+    tallies = [0] * 5
+    ack_latencies = []
+
+    async def render():
+        await message.edit(embed=list(tallies))
+
+    coalescer = Coalescer(render, window)
+
+    async def vote(i: int):
+        started = time.monotonic()
+        tallies[i % len(tallies)] += 1
+        if mode == "direct":
+            await message.edit(embed=list(tallies))
+            await asyncio.sleep(args.latency)  # the ack itself
+        else:
+            await asyncio.sleep(args.latency)  # the ack itself
+            coalescer.request()
+        ack_latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    tasks = []
+    for i in range(votes):
+        tasks.append(asyncio.create_task(vote(i)))
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+    acked = time.monotonic() - started
+    while coalescer.pending:
+        await asyncio.sleep(0.01)
+
+    ack_latencies.sort()
+    return {
+        "mode": mode,
+        "votes": votes,
+        "acked_in_s": acked,
+        "votes_per_s": votes / acked,
+        "ack_p50_ms": statistics.median(ack_latencies) * 1000,
+        "ack_p99_ms": ack_latencies[int(len(ack_latencies) * 0.99) - 1] * 1000,
+        "edits": message.edits,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--votes", type=int, default=300, help="number of votes to cast")
+    parser.add_argument("--rate", type=float, default=100.0, help="incoming votes per second")
+    parser.add_argument("--window", type=float, default=2.0, help="coalescing window in seconds")
+    parser.add_argument("--limit", type=int, default=5, help="edits allowed per rate limit window")
+    parser.add_argument("--per", type=float, default=5.0, help="rate limit window in seconds")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated REST latency in seconds")
+    args = parser.parse_args()
+
+    for mode in ("direct", "coalesced"):
+        result = await run(mode, args.votes, args.rate, args.window, args)
+        print(
+            f"{result['mode']:>9}: {result['votes']} votes acked in {result['acked_in_s']:.2f}s "
+            f"({result['votes_per_s']:.1f} votes/s), ack p50 {result['ack_p50_ms']:.0f}ms, "
+            f"p99 {result['ack_p99_ms']:.0f}ms, {result['edits']} embed edits"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""Memory used by poll vote state at 1M voters.
+
+Compares the old per-view layout (a set of voter IDs, a list of counts and
+a dict of who voted for what) with polls.Poll, which keeps voters in a
+sorted array('Q') and their choices in a parallel array('B').
+
+Usage:
+    python benchmarks/bench_poll_memory.py [--voters 1000000] [--polls 1000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from polls import Poll
+
+OPTIONS = ["Option A", "Option B", "Option C", "Option D", "Option E"]
+
+class LegacyPoll:
+    """Vote state as the old SimplePollView kept it"""
+
+    def __init__(self):
+        self.votes = [0] * len(OPTIONS)
+        self.voters = set()
+        self.choices = {}
+
+    def add_vote(self, user_id: int, choice: int):
+        self.votes[choice] += 1
+        self.voters.add(user_id)
+        self.choices[user_id] = choice
+
+    def has_voted(self, user_id: int) -> bool:
+        return user_id in self.voters
+
+def make_votes(voters: int, polls: int, seed: int) -> list:
+    """Snowflake-sized user IDs spread evenly over the polls"""
+    rng = random.Random(seed)
+    base = 100_000_000_000_000_000
+    return [(i % polls, base + rng.getrandbits(56), rng.randrange(len(OPTIONS))) for i in range(voters)]
+
+def measure(name: str, build, votes: list) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    polls = build(votes)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"name": name, "bytes": current, "build_s": elapsed, "polls": polls}
+
+def build_legacy(votes: list) -> dict:
+    polls = {}
+    for poll_id, user_id, choice in votes:
+        poll = polls.get(poll_id)
+        if poll is None:
+            poll = polls[poll_id] = LegacyPoll()
+        poll.add_vote(user_id, choice)
+    return polls
+
+def build_compact(votes: list) -> dict:
+    polls = {}
+    for poll_id, user_id, choice in votes:
+        poll = polls.get(poll_id)
+        if poll is None:
+            poll = polls[poll_id] = Poll(poll_id, "Question", OPTIONS, 0.0, 1, "Creator")
+        poll.set_vote(user_id, choice)
+    return polls
+
+def build_compact_loaded(votes: list) -> dict:
+    # How PollStore.load() fills a poll: rows already sorted by user ID
+    by_poll = {}
+    for poll_id, user_id, choice in votes:
+        by_poll.setdefault(poll_id, []).append((user_id, choice))
+    polls = {}
+    for poll_id, rows in by_poll.items():
+        rows.sort()
+        poll = polls[poll_id] = Poll(poll_id, "Question", OPTIONS, 0.0, 1, "Creator")
+        poll.load_votes(rows)
+    del by_poll, rows
+    return polls
+
+def time_lookups(polls: dict, votes: list, count: int) -> float:
+    sample = random.Random(1).sample(votes, min(count, len(votes)))
+    started = time.perf_counter()
+    for poll_id, user_id, _ in sample:
+        polls[poll_id].has_voted(user_id)
+    return (time.perf_counter() - started) / len(sample) * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voters", type=int, default=1_000_000, help="total votes across all polls")
+    parser.add_argument("--polls", type=int, default=1000, help="number of concurrent polls")
+    parser.add_argument("--lookups", type=int, default=100_000, help="membership checks to time")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    votes = make_votes(args.voters, args.polls, args.seed)
+    print(f"{args.voters} voters across {args.polls} polls")
+
+    for name, build in (("legacy", build_legacy), ("compact", build_compact), ("compact/load", build_compact_loaded)):
+        result = measure(name, build, votes)
+        lookup_ns = time_lookups(result["polls"], votes, args.lookups)
+        print(
+            f"{name:>12}: {result['bytes'] / 1024 / 1024:7.1f} MiB "
+            f"({result['bytes'] / args.voters:5.1f} B/voter), built in {result['build_s']:.2f}s, "
+            f"membership {lookup_ns:.0f} ns"
+        )
+        del result
+
+    # Vote changes and retractions only touch two counters
+    poll = Poll(0, "Question", OPTIONS, 0.0, 1, "Creator")
+    for user_id in range(10_000):
+        poll.set_vote(user_id, user_id % len(OPTIONS))
+    started = time.perf_counter()
+    for user_id in range(10_000):
+        poll.set_vote(user_id, (user_id + 1) % len(OPTIONS))
+    changed = time.perf_counter() - started
+    assert sum(poll.votes) == poll.total_votes == 10_000
+    started = time.perf_counter()
+    for user_id in range(10_000):
+        poll.retract_vote(user_id)
+    retracted = time.perf_counter() - started
+    assert sum(poll.votes) == poll.total_votes == 0
+    print(f"vote change {changed / 10_000 * 1e9:.0f} ns, retraction {retracted / 10_000 * 1e9:.0f} ns (10k voters)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,844 @@
+"""Local stand-in for the Discord gateway and REST API, for end-to-end load tests.
+
+Implements the part of the API the bot uses: identify/ready and guild
+creates on the gateway, INTERACTION_CREATE with interaction callbacks and
+webhook edits, message create/edit/delete/bulk delete/history and pins,
+channel and thread creation, member edits and command sync. REST routes
+enforce per-route and global rate limits and send the same X-RateLimit
+headers as Discord, so the bot's rate limit handling is exercised too.
+
+A /_control API lets benchmarks/load_driver.py read the seeded guilds,
+inject interactions and read request, 429 and gateway counters.
+
+Usage:
+    python benchmarks/fake_discord.py [--port 8080] [--guilds 50] [--shards 1]
+
+Then start the bot against it with any token:
+    DISCORD_API_BASE=http://127.0.0.1:8080/api/v10 DISCORD_TOKEN=fake APP_ID=1 python main.py
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import argparse
+import itertools
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+from aiohttp import web, WSMsgType
+
+log = logging.getLogger("fake_discord")
+
+DISCORD_EPOCH = 1420070400000
+HEARTBEAT_INTERVAL = 41250
+# Discord invalidates an interaction that was not answered within 3 seconds
+INTERACTION_TIMEOUT = 3.0
+BULK_DELETE_MAX_AGE = 14 * 24 * 60 * 60
+
+ADMINISTRATOR = 1 << 3
+EVERYONE_PERMISSIONS = (1 << 10) | (1 << 11) | (1 << 16) | (1 << 31)  # view, send, read history, use commands
+ALL_PERMISSIONS = (1 << 50) - 1
+
+EPHEMERAL = 1 << 6
+LOADING = 1 << 7
+
+# Callback types
+PONG, CHANNEL_MESSAGE, DEFERRED_CHANNEL_MESSAGE, DEFERRED_UPDATE, UPDATE_MESSAGE, AUTOCOMPLETE, MODAL = 1, 4, 5, 6, 7, 8, 9
+
+# (method, route) -> (requests, per seconds), counted per channel, guild or webhook like Discord does
+RATE_LIMITS = {
+    ("POST", "/channels/{channel_id}/messages"): (5, 5),
+    ("PATCH", "/channels/{channel_id}/messages/{message_id}"): (5, 5),
+    ("DELETE", "/channels/{channel_id}/messages/{message_id}"): (5, 1),
+    ("POST", "/channels/{channel_id}/messages/bulk-delete"): (1, 1),
+    ("GET", "/channels/{channel_id}/messages"): (5, 1),
+    ("PUT", "/channels/{channel_id}/messages/pins/{message_id}"): (5, 5),
+    ("POST", "/guilds/{guild_id}/channels"): (5, 10),
+    ("POST", "/channels/{channel_id}/threads"): (5, 10),
+    ("POST", "/channels/{channel_id}/messages/{message_id}/threads"): (5, 10),
+    ("PATCH", "/guilds/{guild_id}/members/{user_id}"): (10, 10),
+    ("PUT", "/applications/{application_id}/commands"): (2, 60),
+    ("PUT", "/applications/{application_id}/guilds/{guild_id}/commands"): (2, 60),
+    ("POST", "/webhooks/{application_id}/{token}"): (5, 2),
+    ("PATCH", "/webhooks/{application_id}/{token}/messages/{message_id}"): (5, 2),
+}
+DEFAULT_RATE_LIMIT = (50, 1)
+GLOBAL_RATE_LIMIT = (50, 1)
+MAJOR_PARAMETERS = ("channel_id", "guild_id", "token")
+# Interaction callbacks are exempt from the global limit and have no bucket
+UNLIMITED_ROUTES = {("POST", "/interactions/{interaction_id}/{token}/callback")}
+# Follow-ups and response edits use the interaction token and are not bound by the global limit either
+GLOBAL_EXEMPT_PREFIXES = ("/webhooks/{application_id}/{token}",)
+# Discord's 429s come through its proxy; discord.py takes a 429 without Via for a Cloudflare ban
+VIA = "1.1 google"
+
+def snowflake_time(snowflake: int) -> float:
+    return ((snowflake >> 22) + DISCORD_EPOCH) / 1000
+
+def iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+def json_response(data, status: int = 200, headers: Optional[dict] = None) -> web.Response:
+    # discord.py only parses bodies whose Content-Type is exactly application/json, without a charset
+    return web.Response(body=json.dumps(data).encode(), status=status, headers={"Content-Type": "application/json", **(headers or {})})
+
+def error(status: int, code: int, message: str) -> web.Response:
+    return json_response({"message": message, "code": code}, status=status)
+
+class Snowflakes:
+    def __init__(self):
+        self._increment = itertools.count()
+
+    def next(self, ms: Optional[int] = None) -> int:
+        ms = int(time.time() * 1000) - DISCORD_EPOCH if ms is None else ms
+        return (ms << 22) | (next(self._increment) & 0x3FFFFF)
+
+class RateLimiter:
+    """Fixed windows per bucket, reported with Discord's headers"""
+
+    def __init__(self):
+        self._windows = {}  # key -> [reset_at, remaining]
+
+    def hit(self, key, limit: int, per: float, now: float) -> tuple:
+        """Returns (allowed, remaining, reset_after)"""
+        window = self._windows.get(key)
+        if window is None or now >= window[0]:
+            window = self._windows[key] = [now + per, limit]
+        if window[1] <= 0:
+            return False, 0, window[0] - now
+        window[1] -= 1
+        return True, window[1], window[0] - now
+
+class PendingInteraction:
+    __slots__ = ("id", "token", "guild_id", "channel_id", "user_id", "message_id", "dispatched_at",
+                 "future", "responded", "original_message_id")
+
+    def __init__(self, interaction_id: int, token: str, guild_id: int, channel_id: int, user_id: int, message_id: Optional[int]):
+        self.id = interaction_id
+        self.token = token
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.user_id = user_id
+        self.message_id = message_id
+        self.dispatched_at = 0.0
+        self.future = asyncio.get_running_loop().create_future()
+        self.responded = False
+        self.original_message_id = None
+
+class GatewaySession:
+    def __init__(self, ws: web.WebSocketResponse):
+        self.ws = ws
+        self.shard_id = 0
+        self.shard_count = 1
+        self.seq = 0
+        self.ready = False
+        self._lock = asyncio.Lock()
+
+    async def send(self, payload: dict):
+        async with self._lock:
+            await self.ws.send_str(json.dumps(payload))
+
+    async def dispatch(self, event: str, data: dict):
+        self.seq += 1
+        await self.send({"op": 0, "t": event, "s": self.seq, "d": data})
+
+class FakeDiscord:
+    def __init__(self, guild_count: int = 10, shard_count: int = 1, application_id: Optional[int] = None):
+        self.snowflakes = Snowflakes()
+        self.shard_count = shard_count
+        self.application_id = application_id or self.snowflakes.next()
+        self.bot_user = self.user_payload(self.application_id, "Amethis", bot=True)
+        self.guilds = {}      # guild_id -> guild state
+        self.channels = {}    # channel_id -> channel payload
+        self.messages = {}    # channel_id -> OrderedDict of message_id -> payload, oldest first
+        self.pins = {}        # channel_id -> {message_id: pinned_at}
+        self.ephemeral = {}   # message_id -> payload of ephemeral interaction responses
+        self.users = {}       # user_id -> user payload
+        self.commands = {}    # guild_id or None -> synced command payloads
+        self.interactions = {}  # interaction_id -> PendingInteraction
+        self.sessions = {}    # shard_id -> GatewaySession
+        self.limiter = RateLimiter()
+        self.requests = Counter()       # "METHOD /route" -> requests
+        self.rate_limited = Counter()   # "METHOD /route" -> 429 responses
+        self.gateway_events = Counter()
+        self.interaction_stats = Counter()
+        self.unhandled = Counter()
+        for i in range(guild_count):
+            self.seed_guild(i)
+
+    # Payloads
+
+    def user_payload(self, user_id: int, name: Optional[str] = None, bot: bool = False) -> dict:
+        name = name or f"user{user_id % 100000}"
+        return {"id": str(user_id), "username": name, "global_name": name, "discriminator": "0",
+                "avatar": None, "bot": bot, "public_flags": 0}
+
+    def get_user(self, user_id: int) -> dict:
+        user = self.users.get(user_id)
+        if user is None:
+            user = self.users[user_id] = self.user_payload(user_id)
+        return user
+
+    def role_payload(self, role_id: int, name: str, position: int, permissions: int, managed: bool = False) -> dict:
+        return {"id": str(role_id), "name": name, "color": 0, "colors": {"primary_color": 0}, "hoist": False,
+                "position": position, "permissions": str(permissions), "managed": managed,
+                "mentionable": False, "flags": 0, "icon": None, "unicode_emoji": None}
+
+    def add_channel(self, guild_id: Optional[int], name: str, channel_type: int = 0, parent_id: Optional[int] = None, **extra) -> dict:
+        channel_id = self.snowflakes.next()
+        channel = {"id": str(channel_id), "type": channel_type, "name": name, "position": len(self.channels),
+                   "parent_id": str(parent_id) if parent_id else None, "topic": None, "nsfw": False,
+                   "permission_overwrites": [], "rate_limit_per_user": 0, "last_message_id": None, "flags": 0}
+        if guild_id is not None:
+            channel["guild_id"] = str(guild_id)
+            self.guilds[guild_id]["channels"].append(channel)
+        channel.update(extra)
+        self.channels[channel_id] = channel
+        self.messages[channel_id] = OrderedDict()
+        return channel
+
+    def seed_guild(self, index: int):
+        # Consecutive creation times spread the guilds over the shards like (id >> 22) % count
+        guild_id = self.snowflakes.next(int(time.time() * 1000) - DISCORD_EPOCH - 10_000_000 + index)
+        owner_id = self.snowflakes.next()
+        bot_role_id = self.snowflakes.next()
+        team_roles = [self.role_payload(self.snowflakes.next(), f"{color} Team", i + 1, 0)
+                      for i, color in enumerate(("Red", "Blue", "Green"))]
+        self.guilds[guild_id] = {
+            "id": guild_id,
+            "name": f"Load Test {index}",
+            "owner_id": owner_id,
+            "roles": [self.role_payload(guild_id, "@everyone", 0, EVERYONE_PERMISSIONS),
+                      self.role_payload(bot_role_id, "Amethis", 10, ADMINISTRATOR, managed=True)] + team_roles,
+            "channels": [],
+            "members": {self.application_id: {"roles": [bot_role_id], "nick": None}, owner_id: {"roles": [], "nick": None}},
+        }
+        self.users[owner_id] = self.user_payload(owner_id, f"owner{index}")
+        for name in ("general", "registration", "management"):
+            self.add_channel(guild_id, name)
+
+    def member_payload(self, guild_id: int, user_id: int, with_permissions: bool = False) -> dict:
+        guild = self.guilds[guild_id]
+        member = guild["members"].setdefault(user_id, {"roles": [], "nick": None})
+        payload = {"user": self.get_user(user_id), "roles": [str(role_id) for role_id in member["roles"]],
+                   "nick": member["nick"], "joined_at": iso(snowflake_time(guild_id)), "deaf": False, "mute": False,
+                   "flags": 0, "pending": False, "avatar": None, "premium_since": None, "communication_disabled_until": None}
+        if with_permissions:
+            permissions = ALL_PERMISSIONS if user_id == guild["owner_id"] else EVERYONE_PERMISSIONS
+            roles = {int(role["id"]): int(role["permissions"]) for role in guild["roles"]}
+            for role_id in member["roles"]:
+                permissions |= roles.get(role_id, 0)
+            payload["permissions"] = str(ALL_PERMISSIONS if permissions & ADMINISTRATOR else permissions)
+        return payload
+
+    def guild_payload(self, guild_id: int) -> dict:
+        guild = self.guilds[guild_id]
+        return {
+            "id": str(guild_id), "name": guild["name"], "owner_id": str(guild["owner_id"]), "icon": None,
+            "roles": guild["roles"], "channels": guild["channels"], "threads": [], "emojis": [], "stickers": [],
+            "members": [self.member_payload(guild_id, self.application_id)], "member_count": len(guild["members"]),
+            "features": [], "large": False, "unavailable": False, "joined_at": iso(snowflake_time(guild_id)),
+            "voice_states": [], "presences": [], "stage_instances": [], "guild_scheduled_events": [],
+            "soundboard_sounds": [], "preferred_locale": "en-US", "premium_tier": 0, "mfa_level": 0,
+            "verification_level": 0, "explicit_content_filter": 0, "default_message_notifications": 0,
+            "nsfw_level": 0, "system_channel_flags": 0, "afk_timeout": 300,
+        }
+
+    def message_payload(self, channel_id: int, data: dict, author: dict, flags: int = 0, webhook_id: Optional[int] = None) -> dict:
+        message_id = self.snowflakes.next()
+        channel = self.channels.get(channel_id, {})
+        message = {
+            "id": str(message_id), "channel_id": str(channel_id), "author": author,
+            "content": data.get("content") or "", "timestamp": iso(snowflake_time(message_id)),
+            "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": [], "embeds": data.get("embeds") or [], "components": data.get("components") or [],
+            "pinned": False, "type": 0, "flags": flags | (data.get("flags") or 0),
+        }
+        if "guild_id" in channel:
+            message["guild_id"] = channel["guild_id"]
+        if webhook_id is not None:
+            message["webhook_id"] = str(webhook_id)
+            message["application_id"] = str(self.application_id)
+        return message
+
+    def find_message(self, channel_id: int, message_id: int) -> Optional[dict]:
+        return self.messages.get(channel_id, {}).get(message_id) or self.ephemeral.get(message_id)
+
+    async def create_message(self, channel_id: int, data: dict, flags: int = 0, webhook_id: Optional[int] = None) -> dict:
+        message = self.message_payload(channel_id, data, self.bot_user, flags, webhook_id)
+        if message["flags"] & EPHEMERAL:
+            self.ephemeral[int(message["id"])] = message
+        else:
+            self.messages[channel_id][int(message["id"])] = message
+            await self.dispatch_guild(self.channel_guild(channel_id), "MESSAGE_CREATE", message)
+        return message
+
+    async def update_message(self, message: dict, data: dict) -> dict:
+        for key, empty in (("content", ""), ("embeds", []), ("components", [])):
+            if key in data:
+                message[key] = data[key] if data[key] is not None else empty
+        message["flags"] &= ~LOADING
+        message["edited_timestamp"] = iso(time.time())
+        if not message["flags"] & EPHEMERAL:
+            await self.dispatch_guild(self.channel_guild(int(message["channel_id"])), "MESSAGE_UPDATE", message)
+        return message
+
+    def channel_guild(self, channel_id: int) -> Optional[int]:
+        guild_id = self.channels.get(channel_id, {}).get("guild_id")
+        return int(guild_id) if guild_id else None
+
+    # Gateway
+
+    def session_for(self, guild_id: Optional[int]) -> Optional[GatewaySession]:
+        shard_id = 0 if guild_id is None else (guild_id >> 22) % self.shard_count
+        session = self.sessions.get(shard_id)
+        return session if session is not None and session.ready else None
+
+    async def dispatch_guild(self, guild_id: Optional[int], event: str, data: dict):
+        session = self.session_for(guild_id)
+        if session is None:
+            return
+        self.gateway_events[event] += 1
+        try:
+            await session.dispatch(event, data)
+        except ConnectionError:
+            pass
+
+    async def gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        session = GatewaySession(ws)
+        await session.send({"op": 10, "d": {"heartbeat_interval": HEARTBEAT_INTERVAL}})
+        try:
+            async for msg in ws:
+                if msg.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    continue
+                payload = json.loads(msg.data)
+                op = payload.get("op")
+                if op == 1:
+                    await session.send({"op": 11})
+                elif op == 2:
+                    await self.identify(session, payload["d"])
+                elif op == 6:
+                    # No resume support: make the client identify again
+                    await session.send({"op": 9, "d": False})
+        finally:
+            if self.sessions.get(session.shard_id) is session:
+                del self.sessions[session.shard_id]
+        return ws
+
+    async def identify(self, session: GatewaySession, data: dict):
+        session.shard_id, session.shard_count = data.get("shard") or (0, 1)
+        self.shard_count = session.shard_count
+        self.sessions[session.shard_id] = session
+        guild_ids = [guild_id for guild_id in self.guilds if (guild_id >> 22) % session.shard_count == session.shard_id]
+        await session.dispatch("READY", {
+            "v": 10, "user": self.bot_user, "session_id": os.urandom(16).hex(),
+            "resume_gateway_url": "ws://unused", "shard": [session.shard_id, session.shard_count],
+            "guilds": [{"id": str(guild_id), "unavailable": True} for guild_id in guild_ids],
+            "application": {"id": str(self.application_id), "flags": 0}, "private_channels": [],
+        })
+        for guild_id in guild_ids:
+            await session.dispatch("GUILD_CREATE", self.guild_payload(guild_id))
+        session.ready = True
+        log.info("Shard %d/%d identified with %d guild(s)", session.shard_id, session.shard_count, len(guild_ids))
+
+    # Rate limits
+
+    @web.middleware
+    async def rate_limit_middleware(self, request: web.Request, handler):
+        resource = request.match_info.route.resource
+        canonical = resource.canonical if resource is not None else request.path
+        if not canonical.startswith("/api/"):
+            return await handler(request)
+
+        route = canonical.split("/", 3)[3] if canonical.count("/") >= 3 else canonical
+        route = "/" + route
+        key = f"{request.method} {route}"
+        self.requests[key] += 1
+        if (request.method, route) in UNLIMITED_ROUTES:
+            return await handler(request)
+
+        now = time.time()
+        if route.startswith(GLOBAL_EXEMPT_PREFIXES):
+            allowed = True
+        else:
+            allowed, _, reset_after = self.limiter.hit("global", *GLOBAL_RATE_LIMIT, now)
+        if not allowed:
+            self.rate_limited["global"] += 1
+            return json_response({"message": "You are being rate limited.", "retry_after": reset_after, "global": True},
+                                 status=429, headers={"Retry-After": str(max(1, round(reset_after))), "Via": VIA,
+                                                      "X-RateLimit-Global": "true", "X-RateLimit-Scope": "global"})
+
+        limit, per = RATE_LIMITS.get((request.method, route), DEFAULT_RATE_LIMIT)
+        major = tuple(request.match_info.get(name) for name in MAJOR_PARAMETERS)
+        bucket_hash = hashlib.sha1(key.encode()).hexdigest()[:16]
+        allowed, remaining, reset_after = self.limiter.hit((key, major), limit, per, now)
+        headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": f"{now + reset_after:.3f}",
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": bucket_hash,
+        }
+        if not allowed:
+            self.rate_limited[key] += 1
+            headers.update({"Retry-After": str(max(1, round(reset_after))), "X-RateLimit-Scope": "user", "Via": VIA})
+            return json_response({"message": "You are being rate limited.", "retry_after": reset_after, "global": False},
+                                 status=429, headers=headers)
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    # REST: users, gateway and commands
+
+    async def get_me(self, request: web.Request) -> web.Response:
+        return json_response(self.bot_user)
+
+    async def get_application(self, request: web.Request) -> web.Response:
+        return json_response({
+            "id": str(self.application_id), "name": "Amethis", "description": "", "icon": None,
+            "bot_public": True, "bot_require_code_grant": False, "verify_key": "0" * 64, "flags": 0,
+            "owner": self.user_payload(self.application_id + 1, "owner"), "team": None,
+        })
+
+    async def get_user_route(self, request: web.Request) -> web.Response:
+        return json_response(self.get_user(int(request.match_info["user_id"])))
+
+    async def create_dm(self, request: web.Request) -> web.Response:
+        recipient_id = int((await request.json())["recipient_id"])
+        channel = self.add_channel(None, None, channel_type=1, recipients=[self.get_user(recipient_id)])
+        return json_response(channel)
+
+    async def get_gateway(self, request: web.Request) -> web.Response:
+        return json_response({"url": f"ws://{request.host}/gateway"})
+
+    async def get_gateway_bot(self, request: web.Request) -> web.Response:
+        return json_response({
+            "url": f"ws://{request.host}/gateway", "shards": self.shard_count,
+            "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 86400000, "max_concurrency": 1},
+        })
+
+    def command_payloads(self, payload: list, guild_id: Optional[int]) -> list:
+        existing = {command["name"]: command["id"] for command in self.commands.get(guild_id, [])}
+        commands = []
+        for command in payload:
+            command = dict(command, id=existing.get(command["name"]) or str(self.snowflakes.next()),
+                           application_id=str(self.application_id), version=str(self.snowflakes.next()))
+            command.setdefault("type", 1)
+            command.setdefault("description", "")
+            if guild_id is not None:
+                command["guild_id"] = str(guild_id)
+            commands.append(command)
+        return commands
+
+    async def put_commands(self, request: web.Request) -> web.Response:
+        guild_id = int(request.match_info["guild_id"]) if "guild_id" in request.match_info else None
+        self.commands[guild_id] = self.command_payloads(await request.json(), guild_id)
+        return json_response(self.commands[guild_id])
+
+    async def get_commands(self, request: web.Request) -> web.Response:
+        guild_id = int(request.match_info["guild_id"]) if "guild_id" in request.match_info else None
+        return json_response(self.commands.get(guild_id, []))
+
+    # REST: channels and messages
+
+    def channel_or_404(self, request: web.Request) -> Optional[int]:
+        channel_id = int(request.match_info["channel_id"])
+        return channel_id if channel_id in self.channels else None
+
+    async def get_channel(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        if channel_id is None:
+            return error(404, 10003, "Unknown Channel")
+        return json_response(self.channels[channel_id])
+
+    async def post_message(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        if channel_id is None:
+            return error(404, 10003, "Unknown Channel")
+        message = await self.create_message(channel_id, await read_payload(request))
+        return json_response(message)
+
+    async def get_messages(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        if channel_id is None:
+            return error(404, 10003, "Unknown Channel")
+        limit = min(100, int(request.query.get("limit", 50)))
+        before = int(request.query.get("before", 0)) or None
+        after = int(request.query.get("after", 0)) or None
+        messages = [message for message_id, message in reversed(self.messages[channel_id].items())
+                    if (before is None or message_id < before) and (after is None or message_id > after)]
+        if after is not None:
+            messages = messages[-limit:]
+        return json_response(messages[:limit])
+
+    async def get_message(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        message = self.find_message(channel_id, int(request.match_info["message_id"])) if channel_id else None
+        if message is None:
+            return error(404, 10008, "Unknown Message")
+        return json_response(message)
+
+    async def patch_message(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        message = self.find_message(channel_id, int(request.match_info["message_id"])) if channel_id else None
+        if message is None:
+            return error(404, 10008, "Unknown Message")
+        return json_response(await self.update_message(message, await read_payload(request)))
+
+    async def delete_message(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        message_id = int(request.match_info["message_id"])
+        if channel_id is None or self.messages[channel_id].pop(message_id, None) is None:
+            return error(404, 10008, "Unknown Message")
+        self.pins.get(channel_id, {}).pop(message_id, None)
+        await self.dispatch_guild(self.channel_guild(channel_id), "MESSAGE_DELETE", {
+            "id": str(message_id), "channel_id": str(channel_id), "guild_id": self.channels[channel_id].get("guild_id")})
+        return web.Response(status=204)
+
+    async def bulk_delete(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        if channel_id is None:
+            return error(404, 10003, "Unknown Channel")
+        message_ids = [int(message_id) for message_id in (await request.json()).get("messages", [])]
+        if not 2 <= len(message_ids) <= 100:
+            return error(400, 50016, "You must provide between 2 and 100 messages to delete")
+        if any(time.time() - snowflake_time(message_id) > BULK_DELETE_MAX_AGE for message_id in message_ids):
+            return error(400, 50034, "You can only bulk delete messages that are under 14 days old.")
+        deleted = [message_id for message_id in message_ids if self.messages[channel_id].pop(message_id, None) is not None]
+        await self.dispatch_guild(self.channel_guild(channel_id), "MESSAGE_DELETE_BULK", {
+            "ids": [str(message_id) for message_id in deleted], "channel_id": str(channel_id),
+            "guild_id": self.channels[channel_id].get("guild_id")})
+        return web.Response(status=204)
+
+    async def get_pins(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        if channel_id is None:
+            return error(404, 10003, "Unknown Channel")
+        pinned = sorted(self.pins.get(channel_id, {}).items(), key=lambda item: item[1], reverse=True)
+        messages = [(self.messages[channel_id].get(message_id), pinned_at) for message_id, pinned_at in pinned]
+        if request.path.endswith("/messages/pins"):
+            return json_response({"items": [{"pinned_at": iso(pinned_at), "message": message}
+                                                for message, pinned_at in messages if message], "has_more": False})
+        return json_response([message for message, _ in messages if message])
+
+    async def put_pin(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        message_id = int(request.match_info["message_id"])
+        message = self.messages.get(channel_id, {}).get(message_id) if channel_id else None
+        if message is None:
+            return error(404, 10008, "Unknown Message")
+        message["pinned"] = True
+        self.pins.setdefault(channel_id, {})[message_id] = time.time()
+        return web.Response(status=204)
+
+    async def delete_pin(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        message_id = int(request.match_info["message_id"])
+        if channel_id is None or self.pins.get(channel_id, {}).pop(message_id, None) is None:
+            return error(404, 10008, "Unknown Message")
+        self.messages[channel_id][message_id]["pinned"] = False
+        return web.Response(status=204)
+
+    async def create_guild_channel(self, request: web.Request) -> web.Response:
+        guild_id = int(request.match_info["guild_id"])
+        if guild_id not in self.guilds:
+            return error(404, 10004, "Unknown Guild")
+        data = await request.json()
+        parent_id = int(data["parent_id"]) if data.get("parent_id") else None
+        channel = self.add_channel(guild_id, data["name"], data.get("type", 0), parent_id,
+                                   permission_overwrites=data.get("permission_overwrites", []), topic=data.get("topic"))
+        await self.dispatch_guild(guild_id, "CHANNEL_CREATE", channel)
+        return json_response(channel, status=201)
+
+    async def create_thread(self, request: web.Request) -> web.Response:
+        channel_id = self.channel_or_404(request)
+        if channel_id is None:
+            return error(404, 10003, "Unknown Channel")
+        data = await request.json()
+        guild_id = self.channel_guild(channel_id)
+        thread_type = 11 if "message_id" in request.match_info else data.get("type", 12)
+        thread = self.add_channel(guild_id, data["name"], thread_type, channel_id, owner_id=str(self.application_id),
+                                  thread_metadata={"archived": False, "auto_archive_duration": data.get("auto_archive_duration", 1440),
+                                                   "archive_timestamp": iso(time.time()), "locked": False},
+                                  message_count=0, member_count=1)
+        await self.dispatch_guild(guild_id, "THREAD_CREATE", dict(thread, newly_created=True))
+        return json_response(thread, status=201)
+
+    # REST: members
+
+    async def get_member(self, request: web.Request) -> web.Response:
+        guild_id = int(request.match_info["guild_id"])
+        if guild_id not in self.guilds:
+            return error(404, 10004, "Unknown Guild")
+        return json_response(self.member_payload(guild_id, int(request.match_info["user_id"])))
+
+    async def patch_member(self, request: web.Request) -> web.Response:
+        guild_id = int(request.match_info["guild_id"])
+        if guild_id not in self.guilds:
+            return error(404, 10004, "Unknown Guild")
+        user_id = int(request.match_info["user_id"])
+        data = await request.json()
+        member = self.guilds[guild_id]["members"].setdefault(user_id, {"roles": [], "nick": None})
+        if "roles" in data:
+            member["roles"] = [int(role_id) for role_id in data["roles"]]
+        if "nick" in data:
+            member["nick"] = data["nick"]
+        return json_response(self.member_payload(guild_id, user_id))
+
+    # Interactions
+
+    async def interaction_callback(self, request: web.Request) -> web.Response:
+        interaction = self.interactions.get(int(request.match_info["interaction_id"]))
+        if interaction is None or interaction.token != request.match_info["token"]:
+            return error(404, 10062, "Unknown interaction")
+        if interaction.responded:
+            return error(400, 40060, "Interaction has already been acknowledged.")
+        interaction.responded = True
+
+        body = await read_payload(request)
+        callback_type = body.get("type")
+        data = body.get("data") or {}
+        message = None
+        if callback_type == CHANNEL_MESSAGE:
+            message = await self.create_message(interaction.channel_id, data, webhook_id=self.application_id)
+        elif callback_type == DEFERRED_CHANNEL_MESSAGE:
+            message = await self.create_message(interaction.channel_id, {"flags": data.get("flags", 0)}, LOADING, self.application_id)
+        elif callback_type in (DEFERRED_UPDATE, UPDATE_MESSAGE) and interaction.message_id is not None:
+            message = self.find_message(interaction.channel_id, interaction.message_id)
+            if callback_type == UPDATE_MESSAGE and message is not None:
+                await self.update_message(message, data)
+        if message is not None:
+            interaction.original_message_id = int(message["id"])
+
+        latency = time.perf_counter() - interaction.dispatched_at
+        self.interaction_stats["responded"] += 1
+        if not interaction.future.done():
+            interaction.future.set_result({"type": callback_type, "data": data, "message": message, "latency_ms": latency * 1000})
+
+        if "with_response" not in request.query:
+            return web.Response(status=204)
+        return json_response({
+            "interaction": {"id": str(interaction.id), "type": 2,
+                            "response_message_id": message["id"] if message else None,
+                            "response_message_loading": callback_type == DEFERRED_CHANNEL_MESSAGE,
+                            "response_message_ephemeral": bool(message and message["flags"] & EPHEMERAL)},
+            "resource": {"type": callback_type, "message": message} if message and callback_type in (CHANNEL_MESSAGE, UPDATE_MESSAGE) else {"type": callback_type},
+        })
+
+    def interaction_message(self, request: web.Request) -> tuple:
+        interaction = next((pending for pending in self.interactions.values() if pending.token == request.match_info["token"]), None)
+        if interaction is None:
+            return None, None
+        message_id = request.match_info.get("message_id", "@original")
+        message_id = interaction.original_message_id if message_id == "@original" else int(message_id)
+        message = self.find_message(interaction.channel_id, message_id) if message_id else None
+        return interaction, message
+
+    async def webhook_get(self, request: web.Request) -> web.Response:
+        _, message = self.interaction_message(request)
+        if message is None:
+            return error(404, 10008, "Unknown Message")
+        return json_response(message)
+
+    async def webhook_patch(self, request: web.Request) -> web.Response:
+        _, message = self.interaction_message(request)
+        if message is None:
+            return error(404, 10008, "Unknown Message")
+        return json_response(await self.update_message(message, await read_payload(request)))
+
+    async def webhook_delete(self, request: web.Request) -> web.Response:
+        interaction, message = self.interaction_message(request)
+        if message is None:
+            return error(404, 10008, "Unknown Message")
+        message_id = int(message["id"])
+        self.ephemeral.pop(message_id, None)
+        self.messages.get(interaction.channel_id, {}).pop(message_id, None)
+        return web.Response(status=204)
+
+    async def webhook_followup(self, request: web.Request) -> web.Response:
+        interaction, _ = self.interaction_message(request)
+        if interaction is None:
+            return error(404, 10015, "Unknown Webhook")
+        message = await self.create_message(interaction.channel_id, await read_payload(request), webhook_id=self.application_id)
+        return json_response(message)
+
+    async def unknown_route(self, request: web.Request) -> web.Response:
+        self.unhandled[f"{request.method} {request.path}"] += 1
+        return error(404, 0, "404: Not Found")
+
+    # Control API for the load driver
+
+    async def control_guilds(self, request: web.Request) -> web.Response:
+        return json_response([{
+            "id": str(guild_id),
+            "owner_id": str(guild["owner_id"]),
+            "channels": {channel["name"]: channel["id"] for channel in guild["channels"]},
+            "roles": {role["name"]: role["id"] for role in guild["roles"]},
+        } for guild_id, guild in self.guilds.items()])
+
+    async def control_messages(self, request: web.Request) -> web.Response:
+        channel_id = int(request.match_info["channel_id"])
+        return json_response(list(reversed(self.messages.get(channel_id, {}).values())))
+
+    def resolve_options(self, guild_id: int, data: dict):
+        """Fill data.resolved for channel options, as Discord does"""
+        for option in data.get("options", []):
+            if option.get("type") == 7:
+                channel = self.channels[int(option["value"])]
+                resolved = data.setdefault("resolved", {}).setdefault("channels", {})
+                resolved[option["value"]] = dict(channel, permissions=str(ALL_PERMISSIONS))
+
+    async def control_interaction(self, request: web.Request) -> web.Response:
+        """Dispatch an interaction and wait for the bot's callback"""
+        body = await request.json()
+        guild_id = int(body["guild_id"])
+        channel_id = int(body["channel_id"])
+        user_id = int(body["user_id"])
+        message_id = int(body["message_id"]) if body.get("message_id") else None
+        data = body.get("data") or {}
+        interaction_type = body.get("type", 2)
+        if guild_id not in self.guilds:
+            return error(404, 10004, "Unknown Guild")
+
+        if interaction_type == 2:
+            commands = {command["name"]: command["id"] for scope in (None, guild_id) for command in self.commands.get(scope, [])}
+            data.setdefault("id", commands.get(data.get("name")) or str(self.snowflakes.next()))
+            data.setdefault("type", 1)
+            self.resolve_options(guild_id, data)
+
+        interaction = PendingInteraction(self.snowflakes.next(), os.urandom(24).hex(), guild_id, channel_id, user_id, message_id)
+        payload = {
+            "id": str(interaction.id), "application_id": str(self.application_id), "type": interaction_type,
+            "data": data, "guild_id": str(guild_id), "channel_id": str(channel_id), "channel": self.channels[channel_id],
+            "member": self.member_payload(guild_id, user_id, with_permissions=True), "token": interaction.token,
+            "version": 1, "app_permissions": str(ALL_PERMISSIONS), "locale": "en-US", "guild_locale": "en-US",
+            "entitlements": [], "authorizing_integration_owners": {"0": str(guild_id)}, "context": 0,
+            "attachment_size_limit": 10485760,
+        }
+        if message_id is not None:
+            message = self.find_message(channel_id, message_id)
+            if message is None:
+                return error(404, 10008, "Unknown Message")
+            payload["message"] = message
+
+        if self.session_for(guild_id) is None:
+            return json_response({"ok": False, "error": "no gateway session for this guild"}, status=503)
+        self.interactions[interaction.id] = interaction
+        self.interaction_stats["dispatched"] += 1
+        interaction.dispatched_at = time.perf_counter()
+        await self.dispatch_guild(guild_id, "INTERACTION_CREATE", payload)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(interaction.future), INTERACTION_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.interaction_stats["timeouts"] += 1
+            return json_response({"ok": False, "error": "timeout", "interaction_id": str(interaction.id)})
+        finally:
+            # Keep the token usable for follow-ups for a while, like Discord's 15 minutes
+            asyncio.get_running_loop().call_later(900, self.interactions.pop, interaction.id, None)
+        return json_response(dict(result, ok=True, interaction_id=str(interaction.id)))
+
+    async def control_stats(self, request: web.Request) -> web.Response:
+        return json_response({
+            "requests": dict(self.requests),
+            "rate_limited": dict(self.rate_limited),
+            "gateway_events": dict(self.gateway_events),
+            "interactions": dict(self.interaction_stats),
+            "unhandled": dict(self.unhandled),
+            "sessions": [{"shard_id": shard_id, "shard_count": session.shard_count, "seq": session.seq, "ready": session.ready}
+                         for shard_id, session in sorted(self.sessions.items())],
+            "shard_count": self.shard_count,
+            "commands": sum(len(commands) for commands in self.commands.values()),
+        })
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.rate_limit_middleware])
+        api = "/api/v{version}"
+        routes = [
+            ("GET", "/users/@me", self.get_me),
+            ("GET", "/users/{user_id}", self.get_user_route),
+            ("GET", "/oauth2/applications/@me", self.get_application),
+            ("POST", "/users/@me/channels", self.create_dm),
+            ("GET", "/gateway", self.get_gateway),
+            ("GET", "/gateway/bot", self.get_gateway_bot),
+            ("PUT", "/applications/{application_id}/commands", self.put_commands),
+            ("GET", "/applications/{application_id}/commands", self.get_commands),
+            ("PUT", "/applications/{application_id}/guilds/{guild_id}/commands", self.put_commands),
+            ("GET", "/applications/{application_id}/guilds/{guild_id}/commands", self.get_commands),
+            ("GET", "/channels/{channel_id}", self.get_channel),
+            ("POST", "/channels/{channel_id}/messages", self.post_message),
+            ("GET", "/channels/{channel_id}/messages", self.get_messages),
+            ("POST", "/channels/{channel_id}/messages/bulk-delete", self.bulk_delete),
+            ("GET", "/channels/{channel_id}/messages/pins", self.get_pins),
+            ("PUT", "/channels/{channel_id}/messages/pins/{message_id}", self.put_pin),
+            ("DELETE", "/channels/{channel_id}/messages/pins/{message_id}", self.delete_pin),
+            ("GET", "/channels/{channel_id}/pins", self.get_pins),
+            ("PUT", "/channels/{channel_id}/pins/{message_id}", self.put_pin),
+            ("DELETE", "/channels/{channel_id}/pins/{message_id}", self.delete_pin),
+            ("GET", "/channels/{channel_id}/messages/{message_id}", self.get_message),
+            ("PATCH", "/channels/{channel_id}/messages/{message_id}", self.patch_message),
+            ("DELETE", "/channels/{channel_id}/messages/{message_id}", self.delete_message),
+            ("POST", "/channels/{channel_id}/threads", self.create_thread),
+            ("POST", "/channels/{channel_id}/messages/{message_id}/threads", self.create_thread),
+            ("POST", "/guilds/{guild_id}/channels", self.create_guild_channel),
+            ("GET", "/guilds/{guild_id}/members/{user_id}", self.get_member),
+            ("PATCH", "/guilds/{guild_id}/members/{user_id}", self.patch_member),
+            ("POST", "/interactions/{interaction_id}/{token}/callback", self.interaction_callback),
+            ("POST", "/webhooks/{application_id}/{token}", self.webhook_followup),
+            ("GET", "/webhooks/{application_id}/{token}/messages/{message_id}", self.webhook_get),
+            ("PATCH", "/webhooks/{application_id}/{token}/messages/{message_id}", self.webhook_patch),
+            ("DELETE", "/webhooks/{application_id}/{token}/messages/{message_id}", self.webhook_delete),
+        ]
+        for method, path, handler in routes:
+            app.router.add_route(method, api + path, handler)
+        app.router.add_get("/gateway", self.gateway)
+        app.router.add_get("/_control/guilds", self.control_guilds)
+        app.router.add_get("/_control/channels/{channel_id}/messages", self.control_messages)
+        app.router.add_post("/_control/interactions", self.control_interaction)
+        app.router.add_get("/_control/stats", self.control_stats)
+        app.router.add_route("*", "/{tail:.*}", self.unknown_route)
+        return app
+
+async def read_payload(request: web.Request) -> dict:
+    """JSON body, or the payload_json part of a multipart body"""
+    if request.content_type.startswith("multipart/"):
+        form = await request.post()
+        return json.loads(form.get("payload_json") or "{}")
+    if not request.can_read_body:
+        return {}
+    return await request.json()
+
+async def serve(fake: FakeDiscord, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(fake.build_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log.info("Fake Discord on http://%s:%d with %d guild(s); run the bot with DISCORD_API_BASE=http://%s:%d/api/v10",
+             host, port, len(fake.guilds), host, port)
+    return runner
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--shards", type=int, default=1, help="shard count returned by /gateway/bot")
+    parser.add_argument("--application-id", type=int, default=int(os.getenv("APP_ID") or 0) or None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    async def run():
+        fake = FakeDiscord(args.guilds, args.shards, args.application_id)
+        await serve(fake, args.host, args.port)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
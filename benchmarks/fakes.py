@@ -0,0 +1,74 @@
+"""Lightweight stand-ins for discord.py models, for benchmarks that run without a connection.
+
+They only carry the attributes the benchmarked functions read. FakeMember
+subclasses discord.Member so isinstance checks pass, but skips its
+constructor and the connection state behind it.
+"""
+import random
+import discord
+
+def snowflake(rng: random.Random) -> int:
+    return rng.getrandbits(60)
+
+class FakeRole:
+    __slots__ = ("id", "name", "position")
+
+    def __init__(self, role_id: int, name: str, position: int = 0):
+        self.id = role_id
+        self.name = name
+        self.position = position
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+class FakeGuild:
+    def __init__(self, guild_id: int, roles: list, name: str = "Benchmark Guild"):
+        self.id = guild_id
+        self.name = name
+        self.roles = roles
+        self._roles = {role.id: role for role in roles}
+        self.shard_id = 0
+
+    def get_role(self, role_id: int):
+        return self._roles.get(role_id)
+
+class FakeMember(discord.Member):
+    # Plain class attributes shadow Member's properties so instances can set them
+    id = None
+    name = None
+    display_name = None
+    guild = None
+    roles = None
+    guild_permissions = None
+
+    def __init__(self, user_id: int, guild: FakeGuild, roles: list, administrator: bool = False):
+        self.id = user_id
+        self.name = self.display_name = f"user{user_id % 10000}"
+        self.guild = guild
+        self.roles = roles
+        self.guild_permissions = discord.Permissions(administrator=administrator)
+
+    def __repr__(self) -> str:
+        return f"<FakeMember id={self.id} roles={len(self.roles)}>"
+
+class FakeInteraction:
+    def __init__(self, guild: FakeGuild, user: FakeMember, interaction_id: int = 0):
+        self.id = interaction_id
+        self.guild = guild
+        self.user = user
+        self.guild_id = guild.id if guild else None
+
+def make_guild(role_count: int, seed: int = 0) -> FakeGuild:
+    """A guild with `role_count` roles named like real servers name them"""
+    rng = random.Random(seed)
+    names = ["Member", "Verified", "Moderator", "Admin", "Red", "Blue", "Green", "EU", "NA", "Asia"]
+    roles = [
+        FakeRole(snowflake(rng), f"{names[i % len(names)]} {i}" if i >= len(names) else names[i], position=i)
+        for i in range(role_count)
+    ]
+    return FakeGuild(snowflake(rng), roles)
+
+def make_member(guild: FakeGuild, role_count: int, administrator: bool = False, seed: int = 0) -> FakeMember:
+    rng = random.Random(seed)
+    return FakeMember(snowflake(rng), guild, rng.sample(guild.roles, min(role_count, len(guild.roles))), administrator)
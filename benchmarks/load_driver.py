@@ -0,0 +1,387 @@
+"""End-to-end load test: many guilds voting in polls and registering at once.
+
+Talks to benchmarks/fake_discord.py through its /_control API, so the bot
+under test runs unchanged and sees real gateway events and REST responses,
+rate limits included. Each guild gets a registration setup with a
+nickname question, a text question and a team select, then the load phase
+runs concurrently in every guild:
+
+- the owner opens a /poll and `--voters` members click vote buttons
+- `--registrations` members walk through /register, answering the modal and
+  the select page; in manual mode the owner then accepts every request
+
+The report has interactions per second, time to first response percentiles
+by interaction kind, failures, and the REST requests and 429s the fake
+server counted during the run.
+
+Against a running fake server and bot:
+    python benchmarks/fake_discord.py --guilds 20
+    DISCORD_API_BASE=http://127.0.0.1:8080/api/v10 DISCORD_TOKEN=fake APP_ID=1 python main.py
+    python benchmarks/load_driver.py --guilds 20
+
+Or start both from here, with a throwaway database:
+    python benchmarks/load_driver.py --serve --spawn-bot --guilds 20 --voters 50 --registrations 10
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import itertools
+from collections import Counter, defaultdict
+from typing import Optional
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_discord import FakeDiscord, serve
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPLICATION_COMMAND, MESSAGE_COMPONENT, MODAL_SUBMIT = 2, 3, 5
+BUTTON, SELECT, TEXT_INPUT = 2, 3, 4
+MODAL = 9
+# Seconds between a modal opening and its submit
+MODAL_THINK_TIME = 0.1
+# Callback types that end a registration: the final page defers and edits the message
+FINISHED = (5, 6)
+
+REGISTRATION_QUESTIONS = (
+    {"Question": "What is your in-game name?", "Options": "", "Open text": "yes"},
+    {"Question": "Why do you want to join?", "Options": "", "Open text": "no"},
+    {"Question": "Which team do you pick?", "Options": "Red : Red Team, Blue : Blue Team", "Open text": ""},
+)
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    index = max(0, min(len(sorted_values) - 1, int(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+def walk_components(components: list):
+    """Every leaf component with the label of its Label wrapper, if any"""
+    for component in components:
+        if component.get("type") == 1:
+            yield from walk_components(component.get("components", []))
+        elif component.get("type") == 18:
+            yield dict(component["component"], label=component.get("label"))
+        else:
+            yield component
+
+class InteractionFailed(Exception):
+    pass
+
+class LoadDriver:
+    def __init__(self, server: str, concurrency: int, seed: int = 0):
+        self.server = server.rstrip("/")
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rng = random.Random(seed)
+        self.user_ids = itertools.count(10 ** 17 + seed * 10 ** 9)
+        self.latencies = defaultdict(list)   # kind -> seconds from dispatch to callback, seen by the driver
+        self.failures = Counter()            # kind -> failed interactions
+        self.errors = Counter()              # failure reason -> occurrences
+        self.registered = Counter()          # guild_id -> finished registrations
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def get(self, path: str):
+        async with self.session.get(self.server + path) as response:
+            return await response.json()
+
+    async def wait_for_bot(self, timeout: float, bot: Optional[asyncio.subprocess.Process] = None):
+        """Until every shard identified and the commands were synced"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if bot is not None and bot.returncode is not None:
+                raise RuntimeError(f"The bot exited with code {bot.returncode}")
+            try:
+                stats = await self.get("/_control/stats")
+            except aiohttp.ClientError:
+                stats = None
+            if stats and stats["commands"] and len(stats["sessions"]) == stats["shard_count"] \
+                    and all(session["ready"] for session in stats["sessions"]):
+                return
+            await asyncio.sleep(0.5)
+        raise TimeoutError(f"The bot did not connect and sync commands within {timeout:.0f}s")
+
+    async def interact(self, kind: str, guild: dict, user_id: int, channel_id: str, interaction_type: int,
+                       data: dict, message_id: Optional[str] = None) -> dict:
+        payload = {"guild_id": guild["id"], "channel_id": channel_id, "user_id": str(user_id),
+                   "type": interaction_type, "data": data, "message_id": message_id}
+        async with self.semaphore:
+            started = time.perf_counter()
+            async with self.session.post(self.server + "/_control/interactions", json=payload) as response:
+                result = await response.json()
+            elapsed = time.perf_counter() - started
+        if not result.get("ok"):
+            self.failures[kind] += 1
+            raise InteractionFailed(f"{kind}: {result.get('error') or result.get('message')}")
+        self.latencies[kind].append(elapsed)
+        return result
+
+    async def command(self, kind: str, guild: dict, user_id: int, channel_id: str, name: str, options: list = ()) -> dict:
+        return await self.interact(kind, guild, user_id, channel_id, APPLICATION_COMMAND,
+                                   {"name": name, "options": list(options)})
+
+    async def click(self, kind: str, guild: dict, user_id: int, message: dict, custom_id: str, values: Optional[list] = None) -> dict:
+        data = {"custom_id": custom_id, "component_type": SELECT if values is not None else BUTTON}
+        if values is not None:
+            data["values"] = values
+        return await self.interact(kind, guild, user_id, message["channel_id"], MESSAGE_COMPONENT, data, message["id"])
+
+    async def submit_modal(self, kind: str, guild: dict, user_id: int, channel_id: str, modal: dict,
+                           answer, message_id: Optional[str] = None) -> dict:
+        """Fill every text input of a modal from answer(label, index) and submit it"""
+        # discord.py stores a modal once its callback request returns; a submit that
+        # beats it is dropped, where a real user takes seconds to type
+        await asyncio.sleep(MODAL_THINK_TIME)
+        rows = []
+        inputs = [component for component in walk_components(modal["components"]) if component.get("type") == TEXT_INPUT]
+        for index, text_input in enumerate(inputs):
+            rows.append({"type": 1, "components": [
+                {"type": TEXT_INPUT, "custom_id": text_input["custom_id"], "value": answer(text_input.get("label") or "", index)}]})
+        return await self.interact(kind, guild, user_id, channel_id, MODAL_SUBMIT,
+                                   {"custom_id": modal["custom_id"], "components": rows}, message_id)
+
+    # Scenario steps
+
+    async def setup_guild(self, guild: dict, mode: str):
+        owner = int(guild["owner_id"])
+        channels = guild["channels"]
+        await self.command("setupregistration", guild, owner, channels["general"], "setupregistration", [
+            {"name": "registration_channel", "type": 7, "value": channels["registration"]},
+            {"name": "management_channel", "type": 7, "value": channels["management"]},
+            {"name": "mode", "type": 3, "value": mode.capitalize()},
+        ])
+        for question in REGISTRATION_QUESTIONS:
+            result = await self.command("addregistrationquestion", guild, owner, channels["general"], "addregistrationquestion")
+            if result["type"] != MODAL:
+                raise InteractionFailed(f"addregistrationquestion answered with callback type {result['type']}")
+            answer = lambda label, index, question=question: next(
+                (value for prefix, value in question.items() if label.startswith(prefix)), "")
+            await self.submit_modal("addregistrationquestion_submit", guild, owner, channels["general"], result["data"], answer)
+
+    async def run_poll(self, guild: dict, voters: int):
+        channel_id = guild["channels"]["general"]
+        result = await self.command("poll", guild, int(guild["owner_id"]), channel_id, "poll", [
+            {"name": "question", "type": 3, "value": "Which map next?"},
+            {"name": "option1", "type": 3, "value": "Dust"},
+            {"name": "option2", "type": 3, "value": "Inferno"},
+            {"name": "option3", "type": 3, "value": "Mirage"},
+            {"name": "duration", "type": 4, "value": 5},
+        ])
+        message = result["message"]
+        buttons = [component["custom_id"] for component in walk_components(message["components"]) if component.get("type") == BUTTON]
+
+        async def vote(user_id: int):
+            # Some voters change their mind, which exercises vote changes and removals
+            for _ in range(1 + (self.rng.random() < 0.2)):
+                await self.click("poll_vote", guild, user_id, message, self.rng.choice(buttons))
+
+        await self.gather(vote(next(self.user_ids)) for _ in range(voters))
+
+    async def run_registration(self, guild: dict, user_id: int):
+        channel_id = guild["channels"]["registration"]
+        result = await self.command("register", guild, user_id, channel_id, "register")
+        page_message = None
+        for _ in range(10):
+            if result["type"] == MODAL:
+                answer = lambda label, index: f"Player{user_id % 100000}" if index == 0 else "Looking for a team to play with."
+                result = await self.submit_modal("register_modal", guild, user_id, channel_id, result["data"], answer,
+                                                 page_message["id"] if page_message else None)
+                continue
+            if result["type"] in FINISHED:
+                self.registered[guild["id"]] += 1
+                return
+            page_message = result.get("message") or page_message
+            if page_message is None:
+                raise InteractionFailed(f"register answered with callback type {result['type']} and no message")
+            components = list(walk_components(page_message["components"]))
+            for select in (component for component in components if component.get("type") == SELECT):
+                await self.click("register_select", guild, user_id, page_message, select["custom_id"], [select["options"][0]["value"]])
+            step = next((component["custom_id"] for component in components
+                         if component.get("custom_id", "").endswith((":next", ":continue"))), None)
+            if step is None:
+                self.failures["register_flow"] += 1
+                raise InteractionFailed(f"register stopped at: {page_message['content']}")
+            result = await self.click("register_next", guild, user_id, page_message, step)
+        self.failures["register_flow"] += 1
+        raise InteractionFailed("register did not finish within 10 steps")
+
+    async def accept_requests(self, guild: dict, timeout: float):
+        """Accept every finished registration's request as it reaches the management channel.
+
+        The bot answers the last registration step first and posts the request
+        afterwards, paced by the channel's rate limit, so they trickle in.
+        """
+        channel_id = guild["channels"]["management"]
+        accepted = set()
+        deadline = time.monotonic() + timeout
+        while len(accepted) < self.registered[guild["id"]] and time.monotonic() < deadline:
+            messages = await self.get(f"/_control/channels/{channel_id}/messages")
+            pending = [message for message in messages if message["id"] not in accepted and any(
+                component.get("custom_id") == "amethis:registration:accept" for component in walk_components(message["components"]))]
+            accepted.update(message["id"] for message in pending)
+            await self.gather(self.click("registration_accept", guild, int(guild["owner_id"]), message, "amethis:registration:accept")
+                              for message in pending)
+            if not pending:
+                await asyncio.sleep(0.5)
+        missing = self.registered[guild["id"]] - len(accepted)
+        if missing > 0:
+            self.failures["registration_request"] += missing
+            self.errors[f"registration request not posted within {timeout:.0f}s"] += missing
+
+    async def run_guild(self, guild: dict, voters: int, registrations: int):
+        await self.gather([self.run_poll(guild, voters)] +
+                          [self.run_registration(guild, next(self.user_ids)) for _ in range(registrations)])
+
+    async def settle(self, quiet: float, timeout: float = 60) -> dict:
+        """Stats once the bot stopped making requests for `quiet` seconds.
+
+        The bot keeps working after its interaction callbacks: requests are
+        posted, poll embeds re-rendered and members edited afterwards.
+        """
+        deadline = time.monotonic() + timeout
+        stats = await self.get("/_control/stats")
+        while time.monotonic() < deadline:
+            await asyncio.sleep(quiet)
+            latest = await self.get("/_control/stats")
+            if latest["requests"] == stats["requests"]:
+                return latest
+            stats = latest
+        return stats
+
+    async def gather(self, coroutines):
+        """Run concurrently; failures were counted by interact and do not stop the others"""
+        for result in await asyncio.gather(*coroutines, return_exceptions=True):
+            if isinstance(result, InteractionFailed):
+                self.errors[str(result)] += 1
+            elif isinstance(result, Exception):
+                self.failures[type(result).__name__] += 1
+                self.errors[repr(result)] += 1
+
+    def report(self, elapsed: float, before: dict, after: dict) -> dict:
+        kinds = {}
+        for kind, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            kinds[kind] = {
+                "count": len(values),
+                "failed": self.failures.get(kind, 0),
+                "p50_ms": percentile(values, 0.5) * 1000,
+                "p90_ms": percentile(values, 0.9) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        requests = Counter(after["requests"]) - Counter(before["requests"])
+        rate_limited = Counter(after["rate_limited"]) - Counter(before["rate_limited"])
+        return {
+            "elapsed_s": elapsed,
+            "interactions": total,
+            "interactions_per_s": total / elapsed if elapsed else 0.0,
+            "failures": dict(self.failures),
+            "errors": dict(self.errors.most_common(10)),
+            "kinds": kinds,
+            "rest_requests": sum(requests.values()),
+            "rate_limited": sum(rate_limited.values()),
+            "rate_limited_routes": dict(rate_limited.most_common()),
+            "busiest_routes": dict(requests.most_common(10)),
+            "unhandled_routes": after["unhandled"],
+        }
+
+def print_report(report: dict):
+    print(f"\n{report['interactions']} interactions in {report['elapsed_s']:.1f}s "
+          f"({report['interactions_per_s']:.1f}/s), {sum(report['failures'].values())} failed")
+    print(f"{'kind':<32} {'count':>6} {'failed':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (ms)")
+    for kind, entry in report["kinds"].items():
+        print(f"{kind:<32} {entry['count']:>6} {entry['failed']:>6} {entry['p50_ms']:>8.1f} {entry['p90_ms']:>8.1f} "
+              f"{entry['p99_ms']:>8.1f} {entry['max_ms']:>8.1f}")
+    for kind, count in report["failures"].items():
+        if kind not in report["kinds"]:
+            print(f"{kind:<32} {0:>6} {count:>6}")
+    for reason, count in report["errors"].items():
+        print(f"  {count}x {reason}")
+    print(f"\nREST requests: {report['rest_requests']}, 429 responses: {report['rate_limited']}")
+    for route, count in report["rate_limited_routes"].items():
+        print(f"  429 {route}: {count}")
+    for route, count in report["busiest_routes"].items():
+        print(f"  {count:>6}  {route}")
+    if report["unhandled_routes"]:
+        print(f"Routes the fake server does not implement: {report['unhandled_routes']}")
+
+def spawn_bot(server: str, application_id: int, database_path: str) -> asyncio.subprocess.Process:
+    env = dict(os.environ, DISCORD_API_BASE=f"{server}/api/v10", DISCORD_TOKEN="fake-token", APP_ID=str(application_id),
+               DATABASE_PATH=database_path, STORAGE_BACKEND="sqlite", SHARD_COUNT="")
+    return asyncio.create_subprocess_exec(sys.executable, os.path.join(ROOT, "main.py"), cwd=ROOT, env=env)
+
+async def run(args) -> dict:
+    runner = bot = None
+    if args.serve:
+        fake = FakeDiscord(args.guilds, args.shards)
+        host, port = args.server.rsplit("//", 1)[-1].split(":")
+        runner = await serve(fake, host, int(port))
+        if args.spawn_bot:
+            bot = await spawn_bot(args.server, fake.application_id, os.path.join(tempfile.mkdtemp(), "load.db"))
+
+    try:
+        async with LoadDriver(args.server, args.concurrency, args.seed) as driver:
+            await driver.wait_for_bot(args.startup_timeout, bot)
+            guilds = (await driver.get("/_control/guilds"))[:args.guilds]
+            print(f"Setting up registration in {len(guilds)} guild(s)...")
+            await driver.gather(driver.setup_guild(guild, args.mode) for guild in guilds)
+            driver.latencies.clear()
+
+            print(f"Load: {args.voters} voter(s) and {args.registrations} registration(s) per guild, "
+                  f"{args.concurrency} interaction(s) in flight...")
+            before = await driver.get("/_control/stats")
+            started = time.perf_counter()
+            await driver.gather(driver.run_guild(guild, args.voters, args.registrations) for guild in guilds)
+            if args.mode == "manual":
+                print("Accepting the registration requests...")
+                await driver.gather(driver.accept_requests(guild, args.settle_timeout) for guild in guilds)
+            elapsed = time.perf_counter() - started
+            after = await driver.settle(args.settle, args.settle_timeout)
+            return driver.report(elapsed, before, after)
+    finally:
+        if bot is not None and bot.returncode is None:
+            bot.terminate()
+            await bot.wait()
+        if runner is not None:
+            await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default="http://127.0.0.1:8080", help="fake Discord server URL")
+    parser.add_argument("--serve", action="store_true", help="run the fake server in this process")
+    parser.add_argument("--spawn-bot", action="store_true", help="with --serve, also start main.py against it")
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--shards", type=int, default=1, help="with --serve, shard count of the fake server")
+    parser.add_argument("--voters", type=int, default=50, help="poll voters per guild")
+    parser.add_argument("--registrations", type=int, default=10, help="registrations per guild")
+    parser.add_argument("--concurrency", type=int, default=100, help="interactions in flight at once")
+    parser.add_argument("--mode", choices=("manual", "automatic"), default="manual")
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--settle", type=float, default=6.0,
+                        help="quiet seconds that mark the end of the bot's follow-up requests; "
+                             "longer than POLL_RENDER_INTERVAL and the longest rate limit window the bot waits out")
+    parser.add_argument("--settle-timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved the report to {args.output}")
+
+if __name__ == "__main__":
+    main()
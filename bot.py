@@ -1,27 +1,162 @@
 import os
+import math
+import logging
 import discord
 from discord.ext import commands
 import asyncio
+from functools import partial
+from typing import Optional, List
+from utils import invalidate_admin_roles, is_cached_admin_role
+from storage import get_storage, close_storage
+from scheduler import get_scheduler
+from outbound import Priority, get_outbound
+from cleanup import get_cleanup
+from registration import invalidate_registration_config
+from treesync import sync_commands
+from startup import get_startup_report
+from metrics import get_metrics, metrics_server_from_env
+from diagnostics import get_diagnostics
 
-class Bot(commands.Bot):
-    def __init__(self, intents: discord.Intents):
+log = logging.getLogger(__name__)
+
+def default_intents() -> discord.Intents:
+    # No privileged message_content: every flow uses interactions, and the
+    # data channel messages are the bot's own, whose content is always sent
+    return discord.Intents.default()
+
+def apply_api_base():
+    """Point REST calls at DISCORD_API_BASE, e.g. a local fake server for load tests"""
+    base = os.getenv('DISCORD_API_BASE')
+    if base:
+        discord.http.Route.BASE = base.rstrip('/')
+
+class Bot(commands.AutoShardedBot):
+    def __init__(self, intents: discord.Intents, force_sync: bool = False, dev_guild_id: Optional[int] = None,
+                 shard_count: Optional[int] = None, shard_ids: Optional[List[int]] = None):
+        # shard_count None lets Discord recommend one; shard_ids limits this process to a cluster of shards
         super().__init__(
             command_prefix='!',
             intents=intents,
-            application_id=os.getenv('APP_ID')
+            application_id=os.getenv('APP_ID'),
+            shard_count=shard_count,
+            shard_ids=shard_ids
         )
+        self.force_sync = force_sync
+        self.dev_guild_id = dev_guild_id
+        self.metrics_server = metrics_server_from_env()
+        self.background_tasks = set()  # the loop only keeps weak references to tasks
+    
+    @property
+    def is_primary(self) -> bool:
+        """Whether this process runs shard 0 and so owns global work like the tree sync"""
+        return self.shard_ids is None or 0 in self.shard_ids
+    
+    @property
+    def runs_all_shards(self) -> bool:
+        """Whether this process runs every shard, so process-local changes reach every server"""
+        return self.shard_ids is None or len(self.shard_ids) >= (self.shard_count or 1)
+    
+    def owns_guild(self, guild_id: Optional[int]) -> bool:
+        """Whether events for this guild arrive on one of our shards"""
+        if self.shard_ids is None:
+            return True
+        if guild_id is None:
+            return 0 in self.shard_ids  # DMs arrive on shard 0
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+    
+    def shard_stats(self) -> list:
+        """Latency and guild count of every shard in this process"""
+        guilds = {}
+        for guild in self.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+        stats = []
+        for shard_id, shard in sorted(self.shards.items()):
+            latency = shard.latency
+            stats.append({
+                "shard_id": shard_id,
+                "latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+                "guilds": guilds.get(shard_id, 0),
+                "closed": shard.is_closed(),
+            })
+        return stats
+    
+    def start_background(self, coro) -> asyncio.Task:
+        """Run a coroutine as a task that is kept alive until it finishes"""
+        task = self.loop.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
     
     async def setup_hook(self):
+        report = get_startup_report()
+        report.mark("login")
+        
+        get_cleanup().client = self
+        get_metrics().install(self)
+        get_diagnostics().loop_lag.start()
+        self.add_metrics_gauges()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
         
         await self.load_extension('cogs.commands')
+        report.mark("commands_loaded")
         
+        # Rebind open polls on our shards and close the ones that ended while offline.
+        # Imported here so its import time is profiled with the other command modules.
+        from commands.poll import poll_manager
+        await poll_manager.restore(self.owns_guild)
+        report.mark("polls_restored")
+        
+        # Syncing is a REST round trip, so it does not hold up the gateway connection
+        if self.is_primary:
+            self.loop.create_task(self.sync_command_tree())
+        self.loop.create_task(self.rotate_status())
+    
+    def add_metrics_gauges(self):
+        metrics = get_metrics()
+        diagnostics = get_diagnostics()
+        metrics.add_gauge("guilds", "Servers on this process's shards.", lambda: len(self.guilds))
+        metrics.add_gauge("shard_latency_seconds", "Gateway heartbeat latency by shard.",
+                          lambda: diagnostics.shard_latencies(self), label="shard")
+        metrics.add_gauge("loop_lag_seconds", "Event loop lag over the last minute.",
+                          lambda: {"current": diagnostics.loop_lag.current or 0.0, "max": diagnostics.loop_lag.max or 0.0},
+                          label="window")
+        metrics.add_gauge("loop_lag_window", "Event loop lag samples in the last minute by upper bound.",
+                          diagnostics.loop_lag.buckets, label="le")
+        metrics.add_gauge("loop_slow_callbacks", "Callbacks that blocked the event loop past the threshold.",
+                          lambda: diagnostics.loop_lag.slow_total)
+        metrics.add_gauge("rest_round_trip_seconds", "Last measured REST round trip.", lambda: diagnostics.rest_round_trip or 0.0)
+        metrics.add_gauge("command_latency_recent_seconds", "Time to first response of the last 1000 commands.",
+                          lambda: diagnostics.command_percentiles() or {}, label="quantile")
+        metrics.add_gauge("outbound_queued", "Outbound REST work waiting by priority.",
+                          lambda: get_outbound().stats()["queued"], label="priority")
+        metrics.add_gauge("timers_pending", "Timers waiting on the shared scheduler.", lambda: get_scheduler().pending)
+        metrics.add_gauge("cleanup_pending", "Message deletes waiting to be batched.", lambda: get_cleanup().stats()["pending"])
+    
+    def dispatch(self, event_name: str, /, *args, **kwargs):
+        # Counted here rather than in an on_socket_event_type listener, which would start a task per event
+        if event_name == "socket_event_type":
+            get_metrics().gateway_event(args[0])
+        super().dispatch(event_name, *args, **kwargs)
+    
+    async def sync_command_tree(self):
+        target = f"guild {self.dev_guild_id}" if self.dev_guild_id else "global"
         try:
-            synced = await self.tree.sync()
-            print(f"Synced {len(synced)} command(s)")
+            synced = await sync_commands(self.tree, self.application_id, self.dev_guild_id, force=self.force_sync)
+            if synced is None:
+                print(f"Commands unchanged, skipped sync ({target})")
+            else:
+                print(f"Synced {synced} command(s) ({target})")
         except Exception as e:
             print(f"Failed to sync commands: {e}")
-
-        self.loop.create_task(self.rotate_status())
+    
+    async def close(self):
+        get_scheduler().close()
+        get_diagnostics().loop_lag.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await super().close()
+        await close_storage()
     
     async def rotate_status(self):
         await self.wait_until_ready()
@@ -35,10 +170,39 @@ class Bot(commands.Bot):
             ]
             
             for activity in statuses:
-                await self.change_presence(activity=activity)
+                # Lowest priority, and a backed up presence change is replaced by the next one
+                get_outbound().post(partial(self.change_presence, activity=activity), Priority.COSMETIC, bucket="presence", key="presence")
                 await asyncio.sleep(30)
     
+    async def on_guild_role_delete(self, role: discord.Role):
+        # A deleted admin role makes the cached set stale
+        if is_cached_admin_role(role.guild.id, role.id):
+            invalidate_admin_roles(role.guild.id)
+    
+    async def prepare_guilds(self, guilds: List[discord.Guild]):
+        # Imports stored data ahead of the first command, which must be answered within 3 seconds
+        try:
+            await get_storage().prepare_guilds(guilds)
+        except Exception:
+            log.exception("Failed to prepare the data of %d guild(s)", len(guilds))
+    
+    async def on_guild_join(self, guild: discord.Guild):
+        self.start_background(self.prepare_guilds([guild]))
+    
+    async def on_guild_remove(self, guild: discord.Guild):
+        invalidate_admin_roles(guild.id)
+        invalidate_registration_config(guild.id)
+    
     async def on_ready(self):
+        report = get_startup_report()
+        first_ready = report.ready_ms is None
+        if first_ready:
+            report.mark("ready")
         print(f'Logged in as {self.user} (ID: {self.user.id})')
         print(f'Connected to {len(self.guilds)} servers')
+        for stats in self.shard_stats():
+            print(f"Shard {stats['shard_id']}: {stats['guilds']} servers, latency {stats['latency_ms']}ms")
+        if first_ready:
+            print(report.summary())
+            self.start_background(self.prepare_guilds(list(self.guilds)))
         print('------')
\ No newline at end of file
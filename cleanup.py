@@ -0,0 +1,125 @@
+import time
+import logging
+from functools import partial
+from typing import Optional, Iterable
+import discord
+from scheduler import TimerScheduler, get_scheduler
+from outbound import Priority, get_outbound, channel_bucket
+
+log = logging.getLogger(__name__)
+
+# Discord only bulk deletes 2-100 messages younger than 14 days; keep a
+# margin so a message does not age out between queueing and the call
+BULK_DELETE_LIMIT = 100
+BULK_DELETE_MAX_AGE = 14 * 24 * 60 * 60 - 60 * 60
+# Seconds deletes in one channel are collected before they are sent
+CLEANUP_WINDOW = 1.0
+
+def can_bulk_delete(message_id: int, now: Optional[float] = None) -> bool:
+    """Whether a message is young enough for the bulk delete endpoint"""
+    now = time.time() if now is None else now
+    return now - discord.utils.snowflake_time(message_id).timestamp() < BULK_DELETE_MAX_AGE
+
+class CleanupService:
+    """Collects message deletions per channel and sends them as bulk deletes.
+
+    Deletes queued for the same channel within `window` seconds are sent
+    together: young messages in chunks of up to 100 per bulk call, older
+    ones one by one. All calls are cosmetic outbound work.
+    """
+
+    def __init__(self, window: float = CLEANUP_WINDOW, scheduler: Optional[TimerScheduler] = None):
+        self.window = window
+        self.client: Optional[discord.Client] = None
+        self._scheduler = scheduler
+        self._pending = {}  # channel_id -> set of message IDs
+        self.queued = 0
+        self.bulk_calls = 0
+        self.single_calls = 0
+
+    @property
+    def scheduler(self) -> TimerScheduler:
+        return self._scheduler or get_scheduler()
+
+    def delete(self, message: discord.abc.Snowflake, delay: float = 0, channel_id: Optional[int] = None):
+        """Queue a message for deletion, optionally after `delay` seconds"""
+        channel_id = channel_id or message.channel.id
+        if delay > 0:
+            self.scheduler.schedule(("cleanup", message.id), delay, partial(self._queue_later, channel_id, message.id))
+        else:
+            self._queue(channel_id, message.id)
+
+    def delete_many(self, messages: Iterable[discord.abc.Snowflake]):
+        for message in messages:
+            self.delete(message)
+
+    async def _queue_later(self, channel_id: int, message_id: int):
+        self._queue(channel_id, message_id)
+
+    def _queue(self, channel_id: int, message_id: int):
+        pending = self._pending.setdefault(channel_id, set())
+        pending.add(message_id)
+        self.queued += 1
+        flush_key = ("cleanup", "flush", channel_id)
+        if len(pending) >= BULK_DELETE_LIMIT:
+            self.scheduler.cancel(flush_key)
+            self.flush(channel_id)
+        elif flush_key not in self.scheduler:
+            self.scheduler.schedule(flush_key, self.window, partial(self._flush_later, channel_id))
+
+    async def _flush_later(self, channel_id: int):
+        self.flush(channel_id)
+
+    def flush(self, channel_id: int):
+        """Send every queued delete for a channel"""
+        message_ids = self._pending.pop(channel_id, None)
+        if not message_ids:
+            return
+        now = time.time()
+        recent = sorted(message_id for message_id in message_ids if can_bulk_delete(message_id, now))
+        older = [message_id for message_id in message_ids if not can_bulk_delete(message_id, now)]
+
+        outbound = get_outbound()
+        bucket = channel_bucket(channel_id)
+        for i in range(0, len(recent), BULK_DELETE_LIMIT):
+            chunk = recent[i:i + BULK_DELETE_LIMIT]
+            if len(chunk) == 1:
+                older.append(chunk[0])
+            else:
+                outbound.post(partial(self._bulk_delete, channel_id, chunk), Priority.COSMETIC, bucket)
+        for message_id in older:
+            outbound.post(partial(self._single_delete, channel_id, message_id), Priority.COSMETIC, bucket)
+
+    async def _bulk_delete(self, channel_id: int, message_ids: list):
+        self.bulk_calls += 1
+        try:
+            await self.client.http.delete_messages(channel_id, message_ids)
+        except discord.Forbidden:
+            # Bulk deletes need Manage Messages; the bot can still delete its own messages
+            log.info("Bulk delete not permitted in channel %s, deleting %d message(s) one by one", channel_id, len(message_ids))
+            for message_id in message_ids:
+                await self._single_delete(channel_id, message_id)
+
+    async def _single_delete(self, channel_id: int, message_id: int):
+        self.single_calls += 1
+        try:
+            await self.client.http.delete_message(channel_id, message_id)
+        except discord.NotFound:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "pending": sum(len(ids) for ids in self._pending.values()),
+            "queued": self.queued,
+            "bulk_calls": self.bulk_calls,
+            "single_calls": self.single_calls,
+        }
+
+_cleanup: Optional[CleanupService] = None
+
+def get_cleanup() -> CleanupService:
+    """Get the shared cleanup service"""
+    global _cleanup
+    if _cleanup is None:
+        _cleanup = CleanupService()
+    return _cleanup
@@ -0,0 +1,53 @@
+import time
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+class Coalescer:
+    """Runs an async render callback at most once per interval.
+
+    Calls to request() made while a render is pending are merged, and the
+    render always reads the latest state when it finally runs.
+    """
+
+    def __init__(self, render, interval: float):
+        self.render = render
+        self.interval = interval
+        self.requests = 0
+        self.renders = 0
+        self._dirty = False
+        self._last_render = float("-inf")
+        self._task = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether a render is scheduled or running"""
+        return self._task is not None and not self._task.done()
+
+    def request(self):
+        """Mark the state as changed and schedule a render if none is pending"""
+        self.requests += 1
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._dirty:
+            delay = self._last_render + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._dirty = False
+            self._last_render = time.monotonic()
+            self.renders += 1
+            try:
+                await self.render()
+            except Exception:
+                log.exception("Error rendering coalesced update")
+
+    def cancel(self):
+        """Drop any pending render"""
+        self._dirty = False
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
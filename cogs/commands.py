@@ -1,56 +1,203 @@
-import os
+import sys
+import time
+import pkgutil
+import logging
 import importlib
+from dataclasses import dataclass, field
+from typing import Optional, List
 import discord
 from discord.ext import commands
 from discord import app_commands
+from startup import get_startup_report
+from treesync import sync_commands
+from metrics import get_metrics
+
+log = logging.getLogger(__name__)
+
+COMMANDS_PACKAGE = "commands"
+
+def lazy_handler(target: str):
+    """Handler that imports "package.module:function" on first invocation.
+
+    Command modules keep their signatures light, while heavy implementations
+    are only imported when a command is first used:
+
+        @app_commands.command(name="stats")
+        async def stats(interaction: discord.Interaction):
+            await _stats(interaction)
+
+        _stats = lazy_handler("commands.impl.stats:run")
+    """
+    module_name, _, attr = target.partition(":")
+    func = None
+
+    async def handler(*args, **kwargs):
+        nonlocal func
+        if func is None:
+            started = time.perf_counter()
+            func = getattr(importlib.import_module(module_name), attr)
+            timing = get_startup_report().module(module_name)
+            timing.import_ms = (time.perf_counter() - started) * 1000
+            timing.lazy = True
+            log.info("Lazily imported %s in %.1fms", module_name, timing.import_ms)
+        return await func(*args, **kwargs)
+
+    return handler
+
+@dataclass
+class ReloadResult:
+    module: str
+    ok: bool
+    reload_ms: float = 0.0
+    removed: List[str] = field(default_factory=list)
+    added: List[str] = field(default_factory=list)
+    synced: Optional[int] = None  # commands synced, None if signatures were unchanged
+    error: Optional[str] = None
 
 class CommandLoader(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.module_commands = {}  # module name -> commands it added to the tree
         self.load_commands_from_folder()
-    
+
+    def command_module_names(self) -> list:
+        """Names of the modules in the commands package, wherever the bot is started from"""
+        package = importlib.import_module(COMMANDS_PACKAGE)
+        return sorted(
+            info.name for info in pkgutil.iter_modules(package.__path__)
+            if not info.name.startswith("_") and not info.ispkg
+        )
+
     def load_commands_from_folder(self):
-        """Automatically load all command files from the commands directory"""
-        commands_dir = "commands"
-        
-        if not os.path.exists(commands_dir):
-            print(f"Warning: {commands_dir} directory not found")
+        """Automatically load all command files from the commands package"""
+        try:
+            names = self.command_module_names()
+        except ImportError:
+            log.warning("%s package not found", COMMANDS_PACKAGE)
             return
-        
-        # Get all Python files in the commands directory
-        for filename in os.listdir(commands_dir):
-            if filename.endswith(".py") and not filename.startswith("_"):
-                module_name = filename[:-3]  # Remove .py extension
-                self.load_command_module(module_name)
-    
-    def load_command_module(self, module_name: str):
+
+        for module_name in names:
+            self.load_command_module(module_name)
+
+    def load_command_module(self, module_name: str) -> bool:
         """Load a single command module and register its commands"""
+        report = get_startup_report()
+        timing = report.module(module_name)
         try:
             # Import the module
-            module = importlib.import_module(f"commands.{module_name}")
-            
+            started = time.perf_counter()
+            module = importlib.import_module(f"{COMMANDS_PACKAGE}.{module_name}")
+            imported = time.perf_counter()
+            timing.import_ms = (imported - started) * 1000
+
+            self.register_module(module, module_name)
+            timing.register_ms = (time.perf_counter() - imported) * 1000
+            timing.commands = len(self.module_commands[module_name])
+            timing.error = None
+            log.debug("Loaded command module %s in %.1fms", module_name, timing.import_ms + timing.register_ms)
+            return True
+        except Exception as e:
+            timing.error = f"{type(e).__name__}: {e}"
+            log.exception("Failed to load command module %s", module_name)
+            return False
+
+    def register_module(self, module, module_name: str):
+        """Add a module's commands to the tree and remember which ones it added"""
+        before = set(self.bot.tree.get_commands())
+        try:
             # Look for a setup function or command classes
             if hasattr(module, 'setup'):
                 # If the module has a setup function, use it
                 module.setup(self.bot)
-                print(f"Loaded command module: {module_name} (via setup)")
-            else:
-                # Otherwise, look for classes that inherit from app_commands.Group or have commands
-                for attr_name in dir(module):
-                    attr = getattr(module, attr_name)
-                    
-                    # If it's a command group, add it to the tree
-                    if isinstance(attr, app_commands.Group):
-                        self.bot.tree.add_command(attr)
-                        print(f"Loaded command group: {module_name}.{attr_name}")
-                    
-                    # If it's a command, add it directly
-                    elif isinstance(attr, app_commands.Command):
-                        self.bot.tree.add_command(attr)
-                        print(f"Loaded command: {module_name}.{attr_name}")
-                        
+                return
+
+            # Otherwise, look for classes that inherit from app_commands.Group or have commands
+            for attr_name in dir(module):
+                attr = getattr(module, attr_name)
+
+                # Both command groups and commands are added directly to the tree
+                if isinstance(attr, (app_commands.Group, app_commands.Command)):
+                    self.bot.tree.add_command(attr)
+                    log.debug("Loaded command %s.%s", module_name, attr_name)
+        finally:
+            added = [command for command in self.bot.tree.get_commands() if command not in before]
+            for command in added:
+                get_metrics().instrument(command)
+            self.module_commands[module_name] = added
+
+    def unregister_module(self, module_name: str) -> list:
+        """Remove the commands a module added; returns them"""
+        removed = self.module_commands.pop(module_name, [])
+        guild = discord.Object(id=self.bot.dev_guild_id) if getattr(self.bot, "dev_guild_id", None) else None
+        for command in removed:
+            command_type = getattr(command, "type", discord.AppCommandType.chat_input)
+            self.bot.tree.remove_command(command.name, type=command_type)
+            if guild is not None:
+                # Drop the copy made for the dev guild too
+                self.bot.tree.remove_command(command.name, guild=guild, type=command_type)
+        return removed
+
+    async def reload_command_module(self, module_name: str) -> ReloadResult:
+        """Re-import one command module and swap its commands in the tree.
+
+        The tree is only synced if the command signatures changed. If the new
+        code fails to import or register, the previous commands stay active.
+        """
+        result = ReloadResult(module_name, ok=False)
+        full_name = f"{COMMANDS_PACKAGE}.{module_name}"
+        if module_name not in self.command_module_names():
+            result.error = "No such command module"
+            return result
+        if not getattr(self.bot, "runs_all_shards", True):
+            # The other clusters are separate processes that would keep the old code. This also
+            # means only the primary process, which owns the last synced tree hash, gets to sync.
+            result.error = "The bot runs as several clusters and this one only has some of the shards; restart the launcher to deploy changes"
+            return result
+
+        started = time.perf_counter()
+        old_commands = list(self.module_commands.get(module_name, []))
+        # The lazy implementation, if any, is imported again on the next use
+        sys.modules.pop(f"{COMMANDS_PACKAGE}.impl.{module_name}", None)
+        try:
+            module = sys.modules.get(full_name)
+            module = importlib.reload(module) if module is not None else importlib.import_module(full_name)
         except Exception as e:
-            print(f"Failed to load command module {module_name}: {e}")
+            result.error = f"{type(e).__name__}: {e}"
+            log.exception("Failed to reload command module %s", module_name)
+            return result
+
+        self.unregister_module(module_name)
+        try:
+            self.register_module(module, module_name)
+        except Exception as e:
+            # Put the previous commands back
+            self.unregister_module(module_name)
+            for command in old_commands:
+                self.bot.tree.add_command(command, override=True)
+            self.module_commands[module_name] = old_commands
+            result.error = f"{type(e).__name__}: {e}"
+            log.exception("Failed to register reloaded module %s", module_name)
+            return result
+
+        result.ok = True
+        result.removed = [command.name for command in old_commands]
+        result.added = [command.name for command in self.module_commands[module_name]]
+        result.reload_ms = (time.perf_counter() - started) * 1000
+
+        timing = get_startup_report().module(module_name)
+        timing.commands = len(result.added)
+        timing.error = None
+
+        # sync_commands compares against the hash of the last synced tree
+        dev_guild_id = getattr(self.bot, "dev_guild_id", None)
+        try:
+            result.synced = await sync_commands(self.bot.tree, self.bot.application_id, dev_guild_id)
+        except Exception as e:
+            result.error = f"Reloaded, but sync failed: {e}"
+            log.exception("Failed to sync after reloading %s", module_name)
+
+        log.info("Reloaded command module %s in %.1fms (synced: %s)", module_name, result.reload_ms, result.synced)
+        return result
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(CommandLoader(bot))
\ No newline at end of file
+    await bot.add_cog(CommandLoader(bot))
@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
+from static_responses import StaticResponse
 
-@app_commands.command(name="about", description="Learn more about Amethis")
-async def about(interaction: discord.Interaction):
+def build_about_embed() -> discord.Embed:
     embed = discord.Embed(
         title="<:heart:1427788237832847441> Hello! I'm Amethis",
         description="**Your transparent, open-source Discord companion**",
@@ -41,7 +41,14 @@ async def about(interaction: discord.Interaction):
     
     embed.set_footer(text="Made with ♥️ by yigit-guven • Use /help to explore my commands!")
     
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    return embed
+
+# Built once when the module loads
+ABOUT = StaticResponse(build_about_embed())
+
+@app_commands.command(name="about", description="Learn more about Amethis", extras={"category": "general"})
+async def about(interaction: discord.Interaction):
+    await ABOUT.send(interaction)
 
 def setup(bot):
     bot.tree.add_command(about)
@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
-from utils import is_admin, get_admin_roles, save_admin_roles
+from utils import is_admin, add_admin_role
 
-@app_commands.command(name="addadminrole", description="Add a role as admin for Amethis")
+@app_commands.command(name="addadminrole", description="Add a role as admin for Amethis", extras={"category": "administration"})
 @app_commands.guild_only()
 @app_commands.describe(role="The role to add as Amethis administrator")
 async def addadminrole(interaction: discord.Interaction, role: discord.Role):
@@ -15,9 +15,7 @@ async def addadminrole(interaction: discord.Interaction, role: discord.Role):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
 
-    admin_role_ids = await get_admin_roles(interaction.guild)
-    
-    if role.id in admin_role_ids:
+    if not await add_admin_role(interaction.guild, role.id):
         embed = discord.Embed(
             title="<:circle:1427512638769725542> Role Already Admin",
             description=f"{role.mention} is already an administrator role.",
@@ -25,8 +23,6 @@ async def addadminrole(interaction: discord.Interaction, role: discord.Role):
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
-    admin_role_ids.append(role.id)
-    await save_admin_roles(interaction.guild, admin_role_ids)
     
     embed = discord.Embed(
         title="<:tick:1427514481650565251> Role Added",
@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
-from utils import is_admin, get_admin_roles
+from utils import is_admin, get_admin_roles, admin_roles_lock, format_role_list
 
-@app_commands.command(name="adminroles", description="View all admin roles for Amethis")
+@app_commands.command(name="adminroles", description="View all admin roles for Amethis", extras={"category": "administration"})
 @app_commands.guild_only()
 async def adminroles(interaction: discord.Interaction):
     if not await is_admin(interaction):
@@ -14,7 +14,9 @@ async def adminroles(interaction: discord.Interaction):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
-    admin_role_ids = await get_admin_roles(interaction.guild)
+    # Locked like the cache misses, so a legacy conversion never runs twice at once
+    async with admin_roles_lock(interaction.guild.id):
+        admin_role_ids = await get_admin_roles(interaction.guild)
     
     embed = discord.Embed(
         title="<:shield:1427515556113809479> Admin Roles",
@@ -23,8 +25,7 @@ async def adminroles(interaction: discord.Interaction):
     )
     
     if admin_role_ids:
-        role_mentions = [f"<@&{role_id}>" for role_id in admin_role_ids]
-        role_list = "\n".join(role_mentions)
+        role_list = format_role_list(admin_role_ids)
         embed.add_field(name="Roles with Admin Access", value=role_list, inline=False)
     else:
         embed.add_field(
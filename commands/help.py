@@ -1,209 +1,135 @@
 import discord
 from discord import app_commands
-from discord.ui import Select, View
+from discord.ui import Select, View, DynamicItem
+from dataclasses import dataclass
 from utils import is_admin
+from static_responses import FrozenEmbed
 
-class HelpSelect(Select):
-    def __init__(self, is_user_admin: bool = False):
-        options = [
-            discord.SelectOption(
-                label="General Commands",
-                description="View all general bot commands",
-                emoji="<:scroll:1427519497207812168>",
-                value="general"
-            ),
-            discord.SelectOption(
-                label="Legal Information",
-                description="Privacy, Terms, and License",
-                emoji="<:legal:1427781041216557127>",
-                value="legal"
-            )
-        ]
-        if is_user_admin:
-            options.extend([
-                discord.SelectOption(
-                    label="Administration",
-                    description="Server administration commands",
-                    emoji="<:shield:1427515556113809479>",
-                    value="administration"
-                ),
-                discord.SelectOption(
-                    label="Registration Management",
-                    description="User registration management commands",
-                    emoji="<:tick:1427514481650565251>",
-                    value="registration"
-                )
-            ])
-        
-        super().__init__(placeholder="Choose a category...", options=options, min_values=1, max_values=1)
+@dataclass(frozen=True)
+class Category:
+    key: str
+    label: str
+    description: str
+    emoji: str
+    heading: str
+    summary: str  # line in the index page
+    admin_only: bool = False
 
-    async def callback(self, interaction: discord.Interaction):
-        category = self.values[0]
-        
-        if category == "general":
-            embed = discord.Embed(
-                title="<:scroll:1427519497207812168> General Commands",
-                description="**All available general commands:**",
-                color=discord.Color.purple()
-            )
-            
-            embed.add_field(
-                name="/help",
-                value="Shows this help menu",
-                inline=False
-            )
-            embed.add_field(
-                name="/about",
-                value="Learn more about Amethis and her features",
-                inline=False
-            )
-            embed.add_field(
-                name="/ping",
-                value="Check bot's latency and connection status",
-                inline=False
-            )
-            embed.add_field(
-                name="/invite",
-                value="Invite Amethis to your server",
-                inline=False
-            )
-            embed.add_field(
-                name="/poll",
-                value="Create customizable polls with advanced options",
-                inline=False
-            )
-            embed.add_field(
-                name="/register",
-                value="Complete the server registration process",
-                inline=False
-            )
-            
-        elif category == "legal":
-            embed = discord.Embed(
-                title="<:legal:1427781041216557127> Legal Information",
-                description="**Important legal documents and policies:**",
-                color=discord.Color.purple()
-            )
-            
-            embed.add_field(
-                name="/privacy",
-                value="View our privacy policy and data handling",
-                inline=False
-            )
-            embed.add_field(
-                name="/terms", 
-                value="Read our terms of service",
-                inline=False
-            )
-            embed.add_field(
-                name="/license",
-                value="View the bot's license information",
-                inline=False
-            )
-            embed.add_field(
-                name="/source",
-                value="View the bot's source code on GitHub",
-                inline=False
-            )
-        
-        elif category == "administration":
-            embed = discord.Embed(
-                title="<:shield:1427515556113809479> Administration Commands",
-                description="**Server administration commands:**",
-                color=discord.Color.purple()
-            )
-            
-            embed.add_field(
-                name="/adminroles",
-                value="View all admin roles for Amethis",
-                inline=False
-            )
-            embed.add_field(
-                name="/addadminrole",
-                value="Add a role as admin for Amethis",
-                inline=False
-            )
-            embed.add_field(
-                name="/removeadminrole",
-                value="Remove a role from Amethis admin roles",
-                inline=False
-            )
-            embed.add_field(
-                name="<:pin:1427805351083905127> Note",
-                value="These commands are only available for server administrators and custom admin roles.",
-                inline=False
-            )
-        
-        elif category == "registration":
+# Commands join a category with extras={"category": key}; commands without one are not listed
+CATEGORIES = (
+    Category("general", "General Commands", "View all general bot commands",
+             "<:scroll:1427519497207812168>", "All available general commands:", "Core bot functionality"),
+    Category("legal", "Legal Information", "Privacy, Terms, and License",
+             "<:legal:1427781041216557127>", "Important legal documents and policies:", "Policies and terms"),
+    Category("administration", "Administration", "Server administration commands",
+             "<:shield:1427515556113809479>", "Server administration commands:", "Server administration commands",
+             admin_only=True),
+    Category("registration", "Registration Management", "User registration management commands",
+             "<:tick:1427514481650565251>", "User registration management commands:",
+             "User registration management (Admin Only)", admin_only=True),
+)
+ADMIN_NOTE = "These commands are only available for server administrators and custom admin roles."
+
+def command_entries(tree: app_commands.CommandTree) -> dict:
+    """Category key -> (usage, description) of its commands, subcommands spelled out"""
+    entries = {category.key: [] for category in CATEGORIES}
+    for command in sorted(tree.get_commands(type=discord.AppCommandType.chat_input), key=lambda c: c.name):
+        key = command.extras.get("category")
+        if key not in entries:
+            continue
+        if isinstance(command, app_commands.Group):
+            entries[key].extend((f"/{sub.qualified_name}", sub.description) for sub in command.walk_commands()
+                                if isinstance(sub, app_commands.Command))
+        else:
+            entries[key].append((f"/{command.name}", command.description))
+    return entries
+
+class HelpPages:
+    """Help embeds and views of one permission tier, built from the command tree"""
+
+    def __init__(self, tier: str, entries: dict):
+        self.categories = [category for category in CATEGORIES
+                           if (tier == "admin" or not category.admin_only) and entries[category.key]]
+
+        categories_text = "\n".join(f"• **{category.label}** - {category.summary}" for category in self.categories)
+        index = discord.Embed(
+            title="<:question:1427511257275301959> Amethis Help Center <:question:1427511257275301959>",
+            description="**Welcome to the help menu!**\n\nPlease select a category from the dropdown below to explore available commands.",
+            color=discord.Color.purple()
+        )
+        index.add_field(name="<:hashtag:1427516016354660414> Categories", value=categories_text, inline=False)
+        index.set_footer(text="Choose a category to get started")
+        self.index = FrozenEmbed.freeze(index)
+
+        self.pages = {}
+        for category in self.categories:
             embed = discord.Embed(
-                title="<:tick:1427514481650565251> Registration Management Commands",
-                description="**User registration management commands:**",
+                title=f"{category.emoji} {category.label}",
+                description=f"**{category.heading}**",
                 color=discord.Color.purple()
             )
-            
-            embed.add_field(
-                name="/setupregistration",
-                value="Set up the registration system for this server",
-                inline=False
-            )
-            embed.add_field(
-                name="/addregistrationquestion",
-                value="Add a custom question to the registration form",
-                inline=False
-            )
-            embed.add_field(
-                name="/removeregistrationquestion",
-                value="Remove a question from the registration form",
-                inline=False
-            )
-            embed.add_field(
-                name="/addregistrationmanager",
-                value="Add a user as registration manager",
-                inline=False
-            )
-            embed.add_field(
-                name="/removeregistrationmanager",
-                value="Remove a user from registration managers",
-                inline=False
-            )
-            embed.add_field(
-                name="<:pin:1427805351083905127> Note",
-                value="These commands are only available for server administrators and custom admin roles.",
-                inline=False
-            )
-        
-        embed.set_footer(text="Select another category to explore more commands")
-        
-        await interaction.response.edit_message(embed=embed, view=HelpView(is_user_admin=await is_admin(interaction)))
+            for usage, description in entries[category.key]:
+                embed.add_field(name=usage, value=description or "No description", inline=False)
+            if category.admin_only:
+                embed.add_field(name="<:pin:1427805351083905127> Note", value=ADMIN_NOTE, inline=False)
+            embed.set_footer(text="Select another category to explore more commands")
+            self.pages[category.key] = FrozenEmbed.freeze(embed)
+
+        # Routed by custom_id, so one stopped view serves every message of this tier
+        self.view = View(timeout=None)
+        self.view.add_item(HelpSelect.for_tier(tier, self.categories))
+        self.view.stop()
+
+# Pages by tier, rebuilt when commands are added, removed or reloaded
+_pages = {}
+_pages_commands = ()
 
-class HelpView(View):
-    def __init__(self, is_user_admin: bool = False):
-        super().__init__()
-        self.add_item(HelpSelect(is_user_admin=is_user_admin))
+def get_help_pages(tree: app_commands.CommandTree, tier: str) -> HelpPages:
+    global _pages_commands
+    commands = tuple(tree.get_commands())
+    if commands != _pages_commands:
+        _pages.clear()
+        _pages_commands = commands
+    pages = _pages.get(tier)
+    if pages is None:
+        pages = _pages[tier] = HelpPages(tier, command_entries(tree))
+    return pages
+
+class HelpSelect(DynamicItem[Select], template=r"amethis:help:(?P<tier>user|admin)"):
+    def __init__(self, tier: str, item: Select):
+        super().__init__(item)
+        self.tier = tier
+
+    @classmethod
+    def for_tier(cls, tier: str, categories: list) -> "HelpSelect":
+        return cls(tier, Select(
+            custom_id=f"amethis:help:{tier}",
+            placeholder="Choose a category...",
+            options=[
+                discord.SelectOption(label=category.label, description=category.description,
+                                     emoji=category.emoji, value=category.key)
+                for category in categories
+            ],
+            min_values=1,
+            max_values=1
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Select, match):
+        return cls(match["tier"], item)
+
+    async def callback(self, interaction: discord.Interaction):
+        # The admin tier in the custom_id is only honoured while the user is still an admin
+        tier = "admin" if self.tier == "admin" and await is_admin(interaction) else "user"
+        pages = get_help_pages(interaction.client.tree, tier)
+        page = pages.pages.get(self.item.values[0], pages.index)
+        await interaction.response.edit_message(embed=page, view=pages.view)
 
-@app_commands.command(name="help", description="Get help with bot commands")
+@app_commands.command(name="help", description="Get help with bot commands", extras={"category": "general"})
 async def help(interaction: discord.Interaction):
-    is_user_admin = await is_admin(interaction)
-    
-    embed = discord.Embed(
-        title="<:question:1427511257275301959> Amethis Help Center <:question:1427511257275301959>",
-        description="**Welcome to the help menu!**\n\nPlease select a category from the dropdown below to explore available commands.",
-        color=discord.Color.purple()
-    )
-    
-    categories_text = "• **General Commands** - Core bot functionality\n• **Legal Information** - Policies and terms"
-    if is_user_admin:
-        categories_text += "\n• **Administration** - Server administration commands\n• **Registration Management** - User registration management (Admin Only)"
-    
-    embed.add_field(
-        name="<:hashtag:1427516016354660414> Categories",
-        value=categories_text,
-        inline=False
-    )
-    
-    embed.set_footer(text="Choose a category to get started")
-    
-    await interaction.response.send_message(embed=embed, view=HelpView(is_user_admin=is_user_admin), ephemeral=True)
+    pages = get_help_pages(interaction.client.tree, "admin" if await is_admin(interaction) else "user")
+    await interaction.response.send_message(embed=pages.index, view=pages.view, ephemeral=True)
 
 def setup(bot):
-    bot.tree.add_command(help)
\ No newline at end of file
+    bot.add_dynamic_items(HelpSelect)
+    bot.tree.add_command(help)
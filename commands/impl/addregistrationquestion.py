@@ -0,0 +1,94 @@
+import re
+import discord
+from discord.ui import Modal, TextInput
+from utils import is_admin
+from registration import Question, get_registration_config, save_registration_config, extract_role_from_text
+from typing import List, Tuple
+
+class AddQuestionModal(Modal, title="Add Registration Question"):
+    question = TextInput(label="Question", max_length=200)
+    options = TextInput(
+        label="Options (empty = open text question)",
+        style=discord.TextStyle.paragraph,
+        placeholder="Red : RedRole , Blue : 123456789012345678 , Green : @GreenRole",
+        required=False
+    )
+    nickname = TextInput(
+        label="Open text: use answer as nickname? (yes/no)",
+        placeholder="no",
+        max_length=5,
+        required=False
+    )
+
+    async def on_submit(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        question_text = self.question.value.strip()
+        if not question_text:
+            await interaction.response.send_message("❌ Empty question. Aborting.", ephemeral=True)
+            return
+
+        raw = self.options.value.strip()
+        if not raw:
+            # Open text
+            nick_choice = self.nickname.value.strip().lower()
+            if nick_choice in ("yes", "y", "true"):
+                action = "Nick Changer"
+            else:
+                action = "None"
+
+            new_q = Question(question=question_text, type="Text", action=action)
+
+        else:
+            # With options: "Option : Role" pairs separated by commas
+            pairs = [p.strip() for p in re.split(r'\s*,\s*', raw) if p.strip()]
+            parsed_options: List[Tuple[str, str]] = []
+            failed_pairs = []
+            for pair in pairs:
+                if ":" not in pair:
+                    failed_pairs.append(pair)
+                    continue
+                left, right = pair.split(":", 1)
+                opt_text = left.strip()
+                role_text = right.strip().lstrip("@")
+                role_obj = extract_role_from_text(guild, role_text)
+                if role_obj:
+                    role_repr = f"<@&{role_obj.id}>"
+                else:
+                    # keep the raw text if role not resolved; still allow it
+                    role_repr = role_text
+                parsed_options.append((opt_text, role_repr))
+
+            if failed_pairs:
+                await interaction.response.send_message(f"❌ Could not parse pairs: {failed_pairs}. Aborting. Use format `Option : Role, ...`", ephemeral=True)
+                return
+
+            # With options, action is Role Adder
+            new_q = Question(question=question_text, type="Option", action="Role Adder", options=parsed_options)
+
+        # Re-read the config so edits made while the modal was open are kept
+        config = await get_registration_config(guild)
+        if config is None:
+            await interaction.response.send_message("⚠️ Could not find the registration configuration. Run /setupregistration first.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        updated = config.copy()
+        updated.questions.append(new_q)
+        await save_registration_config(guild, updated)
+        await interaction.followup.send("✅ Question added to the registration embed.", ephemeral=True)
+
+async def run(interaction: discord.Interaction):
+    # admin check
+    if not await is_admin(interaction):
+        await interaction.response.send_message("❌ You do not have permission to use this command.", ephemeral=True)
+        return
+
+    guild = interaction.guild
+    config = await get_registration_config(guild)
+    if config is None:
+        await interaction.response.send_message(
+            "⚠️ Could not find the registration configuration. Run /setupregistration first.",
+            ephemeral=True
+        )
+        return
+
+    await interaction.response.send_modal(AddQuestionModal())
@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
+from static_responses import StaticResponse
 
-@app_commands.command(name="invite", description="Invite Amethis to your server")
-async def invite(interaction: discord.Interaction):
+def build_invite_embed() -> discord.Embed:
     embed = discord.Embed(
         title="<:amethyst:1427510624048382134> Invite Amethis",
         description="**Want to add me to your server?**",
@@ -23,7 +23,14 @@ async def invite(interaction: discord.Interaction):
     
     embed.set_footer(text="Thank you for choosing Amethis! 💜")
     
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    return embed
+
+# Built once when the module loads
+INVITE = StaticResponse(build_invite_embed())
+
+@app_commands.command(name="invite", description="Invite Amethis to your server", extras={"category": "general"})
+async def invite(interaction: discord.Interaction):
+    await INVITE.send(interaction)
 
 def setup(bot):
     bot.tree.add_command(invite)
\ No newline at end of file
@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
+from static_responses import StaticResponse
 
-@app_commands.command(name="license", description="View the bot's license")
-async def license(interaction: discord.Interaction):
+def build_license_embed() -> discord.Embed:
     embed = discord.Embed(
         title="📄 License Information",
         description="**Amethis Discord Bot License**",
@@ -22,7 +22,14 @@ async def license(interaction: discord.Interaction):
     
     embed.set_footer(text="Please review the full license terms before use")
     
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    return embed
+
+# Built once when the module loads
+LICENSE = StaticResponse(build_license_embed())
+
+@app_commands.command(name="license", description="View the bot's license", extras={"category": "legal"})
+async def license(interaction: discord.Interaction):
+    await LICENSE.send(interaction)
 
 def setup(bot):
     bot.tree.add_command(license)
@@ -1,16 +1,36 @@
 import discord
 from discord import app_commands
+from diagnostics import get_diagnostics
 
-@app_commands.command(name="ping", description="Check bot's latency and status")
+# Shards listed one per line in the embed; beyond that only the range is shown
+SHARDS_LISTED = 10
+
+def ms(seconds) -> str:
+    return "n/a" if seconds is None else f"{round(seconds * 1000)}ms"
+
+@app_commands.command(name="ping", description="Check bot's latency and status", extras={"category": "general"})
 async def ping(interaction: discord.Interaction):
-    bot_latency = round(interaction.client.latency * 1000)  # Convert to ms
-    websocket_latency = round(interaction.client.latency * 1000)
-    
-    if bot_latency < 100:
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    diagnostics = get_diagnostics()
+    rest_latency = await diagnostics.measure_rest(interaction.client)
+    shards = diagnostics.shard_latencies(interaction.client)
+    shard_id = interaction.guild.shard_id if interaction.guild else 0
+    heartbeat = shards.get(shard_id)
+    loop_lag = diagnostics.loop_lag.max
+    commands = diagnostics.command_percentiles()
+
+    # The slowest path decides the status
+    worst = max((value for value in (heartbeat, rest_latency) if value is not None), default=None)
+    if worst is None or rest_latency is None:
+        status_emoji = "🔴"
+        status_text = "Degraded"
+        color = discord.Color.red()
+    elif worst < 0.1 and (loop_lag or 0) < 0.05:
         status_emoji = "🟢"
         status_text = "Excellent"
         color = discord.Color.green()
-    elif bot_latency < 200:
+    elif worst < 0.2 and (loop_lag or 0) < 0.25:
         status_emoji = "🟡"
         status_text = "Good"
         color = discord.Color.orange()
@@ -18,32 +38,51 @@ async def ping(interaction: discord.Interaction):
         status_emoji = "🔴"
         status_text = "Slow"
         color = discord.Color.red()
-    
+
     embed = discord.Embed(
         title="<:pingpong:1427537352447754262> Pong!",
         description=f"{status_emoji} **Connection Status: {status_text}**",
         color=color
     )
-    
+
+    embed.add_field(
+        name="<:wifi:1427793462291464273> Heartbeat",
+        value=f"`{ms(heartbeat)}` (shard {shard_id})",
+        inline=True
+    )
+
+    embed.add_field(
+        name="<:globe:1427520126055350335> REST Round Trip",
+        value=f"`{ms(rest_latency)}`",
+        inline=True
+    )
+
     embed.add_field(
-        name="<:snow:1427793833604681779> Bot Latency",
-        value=f"`{bot_latency}ms`",
+        name="<:snow:1427793833604681779> Event Loop Lag",
+        value=f"`{ms(diagnostics.loop_lag.current)}` now, `{ms(loop_lag)}` max",
         inline=True
     )
-    
+
     embed.add_field(
-        name="<:wifi:1427793462291464273> WebSocket",
-        value=f"`{websocket_latency}ms`",
+        name="Command Latency",
+        value=f"p50 `{ms(commands['p50'])}`, p99 `{ms(commands['p99'])}`" if commands else "No commands yet",
         inline=True
     )
-    
+
+    if len(shards) > 1:
+        if len(shards) <= SHARDS_LISTED:
+            value = "\n".join(f"Shard {sid}: `{ms(latency)}`" for sid, latency in sorted(shards.items()))
+        else:
+            value = f"{len(shards)} shards, `{ms(min(shards.values()))}` to `{ms(max(shards.values()))}`"
+        embed.add_field(name="Shards", value=value, inline=False)
+
     embed.add_field(
         name="<:globe:1427520126055350335> Amethis Status",
         value="Online and responsive",
         inline=False
     )
-    
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    await interaction.edit_original_response(embed=embed)
 
 def setup(bot):
-    bot.tree.add_command(ping)
\ No newline at end of file
+    bot.tree.add_command(ping)
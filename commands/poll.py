@@ -1,171 +1,346 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import partial
 import discord
 from discord import app_commands
-from discord.ui import Button, View
-import asyncio
+from discord.ui import Button, View, DynamicItem
 from typing import Optional
-from datetime import datetime, timedelta
+from coalesce import Coalescer
+from scheduler import get_scheduler
+from outbound import Priority, get_outbound, channel_bucket
+from polls import Poll, get_poll_store
 
-class SimplePollView(View):
-    def __init__(self, question: str, options: list, duration_minutes: int, creator: discord.User):
-        super().__init__(timeout=None)  # Persistent view, we'll handle timeout manually
-        self.question = question
-        self.options = options
-        self.votes = [0] * len(options)
-        self.voters = set()  # Track who voted to prevent multiple votes
-        self.duration_minutes = duration_minutes
-        self.end_time = datetime.utcnow() + timedelta(minutes=duration_minutes)
-        self.creator = creator
-        self.message = None
-        
-        # Create buttons for each option
-        for i, option in enumerate(options):
-            button = Button(
-                label=f"{i+1}. {option}",
-                style=discord.ButtonStyle.primary,
-                custom_id=f"poll_{i}_{datetime.utcnow().timestamp()}"  # Unique ID to avoid conflicts
-            )
-            button.callback = self.create_callback(i, option)
-            self.add_item(button)
-    
-    def create_callback(self, index: int, option: str):
-        async def callback(interaction: discord.Interaction):
-            if interaction.user.id in self.voters:
-                await interaction.response.send_message("You've already voted in this poll!", ephemeral=True)
-                return
-            
-            # Record vote
-            self.votes[index] += 1
-            self.voters.add(interaction.user.id)
-            
-            # Update embed with new results
-            embed = self.create_results_embed()
-            await interaction.response.edit_message(embed=embed)
-            
-            await interaction.followup.send(f"✅ You voted for: **{option}**", ephemeral=True)
-        
-        return callback
-    
-    def create_results_embed(self):
-        total_votes = sum(self.votes)
-        
-        embed = discord.Embed(
-            title=f"📊 {self.question}",
-            color=discord.Color.purple()  # Purple color as requested
+log = logging.getLogger(__name__)
+
+# Minimum seconds between two edits of the public poll embed
+POLL_RENDER_INTERVAL = float(os.getenv("POLL_RENDER_INTERVAL") or 2)
+# Minimum seconds between two time-remaining refreshes of a poll
+POLL_REFRESH_INTERVAL = 30
+# Polls kept in memory; the others are loaded from the database on their next vote or timer
+POLL_CACHE_SIZE = int(os.getenv("POLL_CACHE_SIZE") or 1000)
+
+def format_time_remaining(total_seconds: int) -> str:
+    """Format remaining seconds the way the poll footer shows them"""
+    if total_seconds >= 3600:
+        hours = total_seconds // 3600
+        minutes = (total_seconds % 3600) // 60
+        if minutes > 0:
+            return f"{hours}h {minutes}m"
+        return f"{hours}h"
+    elif total_seconds >= 60:
+        minutes = total_seconds // 60
+        seconds = total_seconds % 60
+        if seconds > 0:
+            return f"{minutes}m {seconds}s"
+        return f"{minutes}m"
+    return f"{total_seconds}s"
+
+def seconds_until_text_change(total_seconds: int) -> int:
+    """Seconds until format_time_remaining() would show a different value"""
+    if total_seconds >= 3600:
+        # Minute granularity above one hour
+        return total_seconds % 60 + 1
+    return 1
+
+def create_progress_bar(percentage: float) -> str:
+    filled = int(percentage / 10)  # 10 characters max
+    bar = "█" * filled + "░" * (10 - filled)
+    return f"`{bar}`"
+
+def create_results_embed(poll: Poll, time_text: Optional[str] = None) -> discord.Embed:
+    total_votes = poll.total_votes
+
+    embed = discord.Embed(
+        title=f"📊 {poll.question}",
+        color=discord.Color.purple()  # Purple color as requested
+    )
+
+    for i, (option, votes) in enumerate(zip(poll.options, poll.votes)):
+        percentage = (votes / total_votes * 100) if total_votes > 0 else 0
+        bar = create_progress_bar(percentage)
+
+        embed.add_field(
+            name=f"{i+1}. {option}",
+            value=f"{bar} {votes} votes ({percentage:.1f}%)",
+            inline=False
         )
-        
-        for i, (option, votes) in enumerate(zip(self.options, self.votes)):
-            percentage = (votes / total_votes * 100) if total_votes > 0 else 0
-            bar = self.create_progress_bar(percentage)
-            
-            embed.add_field(
-                name=f"{i+1}. {option}",
-                value=f"{bar} {votes} votes ({percentage:.1f}%)",
-                inline=False
-            )
-        
-        # Calculate remaining time
-        remaining = self.end_time - datetime.utcnow()
-        total_seconds = max(0, int(remaining.total_seconds()))
-        
-        # Format remaining time dynamically
-        if total_seconds >= 3600:
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            if minutes > 0:
-                time_text = f"{hours}h {minutes}m"
-            else:
-                time_text = f"{hours}h"
-        elif total_seconds >= 60:
-            minutes = total_seconds // 60
-            seconds = total_seconds % 60
-            if seconds > 0:
-                time_text = f"{minutes}m {seconds}s"
-            else:
-                time_text = f"{minutes}m"
-        else:
-            time_text = f"{total_seconds}s"
-        
-        embed.set_footer(
-            text=f"Time remaining: {time_text} • Total votes: {total_votes} • Created by {self.creator.display_name}", 
-            icon_url=self.creator.display_avatar.url
+
+    if time_text is None:
+        time_text = format_time_remaining(poll.seconds_remaining())
+
+    embed.set_footer(
+        text=f"Time remaining: {time_text} • Total votes: {total_votes} • Created by {poll.creator_name}",
+        icon_url=poll.creator_avatar
+    )
+
+    return embed
+
+def create_final_embed(poll: Poll) -> discord.Embed:
+    total_votes = poll.total_votes
+
+    embed = discord.Embed(
+        title=f"📊 POLL ENDED: {poll.question}",
+        color=discord.Color.gold()
+    )
+
+    winner_index = None
+    if total_votes > 0:
+        winner_index = poll.votes.index(max(poll.votes))
+        winner_text = f"**Winner: {poll.options[winner_index]}** 🏆"
+        embed.add_field(name="Results", value=winner_text, inline=False)
+
+    for i, (option, votes) in enumerate(zip(poll.options, poll.votes)):
+        percentage = (votes / total_votes * 100) if total_votes > 0 else 0
+        bar = create_progress_bar(percentage)
+
+        winner_emoji = "🏆" if i == winner_index else ""
+
+        embed.add_field(
+            name=f"{winner_emoji} {i+1}. {option}",
+            value=f"{bar} {votes} votes ({percentage:.1f}%)",
+            inline=False
         )
-        
-        return embed
-    
-    def create_progress_bar(self, percentage: float) -> str:
-        filled = int(percentage / 10)  # 10 characters max
-        bar = "█" * filled + "░" * (10 - filled)
-        return f"`{bar}`"
-    
-    async def update_time_remaining(self):
-        """Update the poll embed every minute with remaining time"""
-        while True:
-            try:
-                # Check if poll has ended
-                remaining = self.end_time - datetime.utcnow()
-                if remaining.total_seconds() <= 0:
-                    await self.end_poll()
+
+    embed.set_footer(
+        text=f"Final results • Total votes: {total_votes} • Created by {poll.creator_name}",
+        icon_url=poll.creator_avatar
+    )
+    return embed
+
+class PollButton(DynamicItem[Button], template=r"amethis:poll:(?P<poll_id>[0-9]+):(?P<index>[0-9]+)"):
+    """Vote button with a stable custom_id, so clicks are still routed after a restart"""
+
+    def __init__(self, poll_id: int, index: int, label: Optional[str] = None, disabled: bool = False):
+        super().__init__(Button(
+            label=label,
+            style=discord.ButtonStyle.primary,
+            custom_id=f"amethis:poll:{poll_id}:{index}",
+            disabled=disabled
+        ))
+        self.poll_id = poll_id
+        self.index = index
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        return cls(int(match["poll_id"]), int(match["index"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        await poll_manager.vote(interaction, self.poll_id, self.index)
+
+class SimplePollView(View):
+    """Buttons of a poll message. Clicks are dispatched to PollButton, so the view itself is never stored."""
+
+    def __init__(self, poll: Poll, disabled: bool = False):
+        super().__init__(timeout=None)
+        for i, option in enumerate(poll.options):
+            self.add_item(PollButton(poll.poll_id, i, label=f"{i+1}. {option}", disabled=disabled))
+        self.stop()
+
+class LivePoll:
+    """A poll loaded in memory together with its render state"""
+
+    def __init__(self, manager: "PollManager", poll: Poll):
+        self.manager = manager
+        self.poll = poll
+        self.rendered_time_text = None
+        self.renderer = Coalescer(self.render, POLL_RENDER_INTERVAL)
+
+    async def render(self):
+        """Write the latest results to the poll message"""
+        poll = self.poll
+        if poll.ended or poll.message_id is None:
+            return
+
+        async def edit():
+            if poll.ended:
+                return None
+            time_text = format_time_remaining(poll.seconds_remaining())
+            await self.manager.get_message(poll).edit(embed=create_results_embed(poll, time_text))
+            return time_text
+
+        # Cosmetic work: it yields to replies and state writes, and a queued edit is merged with newer ones
+        time_text = await get_outbound().run(edit, Priority.COSMETIC, channel_bucket(poll.channel_id), key=("poll", poll.poll_id))
+        if time_text is not None:
+            self.rendered_time_text = time_text
+
+class PollManager:
+    """Loads polls on demand, records votes and owns the poll timers"""
+
+    def __init__(self):
+        self.client: Optional[discord.Client] = None
+        self._live = OrderedDict()  # poll_id -> LivePoll, least recently used first
+        self._loading = {}          # poll_id -> task loading it from the database
+        self._tasks = set()         # background tasks, kept alive until they finish
+
+    def spawn(self, coro) -> asyncio.Task:
+        """Run a coroutine in the background, logging its failure"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Poll background task failed", exc_info=task.exception())
+
+    def get_message(self, poll: Poll) -> discord.PartialMessage:
+        channel = self.client.get_partial_messageable(poll.channel_id, guild_id=poll.guild_id)
+        return channel.get_partial_message(poll.message_id)
+
+    async def get(self, poll_id: int) -> Optional[LivePoll]:
+        live = self._live.get(poll_id)
+        if live is not None:
+            self._live.move_to_end(poll_id)
+            return live
+
+        # Concurrent clicks on an evicted poll share one load
+        task = self._loading.get(poll_id)
+        if task is None:
+            task = self._loading[poll_id] = asyncio.ensure_future(get_poll_store().load(poll_id))
+            task.add_done_callback(lambda _: self._loading.pop(poll_id, None))
+        poll = await task
+        if poll is None:
+            return None
+
+        live = self._live.get(poll_id)
+        if live is None:
+            live = self._add(poll)
+        return live
+
+    def _add(self, poll: Poll) -> LivePoll:
+        live = self._live[poll.poll_id] = LivePoll(self, poll)
+        # Evict the least recently used idle polls; a poll with a pending render stays
+        while len(self._live) > POLL_CACHE_SIZE:
+            for poll_id, candidate in self._live.items():
+                if candidate is not live and not candidate.renderer.pending:
+                    del self._live[poll_id]
                     break
-                
-                # Update the embed with current time
-                embed = self.create_results_embed()
-                await self.message.edit(embed=embed)
-                
-                # Wait 30 seconds before next update
-                await asyncio.sleep(30)
-                
-            except Exception as e:
-                print(f"Error updating poll time: {e}")
+            else:
                 break
-    
-    async def end_poll(self):
+        return live
+
+    async def create(self, poll: Poll, rendered_time_text: str):
+        await get_poll_store().create(poll)
+        live = self._add(poll)
+        live.rendered_time_text = rendered_time_text
+        self.start_timers(poll.poll_id, poll.end_at)
+
+    async def vote(self, interaction: discord.Interaction, poll_id: int, index: int):
+        live = await self.get(poll_id)
+        if live is None or live.poll.ended:
+            await interaction.response.send_message("This poll has ended.", ephemeral=True)
+            return
+
+        poll = live.poll
+        user_id = interaction.user.id
+        if index >= len(poll.options):
+            # A forged or stale button; every interaction still needs a response
+            await interaction.response.send_message("That option is not part of this poll.", ephemeral=True)
+            return
+
+        # Clicking the current choice again retracts the vote, another option changes it
+        if poll.choice_of(user_id) == index:
+            poll.retract_vote(user_id)
+            await get_poll_store().retract_vote(poll_id, user_id)
+            message = f"↩️ Your vote for **{poll.options[index]}** was removed"
+        else:
+            previous = poll.set_vote(user_id, index)
+            await get_poll_store().record_vote(poll_id, user_id, index)
+            if previous is None:
+                message = f"✅ You voted for: **{poll.options[index]}**"
+            else:
+                message = f"🔄 You changed your vote to: **{poll.options[index]}**"
+
+        # Acknowledge right away; the public embed is refreshed by the coalescer
+        await interaction.response.send_message(message, ephemeral=True)
+        live.renderer.request()
+
+    def start_timers(self, poll_id: int, end_at: float):
+        """Register the poll's expiry and its staggered refresh slots with the shared scheduler"""
+        get_scheduler().schedule_at(("poll_end", poll_id), end_at, partial(self.end, poll_id))
+        # Random phase so polls created together do not refresh together
+        self.schedule_refresh(poll_id, end_at, POLL_REFRESH_INTERVAL + random.uniform(0, POLL_REFRESH_INTERVAL))
+
+    def schedule_refresh(self, poll_id: int, end_at: float, delay: float):
+        if time.time() + delay >= end_at:
+            return  # the expiry timer renders the final state
+        get_scheduler().schedule(("poll_refresh", poll_id), delay, partial(self.refresh, poll_id))
+
+    async def refresh(self, poll_id: int):
+        """Refresh the time remaining, skipping the edit if the shown value would not change"""
+        live = await self.get(poll_id)
+        if live is None or live.poll.ended:
+            return
+        remaining = live.poll.seconds_remaining()
+        if format_time_remaining(remaining) != live.rendered_time_text:
+            live.renderer.request()
+        self.schedule_refresh(poll_id, live.poll.end_at, max(POLL_REFRESH_INTERVAL, seconds_until_text_change(remaining)))
+
+    async def end(self, poll_id: int):
         """End the poll and show final results"""
-        # Disable all buttons
-        for item in self.children:
-            if isinstance(item, Button):
-                item.disabled = True
-        
-        # Create final results embed
-        final_embed = self.create_final_embed()
-        
+        live = await self.get(poll_id)
+        if live is None or live.poll.ended:
+            return
+        poll = live.poll
+        poll.ended = True
+        live.renderer.cancel()
+        scheduler = get_scheduler()
+        scheduler.cancel(("poll_end", poll_id))
+        scheduler.cancel(("poll_refresh", poll_id))
+
         try:
-            await self.message.edit(embed=final_embed, view=self)
-            await self.message.reply("🗳️ **This poll has ended!**")
+            message = self.get_message(poll)
+            outbound = get_outbound()
+            bucket = channel_bucket(poll.channel_id)
+            await outbound.run(partial(message.edit, embed=create_final_embed(poll), view=SimplePollView(poll, disabled=True)), Priority.STATE, bucket)
+            await outbound.run(partial(message.reply, "🗳️ **This poll has ended!**"), Priority.STATE, bucket)
         except discord.NotFound:
             pass  # Message was deleted
-    
-    def create_final_embed(self):
-        total_votes = sum(self.votes)
-        
-        embed = discord.Embed(
-            title=f"📊 POLL ENDED: {self.question}",
-            color=discord.Color.gold()
-        )
-        
-        if total_votes > 0:
-            winner_index = self.votes.index(max(self.votes))
-            winner_text = f"**Winner: {self.options[winner_index]}** 🏆"
-            embed.add_field(name="Results", value=winner_text, inline=False)
-        
-        for i, (option, votes) in enumerate(zip(self.options, self.votes)):
-            percentage = (votes / total_votes * 100) if total_votes > 0 else 0
-            bar = self.create_progress_bar(percentage)
-            
-            winner_emoji = "🏆" if i == winner_index else ""
-            
-            embed.add_field(
-                name=f"{winner_emoji} {i+1}. {option}",
-                value=f"{bar} {votes} votes ({percentage:.1f}%)",
-                inline=False
-            )
-        
-        embed.set_footer(
-            text=f"Final results • Total votes: {total_votes} • Created by {self.creator.display_name}", 
-            icon_url=self.creator.display_avatar.url
-        )
-        return embed
+        finally:
+            await get_poll_store().delete(poll_id)
+            self._live.pop(poll_id, None)
+
+    async def restore(self, owns_guild=None):
+        """Re-arm the timers of polls stored before a restart and close the overdue ones.
 
-@app_commands.command(name="poll", description="Create a simple poll with up to 5 options")
+        owns_guild limits this to the polls whose guild is served by this process.
+        """
+        started = time.perf_counter()
+        rows = await get_poll_store().load_open()
+        now = time.time()
+        restored = 0
+        overdue = []
+        for poll_id, guild_id, end_at in rows:
+            if owns_guild is not None and not owns_guild(guild_id):
+                continue
+            if end_at <= now:
+                overdue.append(poll_id)
+            else:
+                self.start_timers(poll_id, end_at)
+                restored += 1
+
+        if overdue:
+            self.spawn(self._close_overdue(overdue))
+        print(f"Restored {restored} open poll(s), closing {len(overdue)} overdue ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    async def _close_overdue(self, poll_ids: list):
+        await self.client.wait_until_ready()
+        for poll_id in poll_ids:
+            try:
+                await self.end(poll_id)
+            except Exception:
+                log.exception("Failed to close overdue poll %s", poll_id)
+
+# Set when this module is hot reloaded; the new manager then re-arms the poll timers
+_reloaded = "poll_manager" in globals()
+poll_manager = PollManager()
+
+@app_commands.command(name="poll", description="Create a simple poll with up to 5 options", extras={"category": "general"})
 @app_commands.describe(
     question="The poll question",
     option1="First option",
@@ -186,78 +361,71 @@ async def poll(
     duration: Optional[int] = 30
 ):
     """Simple poll command with duration input and dynamic time display"""
-    
+
     # Validate duration
     if duration < 1 or duration > 1440:  # Max 24 hours
         await interaction.response.send_message("❌ Duration must be between 1 and 1440 minutes (24 hours)!", ephemeral=True)
         return
-    
+
     # Collect options
     options = [option1, option2]
     if option3: options.append(option3)
     if option4: options.append(option4)
     if option5: options.append(option5)
-    
+
     # Validate options
     if len(options) < 2:
         await interaction.response.send_message("❌ You need at least 2 options for a poll!", ephemeral=True)
         return
-    
+
     if len(options) > 5:
         await interaction.response.send_message("❌ Maximum 5 options allowed!", ephemeral=True)
         return
-    
+
     # Create initial embed
     initial_embed = discord.Embed(
         title=f"📊 {question}",
-        description="Click the buttons below to vote!",
+        description="Click the buttons below to vote! Click your choice again to remove your vote.",
         color=discord.Color.purple()  # Purple color
     )
-    
+
     initial_embed.add_field(
-        name="Options", 
-        value="\n".join([f"{i+1}. {opt}" for i, opt in enumerate(options)]), 
+        name="Options",
+        value="\n".join([f"{i+1}. {opt}" for i, opt in enumerate(options)]),
         inline=False
     )
-    
-    # Calculate initial time remaining
-    end_time = datetime.utcnow() + timedelta(minutes=duration)
-    remaining = end_time - datetime.utcnow()
-    total_seconds = int(remaining.total_seconds())
-    
-    if total_seconds >= 3600:
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        time_text = f"{hours}h {minutes}m"
-    elif total_seconds >= 60:
-        minutes = total_seconds // 60
-        time_text = f"{minutes}m"
-    else:
-        time_text = f"{total_seconds}s"
-    
+
+    time_text = format_time_remaining(duration * 60)
+
     initial_embed.set_footer(
-        text=f"Time remaining: {time_text} • Total votes: 0 • Created by {interaction.user.display_name}", 
+        text=f"Time remaining: {time_text} • Total votes: 0 • Created by {interaction.user.display_name}",
         icon_url=interaction.user.display_avatar.url
     )
-    
-    # Create and send poll
-    view = SimplePollView(question, options, duration, interaction.user)
-    
-    await interaction.response.send_message(embed=initial_embed, view=view)
-    
-    # Store reference to the message in the view
+
+    # The interaction ID is unique and known before sending, so it doubles as the poll ID
+    new_poll = Poll(
+        poll_id=interaction.id,
+        question=question,
+        options=options,
+        end_at=time.time() + duration * 60,
+        creator_id=interaction.user.id,
+        creator_name=interaction.user.display_name,
+        creator_avatar=interaction.user.display_avatar.url,
+        guild_id=interaction.guild_id,
+        channel_id=interaction.channel_id
+    )
+
+    await interaction.response.send_message(embed=initial_embed, view=SimplePollView(new_poll))
+
+    # Persist the poll with its message so it survives restarts
     message = await interaction.original_response()
-    view.message = message
-    
-    # Start the time update task
-    asyncio.create_task(view.update_time_remaining())
-    
-    # Start the auto-end task
-    async def auto_end_poll():
-        await asyncio.sleep(duration * 60)  # Wait for the duration
-        await view.end_poll()
-    
-    asyncio.create_task(auto_end_poll())
+    new_poll.message_id = message.id
+    await poll_manager.create(new_poll, rendered_time_text=time_text)
 
 def setup(bot):
-    bot.tree.add_command(poll)
\ No newline at end of file
+    poll_manager.client = bot
+    bot.add_dynamic_items(PollButton)
+    bot.tree.add_command(poll)
+    if _reloaded:
+        owns_guild = getattr(bot, "owns_guild", None)
+        poll_manager.spawn(poll_manager.restore(owns_guild))
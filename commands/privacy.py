@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
+from static_responses import StaticResponse
 
-@app_commands.command(name="privacy", description="View our privacy policy")
-async def privacy(interaction: discord.Interaction):
+def build_privacy_embed() -> discord.Embed:
     embed = discord.Embed(
         title="<:shield:1427515556113809479> Privacy Policy",
         description="**Your privacy is important to us**",
@@ -17,7 +17,14 @@ async def privacy(interaction: discord.Interaction):
     
     embed.set_footer(text="We value your privacy and security")
     
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    return embed
+
+# Built once when the module loads
+PRIVACY = StaticResponse(build_privacy_embed())
+
+@app_commands.command(name="privacy", description="View our privacy policy", extras={"category": "legal"})
+async def privacy(interaction: discord.Interaction):
+    await PRIVACY.send(interaction)
 
 def setup(bot):
     bot.tree.add_command(privacy)
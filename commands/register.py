@@ -1,286 +1,456 @@
-import re
+import time
+import asyncio
+import logging
+from functools import partial
 import discord
 from discord import app_commands
-from discord.ui import View
-from utils import get_data_category
-
-# Helper to find registration embed message
-async def _find_registration_message(guild: discord.Guild) -> discord.Message | None:
-    category = await get_data_category(guild)
-    reg_channel = discord.utils.get(category.text_channels, name="registration-data")
-    if not reg_channel:
-        return None
+from discord.ui import View, Modal, TextInput, Select, Button, DynamicItem
+from dataclasses import dataclass, field
+from typing import Optional, List
+from registration import (
+    Question, RegistrationConfig, RegistrationRequest,
+    get_registration_config, get_registration_store, questions_hash, build_registration_plan
+)
+from router import ConversationRouter
+from cleanup import get_cleanup
+from outbound import Priority, get_outbound, channel_bucket
 
-    async for msg in reg_channel.history(limit=500):
-        if not msg.embeds:
-            continue
-        title = (msg.embeds[0].title or "").strip()
-        if "REGISTRATION SYSTEM" in title.upper():
-            return msg
-    return None
-
-def _parse_questions_field(value: str) -> list:
-    if not value:
-        return []
-    blocks = [b.strip() for b in value.split("\n\n") if b.strip()]
-    questions = []
-    q_re = re.compile(r"^Q\s*\d+\s*:\s*(.*)$", re.IGNORECASE)
-    for block in blocks:
-        lines = [l.strip() for l in block.splitlines() if l.strip()]
-        if not lines:
-            continue
-        m = q_re.match(lines[0])
-        if not m:
+log = logging.getLogger(__name__)
+
+# Discord allows five text inputs per modal and five rows per message;
+# select pages keep the last row for the navigation buttons
+TEXT_QUESTIONS_PER_MODAL = 5
+SELECT_QUESTIONS_PER_PAGE = 4
+SELECT_OPTIONS_LIMIT = 25
+# Idle seconds before a registration session expires
+SESSION_TIMEOUT = 600
+
+def uses_select(q: Question) -> bool:
+    return q.is_option and bool(q.options)
+
+def build_pages(questions: List[Question]) -> List[List[int]]:
+    """Group question indexes into pages: runs of text questions share a modal, option questions a select page"""
+    pages = []
+    for i, q in enumerate(questions):
+        limit = SELECT_QUESTIONS_PER_PAGE if uses_select(q) else TEXT_QUESTIONS_PER_MODAL
+        if pages and uses_select(questions[pages[-1][0]]) == uses_select(q) and len(pages[-1]) < limit:
+            pages[-1].append(i)
+        else:
+            pages.append([i])
+    return pages
+
+@dataclass
+class ApplyResult:
+    nick: Optional[str] = None  # nickname that was set
+    added_roles: List[discord.Role] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)  # parts of the plan that could not be applied
+
+async def apply_registration(member: discord.Member, questions: List[Question], answers: dict) -> ApplyResult:
+    """Apply the nickname and roles from the answers with a single member edit.
+
+    Parts the bot has no permission for are left out of the edit and reported
+    as warnings instead of failing the whole update.
+    """
+    plan = build_registration_plan(questions, answers)
+    result = ApplyResult()
+    guild = member.guild
+    me = guild.me
+    kwargs = {}
+
+    if plan.nick is not None and plan.nick != member.nick:
+        if not me.guild_permissions.manage_nicknames or member.id == guild.owner_id or member.top_role >= me.top_role:
+            result.warnings.append("⚠️ Cannot change the nickname (owner or permission issue).")
+        else:
+            kwargs["nick"] = plan.nick
+
+    roles = []
+    for role_id in plan.role_ids:
+        role = guild.get_role(role_id)
+        if role is None:
+            result.warnings.append(f"⚠️ A registration role no longer exists (ID {role_id}).")
+        elif role in member.roles:
             continue
-        question_text = m.group(1).strip()
-        typ = None
-        action = None
-        options = []
-        for ln in lines[1:]:
-            if ln.lower().startswith("• type:"):
-                typ = ln.split(":",1)[1].strip()
-            elif ln.lower().startswith("• action:"):
-                action = ln.split(":",1)[1].strip()
-            elif ln.lower().startswith("• options:"):
-                opts_raw = ln.split(":",1)[1].strip()
-                for optpair in re.split(r'\s*;\s*|\s*,\s*', opts_raw):
-                    if "->" in optpair:
-                        left, right = optpair.split("->",1)
-                        options.append((left.strip(), right.strip()))
-        questions.append({
-            "question": question_text,
-            "type": typ or "Text",
-            "action": action or "",
-            "options": options
-        })
-    return questions
-
-class AcceptDenyView(View):
-    def __init__(self, user: discord.Member, answers: dict, questions: list, mode: str, thread: discord.Thread | None):
-        super().__init__(timeout=None)
-        self.user = user
-        self.answers = answers
-        self.questions = questions
-        self.mode = mode
-        self.thread = thread
-
-    @discord.ui.button(label="Accept", style=discord.ButtonStyle.green)
-    async def accept(self, interaction: discord.Interaction, button: discord.ui.Button):
-        for q, ans in zip(self.questions, self.answers.values()):
-            if q['type'].lower() == "text" and q['action'] == "Nick Changer":
-                try:
-                    await self.user.edit(nick=ans)
-                except discord.Forbidden:
-                    await self.user.send("⚠️ Cannot change your nickname (owner or permission issue).")
-            elif q['type'].lower() == "option" and q['action'] == "Role Adder":
-                for opt_text, role_repr in q['options']:
-                    if opt_text.lower() == ans.lower():
-                        m = re.match(r"<@&(\d+)>", role_repr)
-                        if m:
-                            role_id = int(m.group(1))
-                            role = interaction.guild.get_role(role_id)
-                            if role:
-                                await self.user.add_roles(role)
-        await interaction.message.edit(content=f"✅ Registration accepted by {interaction.user.mention}", view=None)
+        elif not me.guild_permissions.manage_roles or role >= me.top_role or role.managed:
+            result.warnings.append(f"⚠️ Cannot give the {role.name} role (permission issue).")
+        else:
+            roles.append(role)
+    if roles:
+        kwargs["roles"] = member.roles[1:] + roles  # without @everyone
+
+    if not kwargs:
+        return result
+    try:
+        await member.edit(**kwargs, reason="Registration")
+    except discord.Forbidden:
+        result.warnings.append("⚠️ Cannot update the nickname or roles (permission issue).")
+        return result
+    result.nick = kwargs.get("nick")
+    result.added_roles = roles
+    return result
+
+class RequestButton(DynamicItem[Button], template=r"amethis:registration:(?P<action>accept|deny)"):
+    """Accept/Deny on a manual registration request. The request is stored by message ID, so the buttons survive restarts."""
+
+    STYLES = {
+        "accept": ("Accept", discord.ButtonStyle.green),
+        "deny": ("Deny", discord.ButtonStyle.red),
+    }
+
+    def __init__(self, action: str):
+        label, style = self.STYLES[action]
+        super().__init__(Button(label=label, style=style, custom_id=f"amethis:registration:{action}"))
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        return cls(match["action"])
+
+    async def callback(self, interaction: discord.Interaction):
+        store = get_registration_store()
+        request = await store.take_request(interaction.message.id)
+        if request is None:
+            await interaction.response.send_message("⚠️ This registration request was already handled or is no longer available.", ephemeral=True)
+            return
+        try:
+            await interaction.response.defer()
+            if self.action == "accept":
+                await self.accept(interaction, request)
+            else:
+                await self.deny(interaction, request)
+        except Exception:
+            # Taking the request only reserved it; put it back so a manager can retry
+            await store.save_request(request)
+            if interaction.response.is_done():
+                await interaction.followup.send("⚠️ Could not handle this registration request, please try again.", ephemeral=True)
+            raise
+
+    async def accept(self, interaction: discord.Interaction, request: RegistrationRequest):
+        # The edit replaces the whole role list, so it starts from the member's current roles,
+        # which the member cache cannot be trusted with without the members intent
         try:
-            await self.user.send(f"✅ Your registration for **{interaction.guild.name}** has been accepted! You are now registered.")
+            member = await interaction.guild.fetch_member(request.user_id)
+        except discord.NotFound:
+            await interaction.edit_original_response(content=f"⚠️ <@{request.user_id}> is no longer in the server.", view=None)
+            return
+
+        result = await apply_registration(member, request.questions, request.answers)
+        content = f"✅ Registration accepted by {interaction.user.mention}"
+        if result.warnings:
+            content += "\n" + "\n".join(result.warnings)
+        await interaction.edit_original_response(content=content, view=None)
+        try:
+            for warning in result.warnings:
+                await member.send(warning)
+            await member.send(f"✅ Your registration for **{interaction.guild.name}** has been accepted! You are now registered.")
         except:
             pass
-        # Delete the thread if it exists
-        if self.thread:
-            try: await self.thread.delete()
-            except: pass
-
-    @discord.ui.button(label="Deny", style=discord.ButtonStyle.red)
-    async def deny(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.message.edit(content=f"❌ Registration denied by {interaction.user.mention}\nThis message will be deleted in 30 seconds.", view=None)
+
+    async def deny(self, interaction: discord.Interaction, request: RegistrationRequest):
+        await interaction.edit_original_response(content=f"❌ Registration denied by {interaction.user.mention}\nThis message will be deleted in 30 seconds.", view=None)
         try:
-            await self.user.send(f"❌ Your registration for **{interaction.guild.name}** has been denied by the Administration. You may try again.")
+            user = interaction.client.get_user(request.user_id) or await interaction.client.fetch_user(request.user_id)
+            await user.send(f"❌ Your registration for **{interaction.guild.name}** has been denied by the Administration. You may try again.")
         except:
             pass
-        # Schedule deletion of the denied message after 30 seconds
-        await interaction.message.delete(delay=30)
-        # Delete the thread if it exists
-        if self.thread:
-            try: await self.thread.delete()
-            except: pass
-
-@app_commands.command(name="register", description="Register yourself via the Registration System")
-@app_commands.choices(mode=[
-    app_commands.Choice(name="Via Direct Message", value="dm"),
-    app_commands.Choice(name="Via Text Channel", value="channel")
-])
+        # Denied requests in the same channel are removed together with one bulk delete
+        get_cleanup().delete(interaction.message, delay=30)
+
+def request_view() -> View:
+    view = View(timeout=None)
+    view.add_item(RequestButton("accept"))
+    view.add_item(RequestButton("deny"))
+    view.stop()
+    return view
+
+class RegistrationSession:
+    """Answers and current page of one user's registration"""
+
+    def __init__(self, member: discord.Member, config: RegistrationConfig):
+        self.member = member
+        self.config = config
+        self.questions = config.questions
+        self.pages = build_pages(self.questions)
+        self.questions_hash = questions_hash(self.questions)
+        self.answers = {}  # question index -> answer
+        self.page = 0
+
+    @property
+    def key(self) -> tuple:
+        return (self.member.guild.id, self.member.id)
+
+    async def save(self):
+        await get_registration_store().save_session(*self.key, self.page, self.answers, self.questions_hash)
+
+    async def on_timeout(self):
+        await get_registration_store().delete_session(*self.key)
+
+    def page_title(self) -> str:
+        return f"Registration ({self.page + 1}/{len(self.pages)})"
+
+    def page_is_modal(self) -> bool:
+        return not uses_select(self.questions[self.pages[self.page][0]])
+
+    def page_view(self, *actions: str) -> View:
+        """Buttons and selects of the current page. They are routed by custom_id, so the view is not stored."""
+        view = View(timeout=None)
+        if not self.page_is_modal():
+            for row, idx in enumerate(self.pages[self.page]):
+                view.add_item(AnswerSelect.for_question(idx, self.questions[idx], self.answers.get(idx), row))
+        view.add_item(RegistrationButton("back", disabled=self.page == 0))
+        for action in actions:
+            view.add_item(RegistrationButton(action))
+        view.stop()
+        return view
+
+    async def respond(self, interaction: discord.Interaction, content: str, view: Optional[View]):
+        # Component and modal interactions from our page message update it in place
+        if interaction.message is not None:
+            await interaction.response.edit_message(content=content, view=view)
+        else:
+            await interaction.response.send_message(content, view=view, ephemeral=True)
+
+    async def show(self, interaction: discord.Interaction):
+        """Show the current page in response to an interaction"""
+        if self.page >= len(self.pages):
+            await self.finish(interaction)
+        elif not self.page_is_modal():
+            await self.respond(interaction, f"**{self.page_title()}**\nChoose your answers, then press Next.", self.page_view("next"))
+        elif interaction.type == discord.InteractionType.modal_submit:
+            # A modal cannot be opened in response to another modal
+            await self.respond(interaction, f"**{self.page_title()}**\nPress Continue for the next questions.", self.page_view("continue"))
+        else:
+            await interaction.response.send_modal(RegistrationModal(self))
+
+    async def go(self, interaction: discord.Interaction, step: int):
+        self.page = max(0, self.page + step)
+        if self.page < len(self.pages):
+            await self.save()
+        await self.show(interaction)
+
+    async def next(self, interaction: discord.Interaction):
+        missing = [idx for idx in self.pages[self.page] if idx not in self.answers]
+        if missing:
+            await interaction.response.send_message("⚠️ Please answer every question on this page first.", ephemeral=True)
+            return
+        await self.go(interaction, 1)
+
+    async def finish(self, interaction: discord.Interaction):
+        registrations.end(self.key)
+        await get_registration_store().delete_session(*self.key)
+        if interaction.message is not None:
+            await interaction.response.defer()
+        else:
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
+        guild = self.member.guild
+        if self.config.is_automatic:
+            # self.member is from when the session started; roles granted since then must be kept
+            member = interaction.user if isinstance(interaction.user, discord.Member) else await guild.fetch_member(self.member.id)
+            result = await apply_registration(member, self.questions, self.answers)
+            content = "\n".join(result.warnings + [f"✅ You are now registered for **{guild.name}**! Welcome aboard."])
+        else:
+            man_channel = guild.get_channel(self.config.management_channel_id)
+            if not man_channel:
+                await interaction.edit_original_response(content="⚠️ Management channel not found. Contact admins.", view=None)
+                return
+
+            desc_lines = []
+            for idx, q in enumerate(self.questions):
+                desc_lines.append(f"**Q{idx+1}: {q.question}**\n> {self.answers.get(idx, '')}")
+            man_embed = discord.Embed(
+                title=f"Registration Request: {self.member}",
+                description="\n".join(desc_lines),
+                color=discord.Color.purple()
+            )
+            man_embed.set_author(name=str(self.member), icon_url=self.member.display_avatar.url)
+            man_embed.set_footer(text=f"User ID: {self.member.id} | Accept or Deny below")
+
+            message = await get_outbound().run(partial(man_channel.send, embed=man_embed, view=request_view()), Priority.STATE, channel_bucket(man_channel.id))
+            await get_registration_store().save_request(RegistrationRequest(
+                message_id=message.id,
+                guild_id=guild.id,
+                channel_id=man_channel.id,
+                user_id=self.member.id,
+                questions=self.questions,
+                answers=self.answers,
+                created_at=time.time()
+            ))
+            content = "✅ Your registration was sent to the staff for review. You will get a DM when it is handled."
+
+        await interaction.edit_original_response(content=content, view=None)
+
+# Active registrations keyed by (guild_id, user_id), expiring after SESSION_TIMEOUT idle seconds
+registrations = ConversationRouter("registration", SESSION_TIMEOUT)
+
+async def resume_session(member: discord.Member) -> Optional[RegistrationSession]:
+    """Restore a session saved before a restart, unless it went idle or the questions changed"""
+    store = get_registration_store()
+    saved = await store.load_session(member.guild.id, member.id)
+    if saved is None:
+        return None
+    config = await get_registration_config(member.guild)
+    if config is None or time.time() - saved.updated_at > SESSION_TIMEOUT or saved.questions_hash != questions_hash(config.questions):
+        await store.delete_session(member.guild.id, member.id)
+        return None
+
+    session = RegistrationSession(member, config)
+    session.answers = saved.answers
+    session.page = min(saved.page, len(session.pages) - 1)
+    return registrations.start(session.key, session)
+
+async def route_session(interaction: discord.Interaction) -> Optional[RegistrationSession]:
+    session = registrations.route((interaction.guild_id, interaction.user.id))
+    if session is None:
+        session = await resume_session(interaction.user)
+    if session is None:
+        await interaction.response.send_message("⏱️ This registration has expired. Please run /register again.", ephemeral=True)
+    return session
+
+class RegistrationModal(Modal):
+    """Up to five text questions of one page"""
+
+    def __init__(self, session: RegistrationSession):
+        super().__init__(title=session.page_title(), timeout=SESSION_TIMEOUT)
+        self.page = session.page
+        self.inputs = {}
+        for idx in session.pages[session.page]:
+            q = session.questions[idx]
+            text_input = TextInput(
+                # Labels are limited to 45 characters, the placeholder shows the rest
+                label=q.question if len(q.question) <= 45 else q.question[:44] + "…",
+                placeholder=q.question[:100] if len(q.question) > 45 else None,
+                default=session.answers.get(idx),
+                max_length=32 if q.changes_nick else 1024,
+                style=discord.TextStyle.short if q.changes_nick else discord.TextStyle.paragraph
+            )
+            self.inputs[idx] = text_input
+            self.add_item(text_input)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        session = await route_session(interaction)
+        if session is None:
+            return
+        for idx, text_input in self.inputs.items():
+            session.answers[idx] = text_input.value.strip()
+        session.page = self.page
+        await session.go(interaction, 1)
+
+class RegistrationButton(DynamicItem[Button], template=r"amethis:register:(?P<action>back|next|continue)"):
+    """Page navigation; the session is looked up from the user who clicked"""
+
+    STYLES = {
+        "back": ("Back", discord.ButtonStyle.secondary),
+        "next": ("Next", discord.ButtonStyle.primary),
+        "continue": ("Continue", discord.ButtonStyle.primary),
+    }
+
+    def __init__(self, action: str, disabled: bool = False):
+        label, style = self.STYLES[action]
+        super().__init__(Button(label=label, style=style, custom_id=f"amethis:register:{action}", disabled=disabled, row=4))
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match):
+        return cls(match["action"])
+
+    async def callback(self, interaction: discord.Interaction):
+        session = await route_session(interaction)
+        if session is None:
+            return
+        if self.action == "back":
+            await session.go(interaction, -1)
+        elif self.action == "next":
+            await session.next(interaction)
+        else:
+            await session.show(interaction)
+
+class AnswerSelect(DynamicItem[Select], template=r"amethis:register:answer:(?P<index>[0-9]+)"):
+    """Answer to one option question"""
+
+    def __init__(self, index: int, item: Select):
+        super().__init__(item)
+        self.index = index
+
+    @classmethod
+    def for_question(cls, index: int, q: Question, answer: Optional[str], row: int) -> "AnswerSelect":
+        return cls(index, Select(
+            custom_id=f"amethis:register:answer:{index}",
+            placeholder=q.question[:150],
+            options=[
+                discord.SelectOption(label=opt[:100], value=str(i), default=opt == answer)
+                for i, (opt, _) in enumerate(q.options[:SELECT_OPTIONS_LIMIT])
+            ],
+            row=row
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Select, match):
+        return cls(int(match["index"]), item)
+
+    async def callback(self, interaction: discord.Interaction):
+        session = await route_session(interaction)
+        if session is None:
+            return
+        q = session.questions[self.index]
+        session.answers[self.index] = q.options[int(self.item.values[0])][0]
+        await interaction.response.defer()
+        await session.save()
+
+@app_commands.command(name="register", description="Register yourself via the Registration System", extras={"category": "general"})
 @app_commands.guild_only()
-async def register(interaction: discord.Interaction, mode: app_commands.Choice[str]):
+async def register(interaction: discord.Interaction):
     guild = interaction.guild
-    reg_msg = await _find_registration_message(guild)
-    if not reg_msg:
+    config = await get_registration_config(guild)
+    if config is None:
         await interaction.response.send_message(
             "⚠️ Registration system not set up yet. Please contact admins.",
             ephemeral=True
         )
         return
 
-    embed = reg_msg.embeds[0]
-    reg_channel_mention = None
-    man_channel_mention = None
-    reg_mode = None
-    questions_field = None
-    for f in embed.fields:
-        if f.name.lower().startswith("registration channel"):
-            reg_channel_mention = f.value.strip()
-        elif f.name.lower().startswith("management channel"):
-            man_channel_mention = f.value.strip()
-        elif f.name.lower().startswith("mode"):
-            reg_mode = f.value.strip()
-        elif f.name.lower().startswith("questions"):
-            questions_field = f.value
-
-    # Extract IDs
-    try:
-        reg_channel_id = int(re.match(r"<#(\d+)>", reg_channel_mention).group(1))
-        man_channel_id = int(re.match(r"<#(\d+)>", man_channel_mention).group(1))
-    except:
+    reg_channel_id = config.registration_channel_id
+    man_channel_id = config.management_channel_id
+    if reg_channel_id is None or man_channel_id is None:
         await interaction.response.send_message(
             "⚠️ Registration or Management channel in embed is invalid. Contact admins.",
             ephemeral=True
         )
         return
 
-    if interaction.channel.id != reg_channel_id and mode.value != "dm":
+    if interaction.channel.id != reg_channel_id:
         await interaction.response.send_message(
-            f"❌ You can only use this command in the registration channel: {reg_channel_mention}",
+            f"❌ You can only use this command in the registration channel: <#{reg_channel_id}>",
             ephemeral=True
         )
         return
 
-    questions = _parse_questions_field(questions_field)
-    if not questions:
+    if not config.questions:
         await interaction.response.send_message("ℹ️ No questions set up yet. Contact server admins.", ephemeral=True)
         return
 
-    # Determine target channel / thread
-    if mode.value == "dm":
-        try:
-            target_channel = await interaction.user.create_dm()
-        except:
-            await interaction.response.send_message(
-                "❌ I cannot send you DMs. Please use /register Via Text Channel.",
-                ephemeral=True
-            )
-            return
-    else:
-        # Create a private thread in registration channel
-        reg_channel = guild.get_channel(reg_channel_id)
-        thread = await reg_channel.create_thread(
-            name=f"registration-{interaction.user.name}",
-            type=discord.ChannelType.private_thread,
-            auto_archive_duration=60,
-            invitable=False
-        )
-        target_channel = thread
-        # Auto-tag the user at the start
-        await thread.send(f"{interaction.user.mention}, your registration thread has been created. Please answer the questions below.")
-    
-    await interaction.response.send_message(
-        "✅ Starting registration... Use 'back' to go to previous question if needed.",
-        ephemeral=True
-    )
-
-    answers = {}
-    current_index = 0
-
-    while current_index < len(questions):
-        q = questions[current_index]
-        content_lines = [f"**Question {current_index+1}/{len(questions)}**: {q['question']}"]
-        if q['type'].lower() == "option" and q['options']:
-            options_text = "\n".join(f"- {opt}" for opt,_ in q['options'])
-            content_lines.append(f"Options:\n{options_text}")
-        content_lines.append("\nType your answer below. To go back, type `back`.")
-
-        msg_question = await target_channel.send("\n".join(content_lines))
+    # Continue an unfinished registration, including one started before a restart
+    key = (guild.id, interaction.user.id)
+    session = registrations.route(key) or await resume_session(interaction.user)
+    if session is None or session.questions_hash != questions_hash(config.questions):
+        session = registrations.start(key, RegistrationSession(interaction.user, config))
+        await session.save()
 
-        try:
-            msg = await interaction.client.wait_for(
-                "message",
-                check=lambda m: m.author.id == interaction.user.id and m.channel == target_channel,
-                timeout=300
-            )
-        except:
-            await target_channel.send("⏱️ Registration timed out. Please run /register again.", delete_after=30)
-            if mode.value == "channel":
-                try: await target_channel.delete()
-                except: pass
-            return
-
-        # Delete user answer & question to keep thread clean
-        try: await msg.delete()
-        except: pass
-        try: await msg_question.delete()
-        except: pass
-
-        if msg.content.lower() == "back":
-            if current_index > 0:
-                current_index -= 1
-            else:
-                await target_channel.send("⚠️ Already at the first question.", delete_after=10)
-            continue
+    # Every page is a modal or an ephemeral message, so no channel messages are sent or read
+    await session.show(interaction)
 
-        # Validate option input
-        if q['type'].lower() == "option" and q['options']:
-            valid_options = [opt.lower() for opt,_ in q['options']]
-            if msg.content.strip().lower() not in valid_options:
-                await target_channel.send(
-                    f"❌ Invalid option. Choose one of:\n" + "\n".join(valid_options),
-                    delete_after=10
-                )
-                continue
-
-        answers[current_index] = msg.content.strip()
-        current_index += 1
-
-    # Apply registration
-    if reg_mode.lower() == "automatic":
-        for idx, q in enumerate(questions):
-            ans = answers.get(idx)
-            if q['type'].lower() == "text" and q['action'] == "Nick Changer":
-                try:
-                    await interaction.user.edit(nick=ans)
-                except discord.Forbidden:
-                    await interaction.user.send("⚠️ Cannot change your nickname (owner or permission issue).")
-            elif q['type'].lower() == "option" and q['action'] == "Role Adder":
-                for opt_text, role_repr in q['options']:
-                    if opt_text.lower() == ans.lower():
-                        m = re.match(r"<@&(\d+)>", role_repr)
-                        if m:
-                            role_id = int(m.group(1))
-                            role = guild.get_role(role_id)
-                            if role:
-                                await interaction.user.add_roles(role)
-        await target_channel.send(f"✅ You are now registered for **{guild.name}**! Welcome aboard.")
-    else:  # Manual mode
-        man_channel = guild.get_channel(man_channel_id)
-        if not man_channel:
-            await target_channel.send("⚠️ Management channel not found. Contact admins.", delete_after=30)
-            if mode.value == "channel":
-                try: await target_channel.delete()
-                except: pass
-            return
-
-        desc_lines = []
-        for idx, q in enumerate(questions):
-            desc_lines.append(f"**Q{idx+1}: {q['question']}**\n> {answers[idx]}")
-        man_embed = discord.Embed(
-            title=f"Registration Request: {interaction.user}",
-            description="\n".join(desc_lines),
-            color=discord.Color.purple()
-        )
-        man_embed.set_author(name=str(interaction.user), icon_url=interaction.user.display_avatar.url)
-        man_embed.set_footer(text=f"User ID: {interaction.user.id} | Accept or Deny below")
+# Background tasks, kept alive until they finish
+_tasks = set()
 
-        view = AcceptDenyView(user=interaction.user, answers=answers, questions=questions, mode=reg_mode, thread=(target_channel if mode.value == "channel" else None))
-        await man_channel.send(embed=man_embed, view=view)
+def _task_done(task: asyncio.Task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.error("Registration background task failed", exc_info=task.exception())
 
 def setup(bot):
+    bot.add_dynamic_items(RegistrationButton, AnswerSelect, RequestButton)
+    # Sessions left idle across a restart can no longer be resumed
+    task = asyncio.get_running_loop().create_task(get_registration_store().delete_sessions_before(time.time() - SESSION_TIMEOUT))
+    _tasks.add(task)
+    task.add_done_callback(_task_done)
     bot.tree.add_command(register)
-    print("Register command loaded")
\ No newline at end of file
+    print("Register command loaded")
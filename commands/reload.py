@@ -0,0 +1,55 @@
+import discord
+from discord import app_commands
+from typing import List
+
+@app_commands.command(name="reload", description="Reload a command module without restarting (bot owner only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(module="Name of the module in the commands folder")
+async def reload(interaction: discord.Interaction, module: str):
+    # Reloading changes the bot for every server, so only the bot owner may do it.
+    # Under the cluster launcher the loader refuses, as it could only reload this process.
+    if not await interaction.client.is_owner(interaction.user):
+        embed = discord.Embed(
+            title="<:cross:1427515205654544486> Access Denied",
+            description="Only the bot owner can reload command modules.",
+            color=discord.Color.red()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+
+    loader = interaction.client.get_cog("CommandLoader")
+    await interaction.response.defer(ephemeral=True)
+    result = await loader.reload_command_module(module)
+
+    if not result.ok:
+        embed = discord.Embed(
+            title="<:cross:1427515205654544486> Reload Failed",
+            description=f"`{module}`: {result.error}\nThe previous version is still active.",
+            color=discord.Color.red()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="<:tick:1427514481650565251> Module Reloaded",
+        description=f"Reloaded `{module}` in `{result.reload_ms:.1f}ms`.",
+        color=discord.Color.purple()
+    )
+    embed.add_field(name="Commands", value=", ".join(f"`/{name}`" for name in result.added) or "None", inline=False)
+    if result.error:
+        sync_text = result.error
+    elif result.synced is None:
+        sync_text = "Signatures unchanged, no sync needed"
+    else:
+        sync_text = f"Synced {result.synced} command(s)"
+    embed.add_field(name="Sync", value=sync_text, inline=False)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+@reload.autocomplete("module")
+async def module_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    loader = interaction.client.get_cog("CommandLoader")
+    names = loader.command_module_names() if loader else []
+    return [app_commands.Choice(name=name, value=name) for name in names if current.lower() in name][:25]
+
+def setup(bot):
+    bot.tree.add_command(reload)
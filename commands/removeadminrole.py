@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
-from utils import is_admin, get_admin_roles, save_admin_roles
+from utils import is_admin, remove_admin_role
 
-@app_commands.command(name="removeadminrole", description="Remove a role from Amethis admin roles")
+@app_commands.command(name="removeadminrole", description="Remove a role from Amethis admin roles", extras={"category": "administration"})
 @app_commands.guild_only()
 @app_commands.describe(role="The role to remove from administrator")
 async def removeadminrole(interaction: discord.Interaction, role: discord.Role):
@@ -15,9 +15,7 @@ async def removeadminrole(interaction: discord.Interaction, role: discord.Role):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
-    admin_role_ids = await get_admin_roles(interaction.guild)
-    
-    if role.id not in admin_role_ids:
+    if not await remove_admin_role(interaction.guild, role.id):
         embed = discord.Embed(
             title="<:exclamation:1427511606387937360> Role Not Found",
             description=f"{role.mention} is not an administrator role.",
@@ -26,9 +24,6 @@ async def removeadminrole(interaction: discord.Interaction, role: discord.Role):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
-    admin_role_ids.remove(role.id)
-    await save_admin_roles(interaction.guild, admin_role_ids)
-    
     embed = discord.Embed(
         title="<:tick:1427514481650565251> Role Removed",
         description=f"Successfully removed {role.mention} from administrator roles.",
@@ -1,11 +1,13 @@
 import discord
 from discord import app_commands
 from typing import Literal
-from utils import is_admin, get_data_category
+from utils import is_admin
+from registration import RegistrationConfig, save_registration_config
 
 @app_commands.command(
     name="setupregistration",
-    description="Setup the registration system for your server."
+    description="Setup the registration system for your server.",
+    extras={"category": "registration"}
 )
 @app_commands.describe(
     registration_channel="Channel where users will register.",
@@ -29,24 +31,6 @@ async def setupregistration(
 
     guild = interaction.guild
 
-    # Get or create the "Amethis' Data" category using your utils.py
-    category = await get_data_category(guild)
-
-    # Look for or create "registration-data" channel inside the category
-    channel_name = "registration-data"
-    reg_data_channel = discord.utils.get(category.text_channels, name=channel_name)
-
-    if not reg_data_channel:
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
-        }
-        reg_data_channel = await category.create_text_channel(
-            name=channel_name,
-            overwrites=overwrites,
-            reason="For storing registration system configuration"
-        )
-
     # Create embed with setup info
     embed = discord.Embed(
         title="<:scroll:1427519497207812168> REGISTRATION SYSTEM",
@@ -61,12 +45,12 @@ async def setupregistration(
         icon_url=interaction.user.display_avatar.url
     )
 
-    # Send embed into registration-data channel
-    await reg_data_channel.send(embed=embed)
+    # Save the configuration to the storage backend
+    await save_registration_config(guild, RegistrationConfig.from_embed_dict(embed.to_dict()))
 
     # Respond to admin who ran the command
     await interaction.response.send_message(
-        f"✅ Registration system setup complete!\nConfiguration saved in {reg_data_channel.mention}",
+        "✅ Registration system setup complete!\nConfiguration saved.",
         ephemeral=True
     )
 
@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
+from static_responses import StaticResponse
 
-@app_commands.command(name="source", description="View the bot's source code")
-async def source(interaction: discord.Interaction):
+def build_source_embed() -> discord.Embed:
     embed = discord.Embed(
         title="<:scroll:1427519497207812168> Source Code",
         description="**Amethis Discord Bot - Open Source**",
@@ -27,7 +27,14 @@ async def source(interaction: discord.Interaction):
     
     embed.set_footer(text="Open source and free to use")
     
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    return embed
+
+# Built once when the module loads
+SOURCE = StaticResponse(build_source_embed())
+
+@app_commands.command(name="source", description="View the bot's source code", extras={"category": "legal"})
+async def source(interaction: discord.Interaction):
+    await SOURCE.send(interaction)
 
 def setup(bot):
     bot.tree.add_command(source)
\ No newline at end of file
@@ -1,8 +1,8 @@
 import discord
 from discord import app_commands
+from static_responses import StaticResponse
 
-@app_commands.command(name="terms", description="View terms of service")
-async def terms(interaction: discord.Interaction):
+def build_terms_embed() -> discord.Embed:
     embed = discord.Embed(
         title="<:scroll:1427519497207812168> Terms of Service",
         description="**Please read our terms carefully**",
@@ -17,7 +17,14 @@ async def terms(interaction: discord.Interaction):
     
     embed.set_footer(text="By using this bot, you agree to our terms of service")
     
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    return embed
+
+# Built once when the module loads
+TERMS = StaticResponse(build_terms_embed())
+
+@app_commands.command(name="terms", description="View terms of service", extras={"category": "legal"})
+async def terms(interaction: discord.Interaction):
+    await TERMS.send(interaction)
 
 def setup(bot):
     bot.tree.add_command(terms)
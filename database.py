@@ -0,0 +1,144 @@
+import os
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Local SQLite database shared by the storage backend and other local state
+
+DEFAULT_DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "amethis.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guilds (
+    guild_id INTEGER PRIMARY KEY,
+    migrated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS admin_roles (
+    guild_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, role_id)
+);
+CREATE TABLE IF NOT EXISTS registration_config (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS polls (
+    poll_id INTEGER PRIMARY KEY,
+    guild_id INTEGER,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER,
+    question TEXT NOT NULL,
+    options TEXT NOT NULL,
+    creator_id INTEGER NOT NULL,
+    creator_name TEXT NOT NULL,
+    creator_avatar TEXT,
+    end_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS polls_end_at ON polls (end_at);
+CREATE TABLE IF NOT EXISTS poll_votes (
+    poll_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    choice INTEGER NOT NULL,
+    PRIMARY KEY (poll_id, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS registration_sessions (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    answers TEXT NOT NULL,
+    questions_hash TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS registration_requests (
+    message_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    questions TEXT NOT NULL,
+    answers TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bot_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+class Database:
+    """Async access to a SQLite database owned by a single worker thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="amethis-db")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Only called from the worker thread, so the connection is never shared
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def run(self, func):
+        """Run func(connection) on the worker thread and return its result"""
+        return await self._run(lambda: func(self._connection()))
+
+    async def execute(self, sql: str, params: tuple = ()):
+        await self._run(lambda: self._connection().execute(sql, params))
+
+    async def executemany(self, sql: str, rows: list):
+        await self._run(lambda: self._connection().executemany(sql, rows))
+
+    async def fetchone(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        return await self._run(lambda: self._connection().execute(sql, params).fetchone())
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> list:
+        return await self._run(lambda: self._connection().execute(sql, params).fetchall())
+
+    async def transaction(self, statements: list):
+        """Run a list of (sql, params) statements atomically"""
+        def run():
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    conn.execute(sql, params)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        await self._run(run)
+
+    async def close(self):
+        def run():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        await self._run(run)
+        self._executor.shutdown(wait=False)
+
+_database: Optional[Database] = None
+
+def get_database() -> Database:
+    """Get the shared local database"""
+    global _database
+    if _database is None:
+        _database = Database(os.getenv("DATABASE_PATH") or DEFAULT_DATABASE_PATH)
+    return _database
+
+async def close_database():
+    """Close the shared local database"""
+    global _database
+    if _database is not None:
+        await _database.close()
+    _database = None
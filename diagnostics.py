@@ -0,0 +1,229 @@
+import os
+import sys
+import math
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Optional
+import discord
+
+log = logging.getLogger(__name__)
+
+# Recent command latencies kept for the p50/p99 in /ping and the metrics endpoint
+COMMAND_SAMPLES = 1000
+
+# Upper bounds in seconds of the rolling loop lag histogram
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Frames kept from the stack of a blocking callback
+STACK_DEPTH = 12
+
+@dataclass
+class SlowCallback:
+    at: float                # UNIX time the block was detected
+    lag: float               # seconds the loop was late
+    task: Optional[str]      # task running when the stack was captured
+    stack: Optional[str]     # formatted stack of the loop thread, None if the block ended before capture
+
+    def describe(self) -> str:
+        text = f"Event loop blocked for {self.lag * 1000:.0f}ms in {self.task or 'a callback'}"
+        if self.stack:
+            text += "\n" + self.stack
+        return text
+
+class LoopMonitor:
+    """Samples event loop lag and captures the stack of callbacks that block it.
+
+    A task sleeps `interval` seconds at a time and records how late it wakes
+    up into a rolling window and histogram. A watchdog thread watches the
+    same task: when it is more than `threshold` seconds late, the loop is
+    stuck in one callback, so the thread captures the loop thread's stack
+    while it is still blocked.
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.25, window: int = 120, log_interval: float = 300):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self.samples = deque(maxlen=window)
+        self.histogram = [0] * (len(LAG_BUCKETS) + 1)  # counts over the window; the last bucket is +Inf
+        self.slow_callbacks = deque(maxlen=20)
+        self.slow_total = 0
+        self._expected_wake = None   # monotonic time the sampler should wake, None while idle
+        self._captured: Optional[SlowCallback] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.create_task(self._run())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        last_log = time.monotonic()
+        while True:
+            # time.monotonic() is the loop's clock, and the watchdog thread can read it too
+            self._expected_wake = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - self._expected_wake)
+            self._expected_wake = None
+            self._record(lag)
+            if lag >= self.threshold:
+                self._report_slow(lag)
+            else:
+                self._captured = None  # captured just as the loop caught up
+            if now - last_log >= self.log_interval:
+                last_log = now
+                log.info("Event loop lag: %s", self.summary())
+
+    def _record(self, lag: float):
+        if len(self.samples) == self.samples.maxlen:
+            self.histogram[bisect_left(LAG_BUCKETS, self.samples[0])] -= 1
+        self.samples.append(lag)
+        self.histogram[bisect_left(LAG_BUCKETS, lag)] += 1
+
+    def _report_slow(self, lag: float):
+        slow, self._captured = self._captured, None
+        if slow is None:
+            slow = SlowCallback(time.time(), lag, None, None)
+        slow.lag = lag
+        self.slow_callbacks.append(slow)
+        self.slow_total += 1
+        log.warning("%s", slow.describe())
+
+    def _watch(self):
+        # Polling at a quarter of the threshold catches blocks shortly after they pass it
+        while not self._stop.wait(self.threshold / 4):
+            expected = self._expected_wake
+            if expected is None or self._captured is not None:
+                continue
+            late = time.monotonic() - expected
+            if late >= self.threshold and self._expected_wake == expected:
+                self._captured = self._capture(late)
+
+    def _capture(self, late: float) -> SlowCallback:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)[-STACK_DEPTH:]).rstrip() if frame is not None else None
+        task = asyncio.current_task(self._loop)
+        task_name = None
+        if task is not None:
+            coro = task.get_coro()
+            task_name = f"task {task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+        return SlowCallback(time.time(), late, task_name, stack)
+
+    @property
+    def current(self) -> Optional[float]:
+        return self.samples[-1] if self.samples else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return max(self.samples) if self.samples else None
+
+    def buckets(self) -> dict:
+        """Cumulative sample counts over the window by upper bound, like a Prometheus histogram"""
+        result = {}
+        total = 0
+        for bound, count in zip([str(bound) for bound in LAG_BUCKETS] + ["+Inf"], self.histogram):
+            total += count
+            result[bound] = total
+        return result
+
+    def summary(self) -> str:
+        if not self.samples:
+            return "no samples yet"
+        values = sorted(self.samples)
+        return (f"p50 {percentile(values, 0.5) * 1000:.1f}ms, p99 {percentile(values, 0.99) * 1000:.1f}ms, "
+                f"max {values[-1] * 1000:.1f}ms over {len(values)} samples; {self.slow_total} slow callback(s)")
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "current": self.current,
+            "max": self.max,
+            "buckets": self.buckets(),
+            "slow_total": self.slow_total,
+            "slow_recent": [asdict(slow) for slow in self.slow_callbacks],
+        }
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+class Diagnostics:
+    """Latency figures shared by /ping and the metrics endpoint"""
+
+    def __init__(self):
+        self.loop_lag = LoopMonitor(
+            interval=float(os.getenv("LOOP_LAG_INTERVAL") or 0.5),
+            threshold=float(os.getenv("SLOW_CALLBACK_THRESHOLD") or 0.25),
+        )
+        self.command_latencies = deque(maxlen=COMMAND_SAMPLES)  # seconds to first response
+        self.rest_round_trip: Optional[float] = None
+        self.rest_measured_at: Optional[float] = None
+
+    def record_command_latency(self, seconds: float):
+        self.command_latencies.append(seconds)
+
+    def command_percentiles(self) -> Optional[dict]:
+        """p50 and p99 of recent command latencies, or None before the first command"""
+        if not self.command_latencies:
+            return None
+        values = sorted(self.command_latencies)
+        return {"p50": percentile(values, 0.5), "p99": percentile(values, 0.99)}
+
+    async def measure_rest(self, client: discord.Client, timeout: float = 5.0) -> Optional[float]:
+        """Time a real REST request; GET /gateway is cheap and needs no permissions"""
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(client.http.request(discord.http.Route("GET", "/gateway")), timeout)
+        except (asyncio.TimeoutError, discord.HTTPException) as e:
+            log.warning("REST round trip measurement failed: %s", e)
+            return None
+        self.rest_round_trip = time.perf_counter() - started
+        self.rest_measured_at = time.time()
+        return self.rest_round_trip
+
+    def shard_latencies(self, client: discord.Client) -> dict:
+        """Heartbeat latency in seconds by shard; shards without a heartbeat yet are left out"""
+        latencies = getattr(client, "latencies", None)
+        if latencies is None:
+            latencies = [(client.shard_id or 0, client.latency)]
+        return {shard_id: latency for shard_id, latency in latencies if math.isfinite(latency)}
+
+    def snapshot(self, client: discord.Client) -> dict:
+        return {
+            "shards": self.shard_latencies(client),
+            "rest_round_trip": self.rest_round_trip,
+            "loop_lag": self.loop_lag.stats(),
+            "commands": self.command_percentiles(),
+        }
+
+_diagnostics: Optional[Diagnostics] = None
+
+def get_diagnostics() -> Diagnostics:
+    """Get the shared diagnostics"""
+    global _diagnostics
+    if _diagnostics is None:
+        _diagnostics = Diagnostics()
+    return _diagnostics
@@ -0,0 +1,187 @@
+import os
+import time
+import queue
+import logging
+import argparse
+import multiprocessing
+from typing import Optional, List, Tuple
+import aiohttp
+import asyncio
+import discord
+from dotenv import load_dotenv
+
+# Runs the bot as a cluster of worker processes. Each worker owns a
+# contiguous range of shards and its own event loop; identifies are
+# staggered across all workers by one shared gate.
+
+log = logging.getLogger("launcher")
+
+# Seconds between two identifies in the same rate limit bucket
+IDENTIFY_INTERVAL = 5.0
+# Seconds between two shard stats reports of a worker
+STATS_INTERVAL = 30.0
+
+def shard_ranges(shard_count: int, clusters: int) -> List[List[int]]:
+    """Split shard IDs into contiguous, nearly equal ranges, one per cluster"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+    for i in range(clusters):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+async def fetch_gateway_info(token: str) -> Tuple[int, int]:
+    """Recommended shard count and identify concurrency from GET /gateway/bot"""
+    url = f"{discord.http.Route.BASE}/gateway/bot"
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+class IdentifyGate:
+    """Cross-process identify rate limit.
+
+    Shard N identifies in bucket N % max_concurrency, and every bucket allows
+    one identify per IDENTIFY_INTERVAL across all worker processes.
+    """
+
+    def __init__(self, ctx, max_concurrency: int, interval: float = IDENTIFY_INTERVAL):
+        self.max_concurrency = max(1, max_concurrency)
+        self.interval = interval
+        self._locks = [ctx.Lock() for _ in range(self.max_concurrency)]
+        self._last = ctx.Array("d", self.max_concurrency)  # UNIX time of the last identify per bucket
+
+    def wait(self, shard_id: int) -> float:
+        """Block until the shard may identify; returns the seconds waited"""
+        bucket = shard_id % self.max_concurrency
+        with self._locks[bucket]:
+            delay = self._last[bucket] + self.interval - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self._last[bucket] = time.time()
+        return max(0.0, delay)
+
+def run_cluster(cluster_id: int, shard_ids: List[int], shard_count: int, gate: IdentifyGate,
+                stats_queue, force_sync: bool, dev_guild_id: Optional[int]):
+    """Entry point of a worker process"""
+    load_dotenv()
+    from bot import Bot, apply_api_base, default_intents
+    from startup import get_startup_report
+
+    class ClusterBot(Bot):
+        async def before_identify_hook(self, shard_id: int, *, initial: bool = False):
+            waited = await asyncio.to_thread(gate.wait, shard_id)
+            log.info("Cluster %d: shard %d identifying (waited %.1fs)", cluster_id, shard_id, waited)
+
+        async def setup_hook(self):
+            await super().setup_hook()
+            self.loop.create_task(self.report_shard_stats())
+
+        async def report_shard_stats(self):
+            await self.wait_until_ready()
+            while not self.is_closed():
+                stats_queue.put((cluster_id, self.shard_stats()))
+                await asyncio.sleep(STATS_INTERVAL)
+
+    # Every worker serves its own metrics, on METRICS_PORT + cluster ID
+    if os.getenv("METRICS_PORT"):
+        os.environ["METRICS_PORT"] = str(int(os.environ["METRICS_PORT"]) + cluster_id)
+
+    get_startup_report().start()
+    apply_api_base()
+    bot = ClusterBot(
+        intents=default_intents(),
+        force_sync=force_sync,
+        dev_guild_id=dev_guild_id,
+        shard_count=shard_count,
+        shard_ids=shard_ids
+    )
+    bot.run(os.getenv("DISCORD_TOKEN"), root_logger=True)
+
+def log_stats(latest: dict):
+    shards = [stats for cluster in latest.values() for stats in cluster]
+    if not shards:
+        return
+    guilds = sum(stats["guilds"] for stats in shards)
+    latencies = [stats["latency_ms"] for stats in shards if stats["latency_ms"] is not None]
+    average = sum(latencies) / len(latencies) if latencies else float("nan")
+    log.info("%d shard(s) in %d cluster(s): %d servers, average latency %.0fms", len(shards), len(latest), guilds, average)
+    for cluster_id, cluster in sorted(latest.items()):
+        for stats in cluster:
+            log.info("  cluster %d shard %d: %d servers, %sms%s", cluster_id, stats["shard_id"], stats["guilds"],
+                     stats["latency_ms"], " (closed)" if stats["closed"] else "")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Amethis bot as a cluster of shard worker processes")
+    parser.add_argument("--clusters", type=int, help="worker processes (default: CLUSTER_COUNT or 1)")
+    parser.add_argument("--shards", type=int,
+                        help="total shard count (default: SHARD_COUNT or Discord's recommendation)")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="identify buckets (default: Discord's session start limit)")
+    parser.add_argument("--sync", action="store_true", help="sync slash commands even if they did not change")
+    parser.add_argument("--dev-guild", type=int, metavar="GUILD_ID", help="sync commands to this guild only")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(processName)s %(name)s: %(message)s")
+    token = os.getenv("DISCORD_TOKEN")
+    if not token or not os.getenv("APP_ID"):
+        print("Error: DISCORD_TOKEN and APP_ID must be set in .env file")
+        return
+
+    from bot import apply_api_base
+    apply_api_base()
+    # Read after load_dotenv so the .env values apply too
+    cluster_count = args.clusters or int(os.getenv("CLUSTER_COUNT") or 1)
+    shard_count = args.shards or int(os.getenv("SHARD_COUNT") or 0)
+    max_concurrency = args.max_concurrency
+    if not shard_count or not max_concurrency:
+        recommended, concurrency = asyncio.run(fetch_gateway_info(token))
+        shard_count = shard_count or recommended
+        max_concurrency = max_concurrency or concurrency
+
+    dev_guild_id = args.dev_guild or int(os.getenv("DEV_GUILD_ID") or 0) or None
+    ctx = multiprocessing.get_context("spawn")
+    gate = IdentifyGate(ctx, max_concurrency)
+    stats_queue = ctx.Queue()
+    ranges = shard_ranges(shard_count, cluster_count)
+    log.info("Launching %d shard(s) in %d cluster(s), identify concurrency %d", shard_count, len(ranges), max_concurrency)
+
+    workers = []
+    for cluster_id, shard_ids in enumerate(ranges):
+        worker = ctx.Process(
+            target=run_cluster,
+            name=f"cluster-{cluster_id}",
+            args=(cluster_id, shard_ids, shard_count, gate, stats_queue, args.sync, dev_guild_id)
+        )
+        worker.start()
+        workers.append(worker)
+        log.info("Cluster %d: shards %d-%d (pid %d)", cluster_id, shard_ids[0], shard_ids[-1], worker.pid)
+
+    latest = {}
+    last_logged = time.monotonic()
+    try:
+        while any(worker.is_alive() for worker in workers):
+            try:
+                cluster_id, stats = stats_queue.get(timeout=1.0)
+                latest[cluster_id] = stats
+            except queue.Empty:
+                pass
+            if time.monotonic() - last_logged >= STATS_INTERVAL:
+                log_stats(latest)
+                last_logged = time.monotonic()
+    except KeyboardInterrupt:
+        log.info("Stopping clusters")
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
 import os
-import discord
+import argparse
 from dotenv import load_dotenv
-from bot import Bot
+from bot import Bot, apply_api_base, default_intents
+from startup import get_startup_report
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Amethis bot")
+    parser.add_argument("--sync", action="store_true", help="sync slash commands even if they did not change")
+    parser.add_argument("--dev-guild", type=int, metavar="GUILD_ID",
+                        help="sync commands to this guild only (defaults to DEV_GUILD_ID)")
+    return parser.parse_args()
 
 def main():
+    get_startup_report().start()
+    args = parse_args()
+
     # Load environment variables
     load_dotenv()
     token = os.getenv('DISCORD_TOKEN')
@@ -14,13 +25,15 @@ def main():
         return
     
     # Create bot instance
-    intents = discord.Intents.default()
-    intents.message_content = True
+    intents = default_intents()
     
-    bot = Bot(intents=intents)
+    apply_api_base()
+    shard_count = int(os.getenv('SHARD_COUNT') or 0) or None
+    dev_guild_id = args.dev_guild or int(os.getenv('DEV_GUILD_ID') or 0) or None
+    bot = Bot(intents=intents, force_sync=args.sync, dev_guild_id=dev_guild_id, shard_count=shard_count)
     
-    # Run the bot
-    bot.run(token)
+    # Run the bot; root_logger also shows the bot's own log records
+    bot.run(token, root_logger=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
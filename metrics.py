@@ -0,0 +1,254 @@
+import os
+import time
+import logging
+import functools
+from bisect import bisect_left
+from typing import Optional, Callable
+import discord
+from discord import app_commands
+from aiohttp import web
+from diagnostics import get_diagnostics
+
+log = logging.getLogger(__name__)
+
+# Interactions must be answered within 3 seconds, so the buckets are dense below that
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RESPONSE_METHODS = ("defer", "send_message", "edit_message", "send_modal")
+
+class Histogram:
+    """Fixed-bucket histogram; one bisect and two additions per observation"""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metrics:
+    """Counters and latency histograms for commands, REST calls and gateway events.
+
+    Everything is plain dicts updated on the event loop; the text is only
+    built when the endpoint is scraped.
+    """
+
+    def __init__(self, prefix: str = "amethis"):
+        self.prefix = prefix
+        self.command_calls = {}           # command -> invocations
+        self.command_errors = {}          # command -> invocations that raised
+        self.command_first_response = {}  # command -> Histogram
+        self.command_duration = {}        # command -> Histogram
+        self.rest_calls = {}              # (method, route) -> requests
+        self.rest_errors = {}             # (method, route, status) -> failed requests
+        self.gateway_events = {}          # event type -> events received
+        self._gauges = []                 # (name, help, label, function)
+        self._awaiting_response = {}      # interaction ID -> (command, started)
+
+    # Commands
+
+    def instrument(self, command):
+        """Wrap the callback of a command, or of every command in a group"""
+        if isinstance(command, app_commands.Group):
+            for child in command.walk_commands():
+                if isinstance(child, app_commands.Command):
+                    self.instrument(child)
+            return
+        if not isinstance(command, app_commands.Command) or getattr(command._callback, "__metrics__", False):
+            return
+
+        callback = command._callback
+        name = command.qualified_name
+
+        @functools.wraps(callback)
+        async def timed(*args, **kwargs):
+            # discord.py passes the interaction last, after the binding if there is one
+            interaction = args[-1]
+            started = time.perf_counter()
+            self.command_calls[name] = self.command_calls.get(name, 0) + 1
+            self._awaiting_response[interaction.id] = (name, started)
+            try:
+                return await callback(*args, **kwargs)
+            except Exception:
+                self.command_errors[name] = self.command_errors.get(name, 0) + 1
+                raise
+            finally:
+                self._awaiting_response.pop(interaction.id, None)
+                self._histogram(self.command_duration, name).observe(time.perf_counter() - started)
+
+        timed.__metrics__ = True
+        command._callback = timed
+
+    def responded(self, interaction_id: int):
+        """Record the time to first response of a running command"""
+        entry = self._awaiting_response.pop(interaction_id, None)
+        if entry is not None:
+            name, started = entry
+            elapsed = time.perf_counter() - started
+            self._histogram(self.command_first_response, name).observe(elapsed)
+            get_diagnostics().record_command_latency(elapsed)
+
+    def _histogram(self, histograms: dict, name: str) -> Histogram:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        return histogram
+
+    # REST and gateway
+
+    def install(self, client: discord.Client):
+        """Count the client's REST requests and time interaction responses"""
+        request = client.http.request
+
+        async def counted(route, **kwargs):
+            key = (route.method, route.path)
+            self.rest_calls[key] = self.rest_calls.get(key, 0) + 1
+            try:
+                return await request(route, **kwargs)
+            except discord.HTTPException as e:
+                error_key = (route.method, route.path, e.status)
+                self.rest_errors[error_key] = self.rest_errors.get(error_key, 0) + 1
+                raise
+
+        client.http.request = counted
+        _patch_interaction_responses()
+
+    def gateway_event(self, event_type: str):
+        self.gateway_events[event_type] = self.gateway_events.get(event_type, 0) + 1
+
+    # Gauges
+
+    def add_gauge(self, name: str, help: str, function: Callable, label: Optional[str] = None):
+        """Sample `function` on every scrape; with `label` it returns a dict of label value -> value"""
+        self._gauges.append((name, help, label, function))
+
+    # Exposition
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        p = self.prefix
+
+        def counter(name: str, help: str, values: dict, *label_names):
+            lines.append(f"# HELP {p}_{name} {help}")
+            lines.append(f"# TYPE {p}_{name} counter")
+            for key, value in sorted(values.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                lines.append(f"{p}_{name}{_labels(**dict(zip(label_names, key)))} {value}")
+
+        def histogram(name: str, help: str, histograms: dict):
+            lines.append(f"# HELP {p}_{name} {help}")
+            lines.append(f"# TYPE {p}_{name} histogram")
+            for command, hist in sorted(histograms.items()):
+                bounds = [repr(bound) for bound in hist.bounds] + ["+Inf"]
+                for bound, count in zip(bounds, hist.cumulative()):
+                    lines.append(f"{p}_{name}_bucket{_labels(command=command, le=bound)} {count}")
+                lines.append(f"{p}_{name}_sum{_labels(command=command)} {hist.sum!r}")
+                lines.append(f"{p}_{name}_count{_labels(command=command)} {hist.count}")
+
+        counter("command_invocations_total", "Slash command invocations.", self.command_calls, "command")
+        counter("command_errors_total", "Slash command invocations that raised.", self.command_errors, "command")
+        histogram("command_first_response_seconds", "Time from invocation to the first interaction response.", self.command_first_response)
+        histogram("command_duration_seconds", "Time from invocation until the command returned.", self.command_duration)
+        counter("rest_requests_total", "REST requests by route.", self.rest_calls, "method", "route")
+        counter("rest_errors_total", "Failed REST requests by route and status.", self.rest_errors, "method", "route", "status")
+        counter("gateway_events_total", "Gateway events received by type.", self.gateway_events, "type")
+
+        for name, help, label, function in self._gauges:
+            try:
+                value = function()
+            except Exception as e:
+                log.warning("Gauge %s failed: %s", name, e)
+                continue
+            lines.append(f"# HELP {p}_{name} {help}")
+            lines.append(f"# TYPE {p}_{name} gauge")
+            if label is None:
+                lines.append(f"{p}_{name} {_format(value)}")
+            else:
+                for label_value, sample in sorted(value.items()):
+                    lines.append(f"{p}_{name}{_labels(**{label: label_value})} {_format(sample)}")
+
+        lines.append("")
+        return "\n".join(lines)
+
+_patched_responses = False
+
+def _patch_interaction_responses():
+    """Report the first response of every interaction; done once for the class"""
+    global _patched_responses
+    if _patched_responses:
+        return
+    _patched_responses = True
+
+    for method_name in RESPONSE_METHODS:
+        method = getattr(discord.InteractionResponse, method_name)
+
+        @functools.wraps(method)
+        async def responded(response, *args, _method=method, **kwargs):
+            result = await _method(response, *args, **kwargs)
+            get_metrics().responded(response._parent.id)
+            return result
+
+        setattr(discord.InteractionResponse, method_name, responded)
+
+class MetricsServer:
+    """Serves /metrics on a local aiohttp server"""
+
+    def __init__(self, metrics: "Metrics", host: str = "127.0.0.1", port: int = 9100):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.metrics.render(), content_type="text/plain")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        log.info("Serving metrics on http://%s:%d/metrics", self.host, self.port)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+_metrics: Optional[Metrics] = None
+
+def get_metrics() -> Metrics:
+    """Get the shared metrics registry"""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+def metrics_server_from_env() -> Optional[MetricsServer]:
+    """A server for METRICS_PORT on METRICS_HOST, or None if METRICS_PORT is unset"""
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    return MetricsServer(get_metrics(), os.getenv("METRICS_HOST") or "127.0.0.1", int(port))
@@ -0,0 +1,169 @@
+import time
+import asyncio
+import logging
+from enum import IntEnum
+from collections import deque
+from typing import Optional, Hashable
+
+log = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    """Outbound work classes, most urgent first"""
+    STATE = 0     # writes that must land: stored data, final results, requests
+    COSMETIC = 1  # refreshes, presence changes and cleanup deletes
+
+class _Job:
+    __slots__ = ("func", "priority", "bucket", "key", "future", "queued_at")
+
+    def __init__(self, func, priority: Priority, bucket: Optional[Hashable], key: Optional[Hashable], future: asyncio.Future):
+        self.func = func
+        self.priority = priority
+        self.bucket = bucket
+        self.key = key
+        self.future = future
+        self.queued_at = time.monotonic()
+
+class OutboundScheduler:
+    """Runs outbound REST work by priority within global and per-bucket concurrency limits.
+
+    Interaction responses do not go through it; they use the interaction
+    webhook, which is not limited with the channel routes.
+
+    A bucket is what Discord rate limits together, usually ("channel", id).
+    Cosmetic work never takes the last `reserved` slots, which stay free for
+    state writes. Queued cosmetic work with the same key is merged into one
+    call running the latest version, and the oldest cosmetic work is dropped
+    once its queue exceeds the backlog.
+    """
+
+    def __init__(self, concurrency: int = 8, bucket_concurrency: int = 1, reserved: int = 2, cosmetic_backlog: int = 200):
+        self.concurrency = concurrency
+        self.bucket_concurrency = bucket_concurrency
+        self.reserved = reserved
+        self.cosmetic_backlog = cosmetic_backlog
+        self._queues = {priority: deque() for priority in Priority}
+        self._keyed = {}    # key -> queued cosmetic job
+        self._buckets = {}  # bucket -> running jobs
+        self._in_flight = 0
+        self.executed = {priority: 0 for priority in Priority}
+        self.merged = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_wait = {priority: 0.0 for priority in Priority}
+
+    def submit(self, func, priority: Priority = Priority.STATE, bucket: Optional[Hashable] = None,
+               key: Optional[Hashable] = None) -> asyncio.Future:
+        """Queue the coroutine function `func`; the future resolves to its result, or None if it was dropped"""
+        if priority == Priority.COSMETIC and key is not None:
+            job = self._keyed.get(key)
+            if job is not None:
+                # Still queued: run the latest version once, for every submitter
+                job.func = func
+                self.merged += 1
+                return job.future
+
+        job = _Job(func, priority, bucket, key, asyncio.get_running_loop().create_future())
+        queue = self._queues[priority]
+        queue.append(job)
+        if priority == Priority.COSMETIC:
+            if key is not None:
+                self._keyed[key] = job
+            while len(queue) > self.cosmetic_backlog:
+                self._drop(queue.popleft())
+        self._dispatch()
+        return job.future
+
+    async def run(self, func, priority: Priority = Priority.STATE, bucket: Optional[Hashable] = None,
+                  key: Optional[Hashable] = None):
+        """Submit and wait for the result"""
+        return await self.submit(func, priority, bucket, key)
+
+    def post(self, func, priority: Priority = Priority.COSMETIC, bucket: Optional[Hashable] = None,
+             key: Optional[Hashable] = None):
+        """Submit without waiting; failures are logged"""
+        future = self.submit(func, priority, bucket, key)
+        future.add_done_callback(self._log_failure)
+
+    def _log_failure(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            log.warning("Outbound work failed: %s", future.exception())
+
+    def _drop(self, job: _Job):
+        self.dropped += 1
+        if job.key is not None and self._keyed.get(job.key) is job:
+            del self._keyed[job.key]
+        if not job.future.done():
+            job.future.set_result(None)
+
+    def _bucket_free(self, bucket: Optional[Hashable]) -> bool:
+        return bucket is None or self._buckets.get(bucket, 0) < self.bucket_concurrency
+
+    def _next_job(self) -> Optional[_Job]:
+        for priority, queue in self._queues.items():
+            limit = self.concurrency - self.reserved if priority == Priority.COSMETIC else self.concurrency
+            if self._in_flight >= limit:
+                continue
+            for i, job in enumerate(queue):
+                if self._bucket_free(job.bucket):
+                    del queue[i]
+                    return job
+        return None
+
+    def _dispatch(self):
+        while self._in_flight < self.concurrency:
+            job = self._next_job()
+            if job is None:
+                return
+            if job.key is not None and self._keyed.get(job.key) is job:
+                del self._keyed[job.key]
+            self._in_flight += 1
+            if job.bucket is not None:
+                self._buckets[job.bucket] = self._buckets.get(job.bucket, 0) + 1
+            waited = time.monotonic() - job.queued_at
+            if waited > self.max_wait[job.priority]:
+                self.max_wait[job.priority] = waited
+            asyncio.create_task(self._run(job))
+
+    async def _run(self, job: _Job):
+        try:
+            result = await job.func()
+        except Exception as e:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self.executed[job.priority] += 1
+            self._in_flight -= 1
+            if job.bucket is not None:
+                remaining = self._buckets[job.bucket] - 1
+                if remaining:
+                    self._buckets[job.bucket] = remaining
+                else:
+                    del self._buckets[job.bucket]
+            self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queued": {priority.name.lower(): len(queue) for priority, queue in self._queues.items()},
+            "executed": {priority.name.lower(): count for priority, count in self.executed.items()},
+            "max_wait_s": {priority.name.lower(): wait for priority, wait in self.max_wait.items()},
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+_outbound: Optional[OutboundScheduler] = None
+
+def get_outbound() -> OutboundScheduler:
+    """Get the shared outbound scheduler"""
+    global _outbound
+    if _outbound is None:
+        _outbound = OutboundScheduler()
+    return _outbound
+
+def channel_bucket(channel_id: int) -> tuple:
+    return ("channel", channel_id)
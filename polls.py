@@ -0,0 +1,160 @@
+import json
+import time
+from array import array
+from bisect import bisect_left
+from typing import Optional, List
+from database import Database, get_database
+
+class Poll:
+    """Compact state of one poll: options, tallies and who voted for what.
+
+    Voters are kept as a sorted array of user IDs with a parallel array of
+    chosen options, so a poll costs about 9 bytes per voter instead of a set
+    or dict entry per voter.
+    """
+
+    __slots__ = (
+        "poll_id", "question", "options", "end_at", "creator_id", "creator_name", "creator_avatar",
+        "guild_id", "channel_id", "message_id", "ended", "votes", "voter_ids", "voter_choices",
+    )
+
+    def __init__(self, poll_id: int, question: str, options: List[str], end_at: float,
+                 creator_id: int, creator_name: str, creator_avatar: Optional[str] = None,
+                 guild_id: Optional[int] = None, channel_id: Optional[int] = None,
+                 message_id: Optional[int] = None):
+        self.poll_id = poll_id
+        self.question = question
+        self.options = options
+        self.end_at = end_at
+        self.creator_id = creator_id
+        self.creator_name = creator_name  # cached display name, shown in the footer
+        self.creator_avatar = creator_avatar
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.ended = False
+        self.votes = array("I", bytes(4 * len(options)))  # tally per option
+        self.voter_ids = array("Q")      # sorted user IDs
+        self.voter_choices = array("B")  # option index of voter_ids[i]
+
+    @property
+    def total_votes(self) -> int:
+        return len(self.voter_ids)
+
+    def seconds_remaining(self) -> int:
+        return max(0, int(self.end_at - time.time()))
+
+    def _find(self, user_id: int) -> int:
+        i = bisect_left(self.voter_ids, user_id)
+        if i < len(self.voter_ids) and self.voter_ids[i] == user_id:
+            return i
+        return -1
+
+    def has_voted(self, user_id: int) -> bool:
+        return self._find(user_id) >= 0
+
+    def choice_of(self, user_id: int) -> Optional[int]:
+        """Option the user voted for, or None"""
+        i = self._find(user_id)
+        return self.voter_choices[i] if i >= 0 else None
+
+    def set_vote(self, user_id: int, choice: int) -> Optional[int]:
+        """Cast or change a vote; returns the previous choice"""
+        i = bisect_left(self.voter_ids, user_id)
+        if i < len(self.voter_ids) and self.voter_ids[i] == user_id:
+            previous = self.voter_choices[i]
+            if previous != choice:
+                self.votes[previous] -= 1
+                self.votes[choice] += 1
+                self.voter_choices[i] = choice
+            return previous
+        self.voter_ids.insert(i, user_id)
+        self.voter_choices.insert(i, choice)
+        self.votes[choice] += 1
+        return None
+
+    def retract_vote(self, user_id: int) -> Optional[int]:
+        """Remove a vote; returns the retracted choice, or None if the user had not voted"""
+        i = self._find(user_id)
+        if i < 0:
+            return None
+        previous = self.voter_choices[i]
+        del self.voter_ids[i]
+        del self.voter_choices[i]
+        self.votes[previous] -= 1
+        return previous
+
+    def load_votes(self, rows: list):
+        """Bulk load (user_id, choice) rows sorted by user ID"""
+        for user_id, choice in rows:
+            if 0 <= choice < len(self.options):
+                self.voter_ids.append(user_id)
+                self.voter_choices.append(choice)
+                self.votes[choice] += 1
+
+class PollStore:
+    """Persists polls and their votes in the local database"""
+
+    def __init__(self, database: Database):
+        self.db = database
+
+    async def create(self, poll: Poll):
+        await self.db.execute(
+            "INSERT OR REPLACE INTO polls (poll_id, guild_id, channel_id, message_id, question, options, "
+            "creator_id, creator_name, creator_avatar, end_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (poll.poll_id, poll.guild_id, poll.channel_id, poll.message_id, poll.question, json.dumps(poll.options),
+             poll.creator_id, poll.creator_name, poll.creator_avatar, poll.end_at)
+        )
+
+    async def record_vote(self, poll_id: int, user_id: int, choice: int):
+        """Store a new or changed vote"""
+        await self.db.execute(
+            "INSERT OR REPLACE INTO poll_votes (poll_id, user_id, choice) VALUES (?, ?, ?)",
+            (poll_id, user_id, choice)
+        )
+
+    async def retract_vote(self, poll_id: int, user_id: int):
+        await self.db.execute("DELETE FROM poll_votes WHERE poll_id = ? AND user_id = ?", (poll_id, user_id))
+
+    async def load(self, poll_id: int) -> Optional[Poll]:
+        """Load a poll together with its votes"""
+        def run(conn):
+            row = conn.execute(
+                "SELECT poll_id, guild_id, channel_id, message_id, question, options, creator_id, "
+                "creator_name, creator_avatar, end_at FROM polls WHERE poll_id = ?",
+                (poll_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            votes = conn.execute("SELECT user_id, choice FROM poll_votes WHERE poll_id = ? ORDER BY user_id", (poll_id,)).fetchall()
+            return row, votes
+
+        result = await self.db.run(run)
+        if result is None:
+            return None
+        row, votes = result
+        poll = Poll(
+            poll_id=row[0], guild_id=row[1], channel_id=row[2], message_id=row[3], question=row[4],
+            options=json.loads(row[5]), creator_id=row[6], creator_name=row[7], creator_avatar=row[8], end_at=row[9]
+        )
+        poll.load_votes(votes)
+        return poll
+
+    async def load_open(self) -> list:
+        """Return (poll_id, guild_id, end_at) of every stored poll, soonest deadline first"""
+        return await self.db.fetchall("SELECT poll_id, guild_id, end_at FROM polls ORDER BY end_at")
+
+    async def delete(self, poll_id: int):
+        await self.db.transaction([
+            ("DELETE FROM poll_votes WHERE poll_id = ?", (poll_id,)),
+            ("DELETE FROM polls WHERE poll_id = ?", (poll_id,)),
+        ])
+
+_store: Optional[PollStore] = None
+
+def get_poll_store() -> PollStore:
+    """Get the shared poll store"""
+    global _store
+    if _store is None:
+        _store = PollStore(get_database())
+    return _store
@@ -0,0 +1,353 @@
+import re
+import copy
+import json
+import time
+import hashlib
+from dataclasses import dataclass, field
+from typing import Optional, List, Tuple
+import discord
+from storage import get_storage
+from database import Database, get_database
+
+# Shared registration config model. The config is stored as the embed
+# that /setupregistration creates and is parsed once per guild.
+
+EMPTY_MANAGERS = "(Empty for now)"
+EMPTY_QUESTIONS = "(No questions set)"
+
+_QUESTION_RE = re.compile(r"^Q\s*(\d+)\s*:\s*(.*)$", re.IGNORECASE)
+_OPTION_SPLIT_RE = re.compile(r"\s*;\s*|\s*,\s*")
+_ROLE_MENTION_RE = re.compile(r"<@&(\d+)>")
+_CHANNEL_MENTION_RE = re.compile(r"<#(\d+)>")
+
+# Embed field name prefix -> config attribute
+_FIELD_KEYS = (
+    ("registration channel", "registration_channel"),
+    ("management channel", "management_channel"),
+    ("mode", "mode"),
+    ("manager role", "manager_roles"),
+    ("questions", "questions"),
+)
+
+def _field_key(name: str) -> Optional[str]:
+    name = (name or "").lower()
+    for prefix, key in _FIELD_KEYS:
+        if name.startswith(prefix):
+            return key
+    return None
+
+def _parse_mention(pattern: re.Pattern, value: str) -> Optional[int]:
+    m = pattern.match((value or "").strip())
+    return int(m.group(1)) if m else None
+
+@dataclass
+class Question:
+    """A registration question with its option -> role lookups precompiled"""
+    question: str
+    type: str = "Text"
+    action: str = ""
+    options: List[Tuple[str, str]] = field(default_factory=list)
+
+    def __post_init__(self):
+        # lowercased option text -> (option text, role ID or None)
+        self._choices = {
+            opt.lower(): (opt, _parse_mention(_ROLE_MENTION_RE, role_repr))
+            for opt, role_repr in self.options
+        }
+
+    @property
+    def is_option(self) -> bool:
+        return self.type.lower() == "option"
+
+    @property
+    def changes_nick(self) -> bool:
+        return self.type.lower() == "text" and self.action == "Nick Changer"
+
+    @property
+    def adds_role(self) -> bool:
+        return self.is_option and self.action == "Role Adder"
+
+    def match_option(self, answer: str) -> Optional[str]:
+        """Return the option text matching an answer (case-insensitive), or None"""
+        choice = self._choices.get(answer.strip().lower())
+        return choice[0] if choice else None
+
+    def role_for(self, answer: str) -> Optional[int]:
+        """Return the role ID bound to an answer, or None"""
+        choice = self._choices.get(answer.strip().lower())
+        return choice[1] if choice else None
+
+@dataclass
+class RegistrationConfig:
+    """Parsed registration system configuration of a guild"""
+    registration_channel_id: Optional[int] = None
+    management_channel_id: Optional[int] = None
+    mode: str = "Manual"
+    manager_role_ids: List[int] = field(default_factory=list)
+    questions: List[Question] = field(default_factory=list)
+    # Original embed (title, footer, color, extra fields) kept for round-tripping
+    embed_data: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def is_automatic(self) -> bool:
+        return self.mode.lower() == "automatic"
+
+    def copy(self) -> "RegistrationConfig":
+        return copy.deepcopy(self)
+
+    @classmethod
+    def from_embed_dict(cls, data: dict) -> "RegistrationConfig":
+        config = cls(embed_data=data)
+        for f in data.get("fields", []):
+            key = _field_key(f.get("name"))
+            value = f.get("value") or ""
+            if key == "registration_channel":
+                config.registration_channel_id = _parse_mention(_CHANNEL_MENTION_RE, value)
+            elif key == "management_channel":
+                config.management_channel_id = _parse_mention(_CHANNEL_MENTION_RE, value)
+            elif key == "mode":
+                config.mode = value.strip()
+            elif key == "manager_roles":
+                config.manager_role_ids = [int(role_id) for role_id in _ROLE_MENTION_RE.findall(value)]
+            elif key == "questions":
+                config.questions = parse_questions_field(value)
+        return config
+
+    def to_embed_dict(self) -> dict:
+        values = {
+            "registration_channel": ("Registration Channel", f"<#{self.registration_channel_id}>"),
+            "management_channel": ("Management Channel", f"<#{self.management_channel_id}>"),
+            "mode": ("Mode", self.mode),
+            "manager_roles": ("Manager Role(s)", "\n".join(f"<@&{role_id}>" for role_id in self.manager_role_ids) or EMPTY_MANAGERS),
+            "questions": ("Questions", format_questions_field(self.questions)),
+        }
+
+        fields = []
+        for f in self.embed_data.get("fields", []):
+            key = _field_key(f.get("name"))
+            if key is None:
+                fields.append(f)
+            elif key in values:
+                _, value = values.pop(key)
+                fields.append({"name": f["name"], "value": value, "inline": f.get("inline", False)})
+        for key, (name, value) in values.items():
+            if key == "questions" and not self.questions:
+                continue
+            fields.append({"name": name, "value": value, "inline": False})
+
+        data = dict(self.embed_data)
+        data["fields"] = fields
+        return data
+
+@dataclass
+class RegistrationPlan:
+    """Everything a finished registration changes on the member"""
+    nick: Optional[str] = None
+    role_ids: List[int] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.nick is None and not self.role_ids
+
+def build_registration_plan(questions: List[Question], answers: dict) -> RegistrationPlan:
+    """Collect the nickname and roles the answers grant. Role IDs were resolved when the config was parsed."""
+    plan = RegistrationPlan()
+    for idx, q in enumerate(questions):
+        ans = answers.get(idx)
+        if ans is None:
+            continue
+        if q.changes_nick:
+            plan.nick = ans
+        elif q.adds_role:
+            role_id = q.role_for(ans)
+            if role_id and role_id not in plan.role_ids:
+                plan.role_ids.append(role_id)
+    return plan
+
+def parse_questions_field(value: str) -> List[Question]:
+    """Parse the Questions embed field into Question objects, ordered by number"""
+    if not value:
+        return []
+    blocks = [b.strip() for b in value.split("\n\n") if b.strip()]
+    numbered = []
+    for block in blocks:
+        lines = [l.strip() for l in block.splitlines() if l.strip()]
+        if not lines:
+            continue
+        m = _QUESTION_RE.match(lines[0])
+        if not m:
+            continue
+        number = int(m.group(1))
+        question_text = m.group(2).strip()
+        typ = None
+        action = None
+        options = []
+        for ln in lines[1:]:
+            if ln.lower().startswith("• type:"):
+                typ = ln.split(":",1)[1].strip()
+            elif ln.lower().startswith("• action:"):
+                action = ln.split(":",1)[1].strip()
+            elif ln.lower().startswith("• options:"):
+                # stored as "Opt -> Role, Opt2 -> Role2" (older configs used ';')
+                opts_raw = ln.split(":",1)[1].strip()
+                for optpair in _OPTION_SPLIT_RE.split(opts_raw):
+                    if "->" in optpair:
+                        left, right = optpair.split("->",1)
+                        options.append((left.strip(), right.strip()))
+        numbered.append((number, Question(
+            question=question_text,
+            type=typ or "Text",
+            action=action or "",
+            options=options
+        )))
+    numbered.sort(key=lambda x: x[0])
+    return [q for _, q in numbered]
+
+def format_questions_field(questions: List[Question]) -> str:
+    """Format questions into the Questions embed field value"""
+    blocks = []
+    for idx, q in enumerate(questions, start=1):
+        lines = []
+        lines.append(f"Q{idx}: {q.question}")
+        lines.append(f"• Type: {q.type}")
+        lines.append(f"• Action: {q.action}")
+        if q.type.lower().startswith("option") and q.options:
+            opts = ", ".join(f"{opt} -> {role}" for opt, role in q.options)
+            lines.append(f"• Options: {opts}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) if blocks else EMPTY_QUESTIONS
+
+def extract_role_from_text(guild: discord.Guild, role_text: str) -> Optional[discord.Role]:
+    """Try to parse a role mention or role name and return discord.Role or None."""
+    role_text = role_text.strip()
+    # role mention pattern: <@&id>
+    m = _ROLE_MENTION_RE.match(role_text)
+    if m:
+        return guild.get_role(int(m.group(1)))
+    # try numeric id
+    if role_text.isdigit():
+        return guild.get_role(int(role_text))
+    # try by name (case-sensitive)
+    role = discord.utils.get(guild.roles, name=role_text)
+    if role:
+        return role
+    # try case-insensitive match
+    for r in guild.roles:
+        if r.name.lower() == role_text.lower():
+            return r
+    return None
+
+# guild_id -> RegistrationConfig, or None when the guild has no config
+_config_cache = {}
+
+async def get_registration_config(guild: discord.Guild) -> Optional[RegistrationConfig]:
+    """Get the guild's registration config, loading it from storage once"""
+    if guild.id in _config_cache:
+        return _config_cache[guild.id]
+
+    data = await get_storage().get_registration(guild)
+    config = RegistrationConfig.from_embed_dict(data) if data is not None else None
+    _config_cache[guild.id] = config
+    return config
+
+async def save_registration_config(guild: discord.Guild, config: RegistrationConfig):
+    """Persist a registration config and replace the cached copy"""
+    data = config.to_embed_dict()
+    await get_storage().save_registration(guild, data)
+    config.embed_data = data
+    _config_cache[guild.id] = config
+
+def invalidate_registration_config(guild_id: int):
+    """Drop the cached registration config of a guild"""
+    _config_cache.pop(guild_id, None)
+
+def questions_hash(questions: List[Question]) -> str:
+    """Fingerprint of a questionnaire, so saved answers are not applied to changed questions"""
+    return hashlib.sha256(format_questions_field(questions).encode()).hexdigest()[:16]
+
+def _encode_answers(answers: dict) -> str:
+    return json.dumps({str(idx): answer for idx, answer in answers.items()})
+
+def _decode_answers(data: str) -> dict:
+    return {int(idx): answer for idx, answer in json.loads(data).items()}
+
+@dataclass
+class SavedSession:
+    guild_id: int
+    user_id: int
+    page: int
+    answers: dict
+    questions_hash: str
+    updated_at: float
+
+@dataclass
+class RegistrationRequest:
+    """A manual registration waiting for a manager to accept or deny it"""
+    message_id: int
+    guild_id: int
+    channel_id: int
+    user_id: int
+    questions: List[Question]
+    answers: dict
+    created_at: float
+
+class RegistrationStore:
+    """Persists in-progress registrations and pending requests in the local database"""
+
+    def __init__(self, database: Database):
+        self.db = database
+
+    async def save_session(self, guild_id: int, user_id: int, page: int, answers: dict, qhash: str):
+        await self.db.execute(
+            "INSERT OR REPLACE INTO registration_sessions (guild_id, user_id, page, answers, questions_hash, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, user_id, page, _encode_answers(answers), qhash, time.time())
+        )
+
+    async def load_session(self, guild_id: int, user_id: int) -> Optional[SavedSession]:
+        row = await self.db.fetchone(
+            "SELECT page, answers, questions_hash, updated_at FROM registration_sessions WHERE guild_id = ? AND user_id = ?",
+            (guild_id, user_id)
+        )
+        if row is None:
+            return None
+        return SavedSession(guild_id, user_id, row[0], _decode_answers(row[1]), row[2], row[3])
+
+    async def delete_session(self, guild_id: int, user_id: int):
+        await self.db.execute("DELETE FROM registration_sessions WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+
+    async def delete_sessions_before(self, updated_before: float):
+        await self.db.execute("DELETE FROM registration_sessions WHERE updated_at < ?", (updated_before,))
+
+    async def save_request(self, request: RegistrationRequest):
+        await self.db.execute(
+            "INSERT OR REPLACE INTO registration_requests (message_id, guild_id, channel_id, user_id, questions, answers, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (request.message_id, request.guild_id, request.channel_id, request.user_id,
+             format_questions_field(request.questions), _encode_answers(request.answers), request.created_at)
+        )
+
+    async def take_request(self, message_id: int) -> Optional[RegistrationRequest]:
+        """Remove and return a pending request, so only one manager can handle it"""
+        def run(conn):
+            row = conn.execute(
+                "SELECT guild_id, channel_id, user_id, questions, answers, created_at FROM registration_requests WHERE message_id = ?",
+                (message_id,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM registration_requests WHERE message_id = ?", (message_id,))
+            return row
+
+        row = await self.db.run(run)
+        if row is None:
+            return None
+        return RegistrationRequest(message_id, row[0], row[1], row[2], parse_questions_field(row[3]), _decode_answers(row[4]), row[5])
+
+_store: Optional[RegistrationStore] = None
+
+def get_registration_store() -> RegistrationStore:
+    """Get the shared registration store"""
+    global _store
+    if _store is None:
+        _store = RegistrationStore(get_database())
+    return _store
@@ -0,0 +1,77 @@
+from functools import partial
+from typing import Optional, Hashable
+from scheduler import TimerScheduler, get_scheduler
+
+class ConversationRouter:
+    """Active multi-step conversations keyed by (scope, user).
+
+    Every interaction is routed to its conversation with one dict lookup,
+    and idle timeouts are timers on the shared scheduler instead of a
+    listener or a sleeping task per conversation. A session object may
+    define `async on_timeout()` to clean up when it expires.
+    """
+
+    def __init__(self, name: str, timeout: float, scheduler: Optional[TimerScheduler] = None):
+        self.name = name
+        self.timeout = timeout
+        self._scheduler = scheduler
+        self._sessions = {}
+        self.started = 0
+        self.routed = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._sessions
+
+    @property
+    def scheduler(self) -> TimerScheduler:
+        return self._scheduler or get_scheduler()
+
+    def _timer_key(self, key: Hashable) -> tuple:
+        return ("conversation", self.name, key)
+
+    def start(self, key: Hashable, session):
+        """Start a conversation, replacing any previous one under the same key"""
+        self._sessions[key] = session
+        self.started += 1
+        self.touch(key)
+        return session
+
+    def get(self, key: Hashable):
+        return self._sessions.get(key)
+
+    def route(self, key: Hashable):
+        """Get the conversation for an incoming interaction and restart its idle timeout"""
+        session = self._sessions.get(key)
+        if session is not None:
+            self.routed += 1
+            self.touch(key)
+        return session
+
+    def touch(self, key: Hashable):
+        self.scheduler.schedule(self._timer_key(key), self.timeout, partial(self._expire, key))
+
+    def end(self, key: Hashable):
+        """Finish a conversation; returns its session"""
+        self.scheduler.cancel(self._timer_key(key))
+        return self._sessions.pop(key, None)
+
+    async def _expire(self, key: Hashable):
+        session = self._sessions.pop(key, None)
+        if session is None:
+            return
+        self.expired += 1
+        on_timeout = getattr(session, "on_timeout", None)
+        if on_timeout is not None:
+            await on_timeout()
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._sessions),
+            "started": self.started,
+            "routed": self.routed,
+            "expired": self.expired,
+        }
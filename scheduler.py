@@ -0,0 +1,134 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from typing import Optional, Hashable
+
+log = logging.getLogger(__name__)
+
+class TimerScheduler:
+    """Owns many timers with a single asyncio task and a heap ordered by deadline.
+
+    Deadlines are wall-clock UNIX timestamps so they can be persisted.
+    Scheduling a key that already exists replaces its timer; every timer
+    fires at most once.
+    """
+
+    def __init__(self):
+        self._heap = []      # (when, seq, key); entries may be stale
+        self._timers = {}    # key -> (when, seq, callback)
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._firing = set()  # callbacks running; the loop only keeps weak references to tasks
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    @property
+    def pending(self) -> int:
+        """Number of timers waiting to fire"""
+        return len(self._timers)
+
+    def schedule_at(self, key: Hashable, when: float, callback):
+        """Run the coroutine function `callback` at UNIX time `when`"""
+        seq = next(self._seq)
+        self._timers[key] = (when, seq, callback)
+        heapq.heappush(self._heap, (when, seq, key))
+        self._compact()
+        self._ensure_running()
+        if self._heap[0][1] == seq:
+            # New earliest deadline: wake the runner so it sleeps less
+            self._wakeup.set()
+
+    def schedule(self, key: Hashable, delay: float, callback):
+        """Run the coroutine function `callback` after `delay` seconds"""
+        self.schedule_at(key, time.time() + delay, callback)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel a timer; returns False if it was not pending"""
+        return self._timers.pop(key, None) is not None
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        entry = self._timers.get(key)
+        return entry[0] if entry else None
+
+    def next_deadline(self) -> Optional[float]:
+        """UNIX time of the earliest pending timer"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._timers),
+            "next_deadline": self.next_deadline(),
+            "fired": self.fired,
+            "heap_size": len(self._heap),
+        }
+
+    def _is_current(self, entry: tuple) -> bool:
+        timer = self._timers.get(entry[2])
+        return timer is not None and timer[1] == entry[1]
+
+    def _drop_stale(self):
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        # Cancelled and rescheduled timers leave stale heap entries behind
+        if len(self._heap) > 2 * len(self._timers) + 64:
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, key = heapq.heappop(self._heap)
+                _, _, callback = self._timers.pop(key)
+                self.fired += 1
+                task = asyncio.create_task(self._fire(key, callback))
+                self._firing.add(task)
+                task.add_done_callback(self._firing.discard)
+                self._drop_stale()
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, key: Hashable, callback):
+        try:
+            await callback()
+        except Exception:
+            log.exception("Error in scheduled task %r", key)
+
+    def close(self):
+        """Stop the runner and drop every timer"""
+        self._timers.clear()
+        self._heap.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+_scheduler: Optional[TimerScheduler] = None
+
+def get_scheduler() -> TimerScheduler:
+    """Get the shared scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TimerScheduler()
+    return _scheduler
@@ -0,0 +1,74 @@
+import time
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Optional, List, Dict
+
+log = logging.getLogger(__name__)
+
+# Startup profile: time from main() to on_ready, split into phases, plus
+# per-module import and registration times recorded by the command loader.
+
+@dataclass
+class ModuleTiming:
+    name: str
+    import_ms: float = 0.0
+    register_ms: float = 0.0
+    commands: int = 0
+    lazy: bool = False
+    error: Optional[str] = None
+
+@dataclass
+class StartupReport:
+    started: float = field(default_factory=time.perf_counter)
+    phases: Dict[str, float] = field(default_factory=dict)  # phase -> ms since start
+    modules: List[ModuleTiming] = field(default_factory=list)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.phases.clear()
+
+    def mark(self, phase: str) -> float:
+        """Record that a phase finished; returns ms since start"""
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.phases[phase] = elapsed
+        return elapsed
+
+    def module(self, name: str) -> ModuleTiming:
+        for timing in self.modules:
+            if timing.name == name:
+                return timing
+        timing = ModuleTiming(name)
+        self.modules.append(timing)
+        return timing
+
+    @property
+    def ready_ms(self) -> Optional[float]:
+        return self.phases.get("ready")
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": dict(self.phases),
+            "modules": [asdict(timing) for timing in self.modules],
+        }
+
+    def summary(self, slowest: int = 5) -> str:
+        phases = ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.phases.items())
+        loaded = [timing for timing in self.modules if not timing.error]
+        failed = [timing for timing in self.modules if timing.error]
+        total = sum(timing.import_ms + timing.register_ms for timing in loaded)
+        lines = [f"Startup: {phases}", f"Loaded {len(loaded)} command module(s) in {total:.0f}ms, {len(failed)} failed"]
+        for timing in sorted(loaded, key=lambda t: t.import_ms + t.register_ms, reverse=True)[:slowest]:
+            lazy = " (lazy)" if timing.lazy else ""
+            lines.append(f"  {timing.name}: import {timing.import_ms:.1f}ms, register {timing.register_ms:.1f}ms{lazy}")
+        for timing in failed:
+            lines.append(f"  {timing.name}: FAILED {timing.error}")
+        return "\n".join(lines)
+
+_report: Optional[StartupReport] = None
+
+def get_startup_report() -> StartupReport:
+    """Get the report of the current process start"""
+    global _report
+    if _report is None:
+        _report = StartupReport()
+    return _report
@@ -0,0 +1,46 @@
+import copy
+import discord
+
+# Responses that never change are built and serialized once when their
+# module is loaded, instead of rebuilding the same embed on every command.
+
+class FrozenEmbed(discord.Embed):
+    """An embed serialized once; to_dict returns that payload on every send.
+
+    It is read-only so the cached payload cannot go stale: use copy() to
+    get a regular embed that can be changed.
+    """
+
+    __slots__ = ("_payload",)
+
+    @classmethod
+    def freeze(cls, embed: discord.Embed) -> "FrozenEmbed":
+        payload = embed.to_dict()
+        frozen = cls.from_dict(copy.deepcopy(payload))
+        if hasattr(frozen, "_fields"):
+            object.__setattr__(frozen, "_fields", tuple(frozen._fields))
+        object.__setattr__(frozen, "_payload", payload)
+        return frozen
+
+    def __setattr__(self, name, value):
+        if hasattr(self, "_payload"):
+            raise TypeError("FrozenEmbed is read-only, change a copy() instead")
+        super().__setattr__(name, value)
+
+    def to_dict(self) -> dict:
+        return self._payload
+
+    def copy(self) -> discord.Embed:
+        return discord.Embed.from_dict(copy.deepcopy(self._payload))
+
+class StaticResponse:
+    """An ephemeral reply whose embed is built once"""
+
+    __slots__ = ("embed", "ephemeral")
+
+    def __init__(self, embed: discord.Embed, ephemeral: bool = True):
+        self.embed = FrozenEmbed.freeze(embed)
+        self.ephemeral = ephemeral
+
+    async def send(self, interaction: discord.Interaction):
+        await interaction.response.send_message(embed=self.embed, ephemeral=self.ephemeral)
@@ -0,0 +1,411 @@
+import os
+import json
+import time
+import asyncio
+import struct
+import base64
+import logging
+from typing import Optional, List
+import discord
+import utils
+from database import Database, get_database, close_database
+from cleanup import get_cleanup
+
+log = logging.getLogger(__name__)
+
+# Storage backend for per-guild data, selected with STORAGE_BACKEND:
+#   sqlite  - local SQLite database at DATABASE_PATH (default)
+#   channel - messages in the "Amethis' Data" category of every guild
+
+# Seconds before a failed import of a guild's channel data is tried again
+MIGRATION_RETRY = 300
+
+REGISTRATION_TITLES = {
+    "REGISTRATION SYSTEM",
+    "📋 REGISTRATION SYSTEM",
+    "<:scroll:1427519497207812168> REGISTRATION SYSTEM",
+    "<:scroll:1427519497207812168> REGISTRATION SYSTEM".upper()
+}
+
+ADMIN_ROLES_PAYLOAD_TITLE = "ADMIN_ROLES"
+
+def _build_admin_roles_payload(admin_roles: List[int]) -> discord.Embed:
+    """Serialize role IDs as base64 packed 64-bit integers in a data embed"""
+    packed = struct.pack(f">{len(admin_roles)}Q", *admin_roles)
+    payload = base64.urlsafe_b64encode(packed).decode("ascii").rstrip("=")
+    embed = discord.Embed(title=ADMIN_ROLES_PAYLOAD_TITLE, description=payload or None)
+    embed.set_footer(text="Amethis data - do not edit")
+    return embed
+
+def _read_admin_roles_payload(message: discord.Message) -> Optional[List[int]]:
+    for embed in message.embeds:
+        if embed.title != ADMIN_ROLES_PAYLOAD_TITLE:
+            continue
+        payload = embed.description or ""
+        try:
+            packed = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            return list(struct.unpack(f">{len(packed) // 8}Q", packed))
+        except (ValueError, struct.error):
+            return None
+    return None
+
+def _is_admin_roles_message(message: discord.Message) -> bool:
+    return bool(message.embeds) and message.embeds[0].title == utils.ADMIN_ROLES_TITLE
+
+def _is_registration_message(message: discord.Message) -> bool:
+    if not message.embeds:
+        return False
+    title = (message.embeds[0].title or "").strip()
+    return title in REGISTRATION_TITLES or title.upper() in REGISTRATION_TITLES
+
+class StorageBackend:
+    """Interface shared by all storage backends"""
+    name = "base"
+
+    async def get_admin_roles(self, guild: discord.Guild) -> List[int]:
+        raise NotImplementedError
+
+    async def save_admin_roles(self, guild: discord.Guild, admin_roles: List[int]):
+        raise NotImplementedError
+
+    async def get_registration(self, guild: discord.Guild) -> Optional[dict]:
+        """Return the registration config as an embed dict, or None if not set up"""
+        raise NotImplementedError
+
+    async def save_registration(self, guild: discord.Guild, data: dict):
+        raise NotImplementedError
+
+    async def prepare_guilds(self, guilds: List[discord.Guild]):
+        """One-time work for guilds, run in the background so it never delays a command"""
+        pass
+
+    async def close(self):
+        pass
+
+class ChannelStorage(StorageBackend):
+    """Stores data as messages in the guild's "Amethis' Data" category"""
+    name = "channel"
+
+    def __init__(self):
+        # (guild_id, kind) -> (channel_id, message_id) of the message holding the data
+        self._message_index = {}
+
+    async def get_admin_roles(self, guild: discord.Guild) -> List[int]:
+        channel = await utils.get_admin_roles_channel(guild)
+        message = await self._find_admin_roles_message(guild, channel)
+        if message is not None:
+            role_ids = _read_admin_roles_payload(message)
+            if role_ids is not None:
+                return role_ids
+
+        # Older versions stored one ADMIN_ROLE:<id> message per role; convert them once
+        legacy = await self._read_legacy_admin_roles(channel)
+        if not legacy:
+            return []
+        admin_roles = list(dict.fromkeys(role_id for role_id, _ in legacy))
+        await self._write_admin_roles(guild, channel, admin_roles, message)
+        get_cleanup().delete_many(legacy_message for _, legacy_message in legacy)
+        return admin_roles
+
+    async def _read_legacy_admin_roles(self, channel: discord.TextChannel) -> list:
+        legacy = []
+        async for message in channel.history(limit=None):
+            if message.content.startswith("ADMIN_ROLE:"):
+                try:
+                    legacy.append((int(message.content.split(":")[1].strip()), message))
+                except (ValueError, IndexError):
+                    continue
+        return legacy
+
+    async def save_admin_roles(self, guild: discord.Guild, admin_roles: List[int]):
+        channel = await utils.get_admin_roles_channel(guild)
+        await self._write_admin_roles(guild, channel, admin_roles)
+
+    async def _write_admin_roles(self, guild: discord.Guild, channel: discord.TextChannel, admin_roles: List[int], message: Optional[discord.Message] = None):
+        """Write the display embed and the serialized role IDs with a single request"""
+        embeds = [utils.build_admin_roles_embed(admin_roles), _build_admin_roles_payload(admin_roles)]
+
+        partial = message or self._get_indexed_partial(guild, "admin_roles")
+        if partial is None:
+            partial = await self._find_admin_roles_message(guild, channel)
+        if partial is not None:
+            try:
+                await partial.edit(content=None, embeds=embeds)
+                return
+            except discord.NotFound:
+                self._message_index.pop((guild.id, "admin_roles"), None)
+
+        message = await channel.send(embeds=embeds)
+        await self._pin(message)
+        self._index_message(guild, "admin_roles", message)
+
+    async def _find_admin_roles_message(self, guild: discord.Guild, channel: discord.TextChannel) -> Optional[discord.Message]:
+        message = await self._fetch_indexed_message(guild, "admin_roles")
+        if message is not None:
+            return message
+
+        try:
+            matches = [msg for msg in await channel.pins() if _is_admin_roles_message(msg)]
+        except discord.HTTPException:
+            matches = []
+        if not matches:
+            matches = [msg async for msg in channel.history(limit=None) if _is_admin_roles_message(msg)]
+            if not matches:
+                return None
+
+        newest, *older = sorted(matches, key=lambda msg: msg.id, reverse=True)
+        get_cleanup().delete_many(older)
+
+        await self._pin(newest)
+        self._index_message(guild, "admin_roles", newest)
+        return newest
+
+    def _get_data_channel(self, guild: discord.Guild, name: str) -> Optional[discord.TextChannel]:
+        category = discord.utils.get(guild.categories, name=utils.DATA_CATEGORY_NAME)
+        if category is None:
+            return None
+        return discord.utils.get(category.text_channels, name=name)
+
+    def _index_message(self, guild: discord.Guild, kind: str, message: discord.Message):
+        self._message_index[(guild.id, kind)] = (message.channel.id, message.id)
+
+    def _get_indexed_partial(self, guild: discord.Guild, kind: str) -> Optional[discord.PartialMessage]:
+        entry = self._message_index.get((guild.id, kind))
+        if entry is None:
+            return None
+        channel = guild.get_channel(entry[0])
+        if channel is None:
+            self._message_index.pop((guild.id, kind), None)
+            return None
+        return channel.get_partial_message(entry[1])
+
+    async def _fetch_indexed_message(self, guild: discord.Guild, kind: str) -> Optional[discord.Message]:
+        partial = self._get_indexed_partial(guild, kind)
+        if partial is None:
+            return None
+        try:
+            return await partial.fetch()
+        except discord.NotFound:
+            self._message_index.pop((guild.id, kind), None)
+            return None
+
+    async def _find_registration_message(self, guild: discord.Guild) -> Optional[discord.Message]:
+        message = await self._fetch_indexed_message(guild, "registration")
+        if message is not None:
+            return message
+
+        reg_channel = self._get_data_channel(guild, "registration-data")
+        if reg_channel is None:
+            return None
+        return await self._rebuild_registration_index(guild, reg_channel)
+
+    async def _rebuild_registration_index(self, guild: discord.Guild, channel: discord.TextChannel) -> Optional[discord.Message]:
+        """Locate the config embed after an index miss, compacting older duplicates"""
+        # The current config embed is pinned, so this is usually a single request
+        try:
+            matches = [msg for msg in await channel.pins() if _is_registration_message(msg)]
+        except discord.HTTPException:
+            matches = []
+
+        if not matches:
+            matches = [msg async for msg in channel.history(limit=None) if _is_registration_message(msg)]
+            if not matches:
+                return None
+
+        newest, *older = sorted(matches, key=lambda msg: msg.id, reverse=True)
+        get_cleanup().delete_many(older)
+
+        await self._pin(newest)
+        self._index_message(guild, "registration", newest)
+        return newest
+
+    async def _pin(self, message: discord.Message):
+        if message.pinned:
+            return
+        try:
+            await message.pin(reason="Amethis configuration index")
+        except discord.HTTPException:
+            # Missing Manage Messages: the in-memory index still works until restart
+            pass
+
+    async def get_registration(self, guild: discord.Guild) -> Optional[dict]:
+        message = await self._find_registration_message(guild)
+        if message is None:
+            return None
+        return message.embeds[0].to_dict()
+
+    async def save_registration(self, guild: discord.Guild, data: dict):
+        embed = discord.Embed.from_dict(data)
+
+        # Known message: edit it directly without fetching it first
+        partial = self._get_indexed_partial(guild, "registration")
+        if partial is not None:
+            try:
+                await partial.edit(embed=embed)
+                return
+            except discord.NotFound:
+                self._message_index.pop((guild.id, "registration"), None)
+
+        message = await self._find_registration_message(guild)
+        if message is not None:
+            await message.edit(embed=embed)
+            return
+
+        channel = await utils.get_registration_data_channel(guild)
+        message = await channel.send(embed=embed)
+        await self._pin(message)
+        self._index_message(guild, "registration", message)
+
+    async def export_guild(self, guild: discord.Guild) -> tuple:
+        """Read existing admin roles and registration config without changing anything.
+
+        Unlike the regular getters this creates no channels and does not convert
+        legacy messages, pin, index or clean up duplicates.
+        """
+        category = discord.utils.get(guild.categories, name=utils.DATA_CATEGORY_NAME)
+        if category is None:
+            return [], None
+
+        admin_roles = []
+        channel = discord.utils.get(category.text_channels, name="admin-roles")
+        if channel is not None:
+            message = await self._find_newest(channel, _is_admin_roles_message)
+            role_ids = _read_admin_roles_payload(message) if message is not None else None
+            if role_ids is None:
+                legacy = await self._read_legacy_admin_roles(channel)
+                role_ids = list(dict.fromkeys(role_id for role_id, _ in legacy))
+            admin_roles = role_ids
+
+        registration = None
+        channel = discord.utils.get(category.text_channels, name="registration-data")
+        if channel is not None:
+            message = await self._find_newest(channel, _is_registration_message)
+            if message is not None:
+                registration = message.embeds[0].to_dict()
+
+        return admin_roles, registration
+
+    async def _find_newest(self, channel: discord.TextChannel, matches) -> Optional[discord.Message]:
+        """Newest message accepted by matches, looking in the pins first"""
+        try:
+            found = [msg for msg in await channel.pins() if matches(msg)]
+        except discord.HTTPException:
+            found = []
+        if not found:
+            found = [msg async for msg in channel.history(limit=None) if matches(msg)]
+        return max(found, key=lambda msg: msg.id, default=None)
+
+class SQLiteStorage(StorageBackend):
+    """Stores data in a local SQLite database, importing channel data once per guild"""
+    name = "sqlite"
+
+    def __init__(self, database: Database, legacy: Optional[ChannelStorage] = None):
+        self.db = database
+        self.legacy = legacy
+        self._migrated = set()
+        self._migration_locks = {}
+        self._retry_at = {}  # guild id -> monotonic time the failed import may be tried again
+
+    async def prepare_guilds(self, guilds: List[discord.Guild]):
+        """Import the channel data of guilds not imported yet, ahead of their first command"""
+        rows = await self.db.fetchall("SELECT guild_id FROM guilds")
+        self._migrated.update(row[0] for row in rows)
+        for guild in guilds:
+            await self._ensure_migrated(guild)
+
+    async def _ensure_migrated(self, guild: discord.Guild):
+        if guild.id in self._migrated or self._retry_at.get(guild.id, 0) > time.monotonic():
+            return
+
+        lock = self._migration_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            if guild.id in self._migrated or self._retry_at.get(guild.id, 0) > time.monotonic():
+                return
+            row = await self.db.fetchone("SELECT 1 FROM guilds WHERE guild_id = ?", (guild.id,))
+            if row is None:
+                try:
+                    await self.migrate_guild(guild)
+                except discord.HTTPException as e:
+                    # Not recorded as imported, so a later access tries again
+                    self._retry_at[guild.id] = time.monotonic() + MIGRATION_RETRY
+                    log.warning("Could not import the channel data of guild %s: %s", guild.id, e)
+                    return
+            self._retry_at.pop(guild.id, None)
+            self._migrated.add(guild.id)
+        self._migration_locks.pop(guild.id, None)
+
+    async def migrate_guild(self, guild: discord.Guild):
+        """Import the guild's existing channel data into the database.
+
+        Data saved while earlier imports kept failing takes precedence.
+        """
+        admin_roles, registration = [], None
+        if self.legacy is not None:
+            admin_roles, registration = await self.legacy.export_guild(guild)
+
+        now = time.time()
+        statements = []
+        if await self.db.fetchone("SELECT 1 FROM admin_roles WHERE guild_id = ?", (guild.id,)) is None:
+            statements.extend(
+                ("INSERT OR IGNORE INTO admin_roles (guild_id, role_id) VALUES (?, ?)", (guild.id, role_id))
+                for role_id in admin_roles
+            )
+        if registration is not None:
+            statements.append((
+                "INSERT OR IGNORE INTO registration_config (guild_id, data, updated_at) VALUES (?, ?, ?)",
+                (guild.id, json.dumps(registration), now)
+            ))
+        statements.append(("INSERT OR REPLACE INTO guilds (guild_id, migrated_at) VALUES (?, ?)", (guild.id, now)))
+        await self.db.transaction(statements)
+
+        if admin_roles or registration is not None:
+            print(f"Imported channel data for guild {guild.id} ({len(admin_roles)} admin role(s), registration: {registration is not None})")
+
+    async def get_admin_roles(self, guild: discord.Guild) -> List[int]:
+        await self._ensure_migrated(guild)
+        rows = await self.db.fetchall("SELECT role_id FROM admin_roles WHERE guild_id = ? ORDER BY rowid", (guild.id,))
+        return [row[0] for row in rows]
+
+    async def save_admin_roles(self, guild: discord.Guild, admin_roles: List[int]):
+        await self._ensure_migrated(guild)
+        statements = [("DELETE FROM admin_roles WHERE guild_id = ?", (guild.id,))]
+        statements.extend(
+            ("INSERT OR IGNORE INTO admin_roles (guild_id, role_id) VALUES (?, ?)", (guild.id, role_id))
+            for role_id in admin_roles
+        )
+        await self.db.transaction(statements)
+
+    async def get_registration(self, guild: discord.Guild) -> Optional[dict]:
+        await self._ensure_migrated(guild)
+        row = await self.db.fetchone("SELECT data FROM registration_config WHERE guild_id = ?", (guild.id,))
+        return json.loads(row[0]) if row else None
+
+    async def save_registration(self, guild: discord.Guild, data: dict):
+        await self._ensure_migrated(guild)
+        await self.db.execute(
+            "INSERT OR REPLACE INTO registration_config (guild_id, data, updated_at) VALUES (?, ?, ?)",
+            (guild.id, json.dumps(data), time.time())
+        )
+
+_storage: Optional[StorageBackend] = None
+
+def get_storage() -> StorageBackend:
+    """Get the storage backend configured with STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        backend = (os.getenv("STORAGE_BACKEND") or "sqlite").lower()
+        if backend == "sqlite":
+            _storage = SQLiteStorage(get_database(), legacy=ChannelStorage())
+        elif backend == "channel":
+            _storage = ChannelStorage()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    return _storage
+
+async def close_storage():
+    """Close the storage backend and the local database"""
+    global _storage
+    if _storage is not None:
+        await _storage.close()
+    _storage = None
+    await close_database()
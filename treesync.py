@@ -0,0 +1,53 @@
+import json
+import time
+import hashlib
+from typing import Optional
+import discord
+from discord import app_commands
+from database import get_database
+
+# Command tree sync that is skipped when the commands did not change.
+# The hash of the last successfully synced payload is kept per application
+# and target (global or one guild) in the local database.
+
+def command_payload(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> list:
+    """The payload tree.sync() would send, in a stable order"""
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    return sorted(payload, key=lambda command: (command.get("type", 1), command["name"]))
+
+def command_hash(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    data = json.dumps(command_payload(tree, guild), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def _state_key(application_id: int, guild_id: Optional[int]) -> str:
+    return f"command_hash:{application_id}:{guild_id or 'global'}"
+
+async def get_synced_hash(application_id: int, guild_id: Optional[int] = None) -> Optional[str]:
+    row = await get_database().fetchone("SELECT value FROM bot_state WHERE key = ?", (_state_key(application_id, guild_id),))
+    return row[0] if row else None
+
+async def set_synced_hash(application_id: int, guild_id: Optional[int], value: str):
+    await get_database().execute(
+        "INSERT OR REPLACE INTO bot_state (key, value, updated_at) VALUES (?, ?, ?)",
+        (_state_key(application_id, guild_id), value, time.time())
+    )
+
+async def sync_commands(tree: app_commands.CommandTree, application_id: int,
+                        guild_id: Optional[int] = None, force: bool = False) -> Optional[int]:
+    """Sync the tree if its commands changed since the last sync.
+
+    With guild_id the global commands are copied to that guild and synced
+    there only, which is instant and suited to development.
+    Returns the number of synced commands, or None if the sync was skipped.
+    """
+    guild = discord.Object(id=guild_id) if guild_id else None
+    if guild is not None:
+        tree.copy_global_to(guild=guild)
+
+    current = command_hash(tree, guild)
+    if not force and await get_synced_hash(application_id, guild_id) == current:
+        return None
+
+    synced = await tree.sync(guild=guild)
+    await set_synced_hash(application_id, guild_id, current)
+    return len(synced)
@@ -1,5 +1,16 @@
+import asyncio
 import discord
 from discord import app_commands
+import storage
+
+DATA_CATEGORY_NAME = "Amethis' Data"
+ADMIN_ROLES_TITLE = "<:shield:1427515556113809479> Amethis Admin Roles"
+
+# In-memory admin role cache: guild_id -> frozenset of role IDs
+_admin_role_cache = {}
+_admin_role_cache_stats = {"hits": 0, "misses": 0}
+# guild_id -> lock serializing admin role writes and cache-miss reads
+_admin_role_locks = {}
 
 async def is_admin(interaction: discord.Interaction) -> bool:
     """Check if user has administrator permissions or is in admin roles"""
@@ -15,22 +26,54 @@ async def is_admin(interaction: discord.Interaction) -> bool:
     if interaction.user.guild_permissions.administrator:
         return True
     
-    # Check if user has any admin roles
-    admin_roles = await get_admin_roles(interaction.guild)
-    user_roles = [role.id for role in interaction.user.roles]
+    # Check if user has any admin roles (served from the per-guild cache)
+    admin_roles = await get_cached_admin_roles(interaction.guild)
+    if not admin_roles:
+        return False
     
-    return any(role_id in user_roles for role_id in admin_roles)
+    return not admin_roles.isdisjoint(role.id for role in interaction.user.roles)
+
+async def get_cached_admin_roles(guild: discord.Guild) -> frozenset:
+    """Get admin role IDs for a guild, reading the data channel only on a cache miss"""
+    cached = _admin_role_cache.get(guild.id)
+    if cached is not None:
+        _admin_role_cache_stats["hits"] += 1
+        return cached
+    
+    _admin_role_cache_stats["misses"] += 1
+    # Under the write lock, so a slow read cannot replace roles cached by a newer write,
+    # and concurrent misses read (and convert legacy storage) once
+    async with admin_roles_lock(guild.id):
+        cached = _admin_role_cache.get(guild.id)
+        if cached is not None:
+            return cached
+        admin_roles = frozenset(await get_admin_roles(guild))
+        _admin_role_cache[guild.id] = admin_roles
+        return admin_roles
+
+def invalidate_admin_roles(guild_id: int):
+    """Drop the cached admin roles of a guild so the next check reloads them"""
+    _admin_role_cache.pop(guild_id, None)
+
+def is_cached_admin_role(guild_id: int, role_id: int) -> bool:
+    """Check if a role is part of a guild's cached admin roles"""
+    return role_id in _admin_role_cache.get(guild_id, ())
+
+def get_admin_role_cache_stats() -> dict:
+    """Get hit/miss counters and the number of cached guilds"""
+    return {
+        **_admin_role_cache_stats,
+        "guilds": len(_admin_role_cache)
+    }
 
 async def get_data_category(guild: discord.Guild) -> discord.CategoryChannel:
     """Get or create the Amethis data category"""
-    category_name = "Amethis' Data"
-    
     for category in guild.categories:
-        if category.name == category_name:
+        if category.name == DATA_CATEGORY_NAME:
             return category
     
     category = await guild.create_category_channel(
-        name=category_name,
+        name=DATA_CATEGORY_NAME,
         overwrites={
             guild.default_role: discord.PermissionOverwrite(view_channel=False),
             guild.me: discord.PermissionOverwrite(view_channel=True)
@@ -58,57 +101,88 @@ async def get_admin_roles_channel(guild: discord.Guild) -> discord.TextChannel:
     )
     return channel
 
-async def get_admin_roles(guild: discord.Guild) -> list:
-    """Get admin roles from data channel"""
-    channel = await get_admin_roles_channel(guild)
+async def get_registration_data_channel(guild: discord.Guild) -> discord.TextChannel:
+    """Get or create the registration-data channel"""
+    category = await get_data_category(guild)
+    channel_name = "registration-data"
     
-    admin_roles = []
-    async for message in channel.history(limit=10):
-        if message.content.startswith("ADMIN_ROLE:"):
-            try:
-                role_id = int(message.content.split(":")[1].strip())
-                admin_roles.append(role_id)
-            except (ValueError, IndexError):
-                continue
+    channel = discord.utils.get(category.text_channels, name=channel_name)
+    if channel:
+        return channel
     
-    return admin_roles
+    channel = await category.create_text_channel(
+        name=channel_name,
+        overwrites={
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
+        },
+        reason="For storing registration system configuration"
+    )
+    return channel
+
+async def get_admin_roles(guild: discord.Guild) -> list:
+    """Get admin roles from the configured storage backend"""
+    return await storage.get_storage().get_admin_roles(guild)
+
+def admin_roles_lock(guild_id: int) -> asyncio.Lock:
+    """Get the lock that serializes admin role writes and cache misses for a guild"""
+    lock = _admin_role_locks.get(guild_id)
+    if lock is None:
+        lock = _admin_role_locks[guild_id] = asyncio.Lock()
+    return lock
 
 async def save_admin_roles(guild: discord.Guild, admin_roles: list):
-    """Save admin roles to data channel"""
-    channel = await get_admin_roles_channel(guild)
-    
-    async for message in channel.history(limit=50):
-        if message.content.startswith("ADMIN_ROLE:"):
-            await message.delete()
-    
-    for role_id in admin_roles:
-        await channel.send(f"ADMIN_ROLE:{role_id}")
-    
-    display_message = await get_or_create_display_message(channel)
-    role_mentions = [f"<@&{role_id}>" for role_id in admin_roles]
-    role_list = "\n".join(role_mentions) if role_mentions else "No admin roles set"
+    """Save admin roles to the configured storage backend"""
+    async with admin_roles_lock(guild.id):
+        await _write_admin_roles(guild, admin_roles)
+
+async def _write_admin_roles(guild: discord.Guild, admin_roles: list):
+    await storage.get_storage().save_admin_roles(guild, admin_roles)
+    _admin_role_cache[guild.id] = frozenset(admin_roles)
+
+async def add_admin_role(guild: discord.Guild, role_id: int) -> bool:
+    """Add an admin role; returns False if it was already set"""
+    async with admin_roles_lock(guild.id):
+        admin_roles = await get_admin_roles(guild)
+        if role_id in admin_roles:
+            return False
+        admin_roles.append(role_id)
+        await _write_admin_roles(guild, admin_roles)
+        return True
+
+async def remove_admin_role(guild: discord.Guild, role_id: int) -> bool:
+    """Remove an admin role; returns False if it was not set"""
+    async with admin_roles_lock(guild.id):
+        admin_roles = await get_admin_roles(guild)
+        if role_id not in admin_roles:
+            return False
+        admin_roles.remove(role_id)
+        await _write_admin_roles(guild, admin_roles)
+        return True
+
+def format_role_list(role_ids: list, limit: int = 1024) -> str:
+    """Format role mentions one per line, truncated to fit an embed field"""
+    lines = []
+    length = 0
+    for index, role_id in enumerate(role_ids):
+        line = f"<@&{role_id}>"
+        # Keep room for a trailing "...and N more" line
+        if length + len(line) > limit - 20:
+            lines.append(f"...and {len(role_ids) - index} more")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+def build_admin_roles_embed(admin_roles: list) -> discord.Embed:
+    """Build the admin roles display embed"""
+    role_list = format_role_list(admin_roles) if admin_roles else "No admin roles set"
     
     embed = discord.Embed(
-        title="<:shield:1427515556113809479> Amethis Admin Roles",
+        title=ADMIN_ROLES_TITLE,
         description="**Administrator roles for this server:**",
         color=discord.Color.purple()
     )
     embed.add_field(name="Admin Roles", value=role_list, inline=False)
     embed.set_footer(text="Use /addadminrole to add more roles")
-    
-    await display_message.edit(embed=embed)
-
-async def get_or_create_display_message(channel: discord.TextChannel) -> discord.Message:
-    """Get or create the display message in the admin roles channel"""
-    async for message in channel.history(limit=10):
-        if message.embeds and message.embeds[0].title == "<:shield:1427515556113809479> Amethis Admin Roles":
-            return message
-    embed = discord.Embed(
-        title="<:shield:1427515556113809479> Amethis Admin Roles",
-        description="**Administrator roles for this server:**",
-        color=discord.Color.purple()
-    )
-    embed.add_field(name="Admin Roles", value="No admin roles set", inline=False)
-    embed.set_footer(text="Use /addadminrole to add more roles")
-    
-    return await channel.send(embed=embed)
\ No newline at end of file
+    return embed